@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Application, Integration, Capability, TechDebtItem
+from .models import Application, Integration, Capability, TechDebtItem, Job
 
 admin.site.register(Application)
 admin.site.register(Integration)
 admin.site.register(Capability)
-admin.site.register(TechDebtItem)
\ No newline at end of file
+admin.site.register(TechDebtItem)
+admin.site.register(Job)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class ApplicationsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "applications"
+
+    def ready(self):
+        # registrace signálů (verze grafu pro cache diagramů) a system checks
+        from . import checks, signals  # noqa: F401
+        from .services.request_timing import install_sql_wrapper
+        from .services.sqlite_tuning import configure_connection
+
+        # počítání SQL dotazů requestu (Server-Timing)
+        connection_created.connect(install_sql_wrapper, dispatch_uid="request_timing_sql")
+        # WAL, busy_timeout a další PRAGMA podle SQLITE_PROFILE
+        connection_created.connect(configure_connection, dispatch_uid="sqlite_tuning")
@@ -0,0 +1,36 @@
+from django.core.checks import Tags, Warning, register
+
+from .services.page_cache import page_cache_enabled
+from .services.versions import cache_is_shared, local_version_seconds
+
+
+@register(Tags.caches)
+def page_cache_backend_check(app_configs, **kwargs):
+    # verze portfolia i uložené stránky jsou v cache => s LocMem je každý proces vidí jinak
+    if page_cache_enabled() and not cache_is_shared():
+        return [Warning(
+            "PAGE_CACHE_ENABLED with a per-process cache backend.",
+            hint=(
+                "A change handled by one worker process does not invalidate pages cached by the others, "
+                "so they serve stale pages for up to PAGE_CACHE_SECONDS. Configure a shared backend "
+                "(CACHE_BACKEND / CACHE_LOCATION, e.g. Redis) or set PAGE_CACHE_ENABLED=0."
+            ),
+            id="applications.W001",
+        )]
+    return []
+
+
+@register(Tags.caches)
+def versioned_cache_check(app_configs, **kwargs):
+    # graf a výsledky podle verze GRAPH / PORTFOLIO: s LocMem je aktualizuje jen vypršení klíče verze
+    if not cache_is_shared() and not local_version_seconds():
+        return [Warning(
+            "CACHE_LOCAL_VERSION_SECONDS=0 with a per-process cache backend.",
+            hint=(
+                "Graph and portfolio versions never expire, so a worker process that did not handle a change "
+                "keeps serving its old graph, diagrams, impact, sync chains, flow matrix and facets. "
+                "Configure a shared backend (CACHE_BACKEND / CACHE_LOCATION) or set CACHE_LOCAL_VERSION_SECONDS."
+            ),
+            id="applications.W002",
+        )]
+    return []
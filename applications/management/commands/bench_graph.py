@@ -0,0 +1,116 @@
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from applications.services.graph import (
+    GraphIndex, OP_EDGE, OP_EDGE_DELETE, DIRECTION_OUT, METRIC_PAGERANK,
+)
+
+
+def _synthetic(apps, edges, seed):
+    """Náhodný portfolio graf: pár hub aplikací s hodně integracemi, zbytek řídký (seznamy pro GraphIndex)."""
+    rng = np.random.default_rng(seed)
+    domains = ["CoreBanking", "Payments", "Cards", "Risk", "CRM", "Channels", "Data", "Treasury"]
+    app_rows = [
+        (i + 1, f"App {i + 1}", domains[i % len(domains)], ("High", "Medium", "Low")[i % 3])
+        for i in range(apps)
+    ]
+    # druhá mocnina => nízká id jsou častěji zdrojem i cílem (huby)
+    src = (apps * rng.random(edges) ** 2).astype(np.int64) + 1
+    dst = rng.integers(1, apps + 1, edges)
+    volume = rng.integers(0, 100_000, edges)
+    sync = rng.random(edges) < 0.4
+    types = np.array(["API", "File", "Message"])[rng.integers(0, 3, edges)]
+    edge_cols = (
+        list(range(1, edges + 1)), src.tolist(), dst.tolist(), volume.tolist(),
+        ["sync" if s else "async" for s in sync], types.tolist(),
+    )
+    return app_rows, edge_cols
+
+
+class Command(BaseCommand):
+    help = "Benchmark in-memory integration graph: rebuild time, memory, incremental updates and rankings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--apps", type=int, default=50_000, help="Synthetic applications (default 50000)")
+        parser.add_argument("--edges", type=int, default=1_000_000, help="Synthetic integrations (default 1000000)")
+        parser.add_argument("--updates", type=int, default=1000, help="Incremental edge changes to apply (default 1000)")
+        parser.add_argument("--samples", type=int, default=32, help="Betweenness source samples (default 32)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--db", action="store_true", help="Load the graph from the database instead of synthetic data")
+
+    def _timed(self, label, fn):
+        started = time.perf_counter()
+        result = fn()
+        self.stdout.write(f"{label:>28}: {(time.perf_counter() - started) * 1000:9.1f} ms")
+        return result
+
+    def handle(self, *args, **options):
+        if options["db"]:
+            build = GraphIndex.load
+            self.stdout.write(self.style.WARNING("Loading graph from the database..."))
+        else:
+            apps, edges = max(1, options["apps"]), max(0, options["edges"])
+            self.stdout.write(self.style.WARNING(f"Generating {apps} apps / {edges} integrations..."))
+            app_rows, edge_cols = _synthetic(apps, edges, options["seed"])
+
+            def build():
+                return GraphIndex(app_rows, zip(*edge_cols))
+
+        # paměť zvlášť (tracemalloc build zpomaluje)
+        gc.collect()
+        tracemalloc.start()
+        index = build()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del index
+        gc.collect()
+
+        index = self._timed("rebuild", build)
+        self.stdout.write(
+            f"{'size':>28}: {index.node_count} apps, {index.edge_count} integrations"
+        )
+        self.stdout.write(
+            f"{'memory':>28}: {retained / 2**20:9.1f} MB retained "
+            f"({index.nbytes() / 2**20:.1f} MB columnar arrays, "
+            f"{index.nbytes() / max(1, index.edge_count):.0f} B/edge), peak {peak / 2**20:.1f} MB"
+        )
+        if not index.edge_count:
+            return
+
+        hub = self._timed("degrees", index.degrees)["out"].argmax()
+        self._timed("2-hop neighbourhood (hub)", lambda: index.neighbourhood([int(hub)], 2, DIRECTION_OUT, max_nodes=300))
+        self._timed("pagerank", index.pagerank)
+        self._timed(f"betweenness ({options['samples']} src)", lambda: index.betweenness(options["samples"]))
+        self._timed("top 20 pagerank (cold)", lambda: index.rankings(METRIC_PAGERANK))
+        self._timed("top 20 pagerank (cached)", lambda: index.rankings(METRIC_PAGERANK))
+
+        # inkrementální změny jako ze signálů: nové hrany, změna objemu, smazání
+        updates = max(1, options["updates"])
+        next_id = index.edge_ids[-1] + 1
+        app_ids = index.app_ids
+        ops = []
+        for k in range(updates):
+            ops.append((OP_EDGE, (next_id + k, app_ids[k % len(app_ids)], app_ids[(k * 7) % len(app_ids)], 10, "sync", "API")))
+        for k in range(updates):
+            e = index.edge_ids[k]
+            ops.append((OP_EDGE, (e, app_ids[index.src[k]], app_ids[index.dst[k]], 5, "async", "File")))
+        ops.extend((OP_EDGE_DELETE, index.edge_ids[k]) for k in range(updates, 2 * updates))
+
+        # každá změna po commitu = kopie indexu (copy-on-write, sdílí pole) + apply, jako record_change
+        self._timed("copy-on-write clone", index.clone)
+        started = time.perf_counter()
+        applied = 0
+        for op in ops:
+            new = index.clone()
+            applied += new.apply(op)
+            index = new
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{'incremental updates':>28}: {elapsed * 1000:9.1f} ms for {applied}/{len(ops)} changes "
+            f"({elapsed / len(ops) * 1e6:.1f} µs each, clone + apply, incl. CSR compactions)"
+        )
+        self._timed("CSR compaction", index.compact)
@@ -0,0 +1,99 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from applications.services import llm_client, llm_resilience
+from applications.services.llm_client import llm_ask, LLMError
+
+
+class Command(BaseCommand):
+    help = "Benchmark LLM client: pooled keep-alive session vs new connection per call"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=20, help="Number of LLM calls per run (default 20)")
+        parser.add_argument("--threads", type=int, default=4, help="Parallel callers (default 4)")
+        parser.add_argument("--base-url", default="", help="Override LLM_API_BASE (e.g. http://127.0.0.1:8765/v1)")
+        parser.add_argument("--prompt", default="Odpověz jedním slovem: OK", help="Prompt sent on every call")
+
+    def _run(self, calls, threads, prompt, cold):
+        local = threading.local()
+
+        def fresh_session():
+            # bez poolu: každé volání dostane čerstvou session => nové TCP (+TLS) spojení
+            session = requests.Session()
+            local.sessions.append(session)
+            return session
+
+        def one(_):
+            local.sessions = []
+            t0 = time.perf_counter()
+            try:
+                # bez cache: opakovaný prompt by jinak neodešel na server a srovnání by nic neměřilo
+                llm_ask(prompt, use_cache=False)
+                ok = True
+            except LLMError:
+                ok = False
+            finally:
+                for session in local.sessions:
+                    session.close()
+            return ok, time.perf_counter() - t0
+
+        llm_client.reset_session()
+        llm_resilience.counters.reset()
+        original_get_session = llm_client.get_session
+        if cold:
+            llm_client.get_session = fresh_session
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                results = list(pool.map(one, range(calls)))
+        finally:
+            llm_client.get_session = original_get_session
+        wall = time.perf_counter() - started
+        stats = llm_client.session_stats()
+
+        latencies = sorted(r[1] for r in results)
+        failed = sum(1 for r in results if not r[0])
+        return {
+            "wall": wall,
+            "p50": latencies[len(latencies) // 2] * 1000,
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            "failed": failed,
+            "stats": stats,
+            "outcomes": llm_client.resilience_stats(),
+        }
+
+    def handle(self, *args, **options):
+        calls = max(1, int(options["calls"]))
+        threads = max(1, int(options["threads"]))
+        prompt = options["prompt"]
+
+        if options["base_url"]:
+            settings.LLM_API_BASE = options["base_url"]
+
+        self.stdout.write(self.style.WARNING(
+            f"Benchmarking {calls} calls, {threads} threads against {llm_client._get_api_base()}..."
+        ))
+
+        for label, cold in (("new connection per call", True), ("pooled session", False)):
+            r = self._run(calls, threads, prompt, cold)
+            self.stdout.write(
+                f"{label:>24}: wall {r['wall']:.2f}s, p50 {r['p50']:.0f} ms, p95 {r['p95']:.0f} ms, "
+                f"failed {r['failed']}, calls/s {calls / r['wall']:.1f}"
+            )
+            if not cold:
+                s = r["stats"]
+                self.stdout.write(
+                    f"{'':>24}  requests {s['requests']}, new connections {s['new_connections']}, "
+                    f"reused {s['reused_connections']} (pool size {s['pool_size']})"
+                )
+            self.stdout.write(f"{'':>24}  outcomes {r['outcomes']}")
+
+        llm_client.reset_session()
+        self.stdout.write(self.style.SUCCESS("Benchmark finished ✅"))
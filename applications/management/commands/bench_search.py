@@ -0,0 +1,56 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.models import Application
+from applications.services.search import orm_search_q, ranked, search_enabled, search_filter
+
+DEFAULT_QUERIES = ["pay", "core banking", "oracle", "kafka", "temenos"]
+
+
+def _timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+class Command(BaseCommand):
+    help = "Compare application search latency: FTS5 (bm25, prefix) vs the icontains ORM path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", help=f"Search texts (default: {', '.join(DEFAULT_QUERIES)})")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query, median is reported (default 5)")
+        parser.add_argument("--page", type=int, default=50, help="Rows in the first result page (default 50)")
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            raise CommandError("FTS5 search is not available (SQLite only, run migrations, SEARCH_FTS_ENABLED=1).")
+        repeat = max(1, options["repeat"])
+        size = max(1, options["page"])
+        apps = Application.objects.all()
+        self.stdout.write(f"{apps.count()} applications, median of {repeat} runs (count + first {size} rows)")
+
+        def orm(q):
+            qs = apps.filter(orm_search_q(q))
+            return qs.count(), list(qs.order_by("name", "id")[:size])
+
+        def fts(q):
+            qs = search_filter(apps, q)
+            ranked_qs, ordering = ranked(qs)
+            return qs.count(), list(ranked_qs.order_by(*ordering)[:size])
+
+        self.stdout.write(f"{'query':<20} {'icontains':>12} {'fts5':>12} {'matches':>17}")
+        for q in options["queries"] or DEFAULT_QUERIES:
+            orm_ms, (orm_count, _) = _timed(lambda: orm(q), repeat)
+            fts_ms, (fts_count, _) = _timed(lambda: fts(q), repeat)
+            self.stdout.write(
+                f"{q:<20} {orm_ms:>10.1f}ms {fts_ms:>10.1f}ms {orm_count:>8} / {fts_count:<8}"
+            )
+        self.stdout.write(
+            "Matches differ by design: FTS5 matches word prefixes across more columns, icontains any substring."
+        )
@@ -0,0 +1,205 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+
+from applications.models import Application, Integration
+from applications.services.sqlite_tuning import PROFILE_DEFAULT, PROFILE_TUNED, apply_pragmas, sqlite_pragmas
+
+APP = Application._meta.db_table
+INTEGRATION = Integration._meta.db_table
+
+# stejné dotazy jako detail aplikace (aplikace + odchozí a příchozí integrace s protější aplikací)
+READ_SQL = [
+    f"SELECT * FROM {APP} WHERE id = ?",
+    f"SELECT i.*, a.name FROM {INTEGRATION} i JOIN {APP} a ON a.id = i.target_app_id WHERE i.source_app_id = ?",
+    f"SELECT i.*, a.name FROM {INTEGRATION} i JOIN {APP} a ON a.id = i.source_app_id WHERE i.target_app_id = ?",
+]
+# editace integrace v transakci (načtení + zápis, jako view a signály)
+WRITE_SQL = [
+    f"SELECT * FROM {INTEGRATION} WHERE id = ?",
+    f"UPDATE {INTEGRATION} SET daily_volume = daily_volume + 1 WHERE id = ?",
+]
+
+
+def _synthetic_value(field, n):
+    if isinstance(field, models.IntegerField):
+        return n % 100
+    return f"{field.name} {n % 7}"
+
+
+def _fill_synthetic(conn, apps):
+    """Náhodné portfolio přímo v kopii DB (bez signálů, jen tabulky čtené benchmarkem)."""
+    fields = [f for f in Application._meta.concrete_fields if not f.primary_key]
+    columns = ", ".join(f.column for f in fields)
+    placeholders = ", ".join("?" * len(fields))
+    conn.execute("BEGIN")
+    conn.executemany(
+        f"INSERT INTO {APP} (id, {columns}) VALUES (?, {placeholders})",
+        ([n] + [f"App {n}" if f.name == "name" else _synthetic_value(f, n) for f in fields] for n in range(1, apps + 1)),
+    )
+    conn.executemany(
+        f"INSERT INTO {INTEGRATION} (source_app_id, target_app_id, integration_type, direction, daily_volume,"
+        " data_sensitivity, transport, frequency, interface_name) VALUES (?, ?, ?, 'sync', 0, '', '', '', '')",
+        ((n, (n * 7 + k) % apps + 1, f"API {k}") for n in range(1, apps + 1) for k in range(5)),
+    )
+    conn.execute("COMMIT")
+
+
+class Worker(threading.Thread):
+    def __init__(self, path, profile, kind, app_ids, integration_ids, deadline, seed):
+        super().__init__(daemon=True)
+        self.path = path
+        self.profile = profile
+        self.kind = kind
+        self.app_ids = app_ids
+        self.integration_ids = integration_ids
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.errors = 0
+
+    def connect(self):
+        # jako Django: autocommit (transakce explicitním BEGIN), výchozí timeout sqlite3 modulu 5 s
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        apply_pragmas(conn.cursor(), sqlite_pragmas(self.profile))
+        return conn
+
+    def read(self, conn):
+        app_id = self.rng.choice(self.app_ids)
+        for sql in READ_SQL:
+            conn.execute(sql, [app_id]).fetchall()
+
+    def write(self, conn):
+        integration_id = self.rng.choice(self.integration_ids)
+        # tuned = transaction_mode IMMEDIATE
+        conn.execute("BEGIN IMMEDIATE" if self.profile == PROFILE_TUNED else "BEGIN")
+        try:
+            for sql in WRITE_SQL:
+                conn.execute(sql, [integration_id]).fetchall()
+            conn.execute("COMMIT")
+        except sqlite3.OperationalError:
+            conn.execute("ROLLBACK")
+            raise
+
+    def run(self):
+        # default = CONN_MAX_AGE 0 (spojení na každý request), tuned = perzistentní spojení vlákna
+        persistent = self.connect() if self.profile == PROFILE_TUNED else None
+        operation = self.read if self.kind == "read" else self.write
+        while time.perf_counter() < self.deadline:
+            conn = persistent or self.connect()
+            started = time.perf_counter()
+            try:
+                operation(conn)
+                self.latencies.append((time.perf_counter() - started) * 1000)
+            except sqlite3.OperationalError:
+                # "database is locked"
+                self.errors += 1
+            finally:
+                if conn is not persistent:
+                    conn.close()
+        if persistent is not None:
+            persistent.close()
+
+
+class Command(BaseCommand):
+    help = "Concurrent read/write throughput on a copy of the database: default SQLite vs the tuned profile"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8, help="Reader threads (app detail queries, default 8)")
+        parser.add_argument("--writers", type=int, default=2, help="Writer threads (integration edits, default 2)")
+        parser.add_argument("--seconds", type=float, default=5.0, help="Duration per profile (default 5)")
+        parser.add_argument(
+            "--apps", type=int, default=5000,
+            help="Synthetic applications when the database has no integrations (default 5000)",
+        )
+        parser.add_argument(
+            "--profile", choices=["both", PROFILE_DEFAULT, PROFILE_TUNED], default="both",
+            help="Profile to measure (default both)",
+        )
+
+    def handle(self, *args, **options):
+        database = settings.DATABASES["default"]
+        if database["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("bench_sqlite needs the SQLite backend.")
+        profiles = [PROFILE_DEFAULT, PROFILE_TUNED] if options["profile"] == "both" else [options["profile"]]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.sqlite3")
+            self._prepare(str(database["NAME"]), template, max(2, options["apps"]))
+            self.stdout.write(
+                f"{options['readers']} readers, {options['writers']} writers, {options['seconds']:g}s per profile"
+            )
+            self.stdout.write(
+                f"{'profile':<9} {'reads/s':>9} {'writes/s':>9} {'locked':>7}"
+                f" {'read p50/p95':>15} {'write p50/p95':>16}"
+            )
+            for profile in profiles:
+                # čerstvá kopie: WAL režim se ukládá do souboru
+                path = os.path.join(tmp, f"{profile}.sqlite3")
+                self._copy(template, path)
+                self.stdout.write(self._run(path, profile, options))
+
+    def _copy(self, source, target):
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(target)
+        try:
+            src.backup(dst)
+            dst.execute("PRAGMA journal_mode=DELETE").fetchall()
+        finally:
+            src.close()
+            dst.close()
+
+    def _prepare(self, source, template, apps):
+        if not os.path.exists(source):
+            raise CommandError(f"{source} does not exist, run migrate first.")
+        self._copy(source, template)
+        conn = sqlite3.connect(template, isolation_level=None)
+        try:
+            try:
+                count = conn.execute(f"SELECT COUNT(*) FROM {INTEGRATION}").fetchone()[0]
+            except sqlite3.OperationalError:
+                raise CommandError("Portfolio tables are missing, run migrate first.")
+            if not count:
+                conn.execute(f"DELETE FROM {APP}")
+                _fill_synthetic(conn, apps)
+                self.stdout.write(f"No integrations in the database, using {apps} synthetic applications.")
+        finally:
+            conn.close()
+
+    def _run(self, path, profile, options):
+        conn = sqlite3.connect(path)
+        app_ids = [row[0] for row in conn.execute(f"SELECT id FROM {APP}")]
+        integration_ids = [row[0] for row in conn.execute(f"SELECT id FROM {INTEGRATION}")]
+        conn.close()
+
+        deadline = time.perf_counter() + options["seconds"]
+        workers = [
+            Worker(path, profile, kind, app_ids, integration_ids, deadline, seed)
+            for seed, kind in enumerate(["read"] * options["readers"] + ["write"] * options["writers"])
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        def summary(kind):
+            latencies = [ms for w in workers if w.kind == kind for ms in w.latencies]
+            if len(latencies) < 2:
+                return len(latencies) / elapsed, "-"
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            return len(latencies) / elapsed, f"{statistics.median(latencies):.1f}/{p95:.1f}ms"
+
+        reads, read_lat = summary("read")
+        writes, write_lat = summary("write")
+        errors = sum(w.errors for w in workers)
+        return f"{profile:<9} {reads:>9.0f} {writes:>9.0f} {errors:>7} {read_lat:>15} {write_lat:>16}"
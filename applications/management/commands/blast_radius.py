@@ -0,0 +1,46 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.services.impact import get_impact, DEFAULT_HOPS, MAX_HOPS
+
+
+class Command(BaseCommand):
+    help = "Outage blast radius: applications affected downstream of the given application ids"
+
+    def add_arguments(self, parser):
+        parser.add_argument("app_ids", nargs="+", type=int, help="Failing application ids")
+        parser.add_argument("--hops", type=int, default=DEFAULT_HOPS, help=f"Max. hops (1-{MAX_HOPS}, default {DEFAULT_HOPS})")
+        parser.add_argument("--callers", action="store_true", help="Also count synchronous callers as affected")
+        parser.add_argument("--min-volume", type=int, default=0, help="Ignore integrations below this daily volume")
+        parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result, unknown = get_impact(options["app_ids"], options["hops"], options["callers"], options["min_volume"])
+        elapsed = (time.perf_counter() - started) * 1000
+        if unknown:
+            self.stderr.write(self.style.WARNING(f"Unknown application ids: {', '.join(map(str, unknown))}"))
+        if result is None:
+            raise CommandError("None of the given applications exist.")
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+            return
+
+        roots = ", ".join(r["name"] for r in result["roots"])
+        self.stdout.write(self.style.WARNING(f"Outage of {roots} (max. {result['hops']} hops, {elapsed:.1f} ms)"))
+        self.stdout.write(
+            f"Affected: {result['affected_count']} apps ({result['sync_affected_count']} via sync path), "
+            f"volume at risk {result['volume_at_risk']}/day "
+            f"(direct {result['direct_volume_at_risk']}, sync {result['sync_volume_at_risk']})"
+            + (" [truncated]" if result["truncated"] else "")
+        )
+        for group in result["by_criticality"]:
+            self.stdout.write(f"\n{group['criticality']}: {group['count']} apps, {group['volume_at_risk']}/day")
+            for a in group["apps"]:
+                self.stdout.write(
+                    f"  {a['name']} (#{a['id']}, {a['domain']}) hops {a['hops']}, "
+                    f"impact {a['impact']} {a['mode']}, {a['volume_at_risk']}/day"
+                )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from applications.services.llm_cache import get_llm_cache
+
+
+class Command(BaseCommand):
+    help = "Show LLM response cache statistics or clear the cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete all cached LLM responses (memory + disk)")
+
+    def handle(self, *args, **options):
+        cache = get_llm_cache()
+        if cache is None:
+            self.stdout.write(self.style.WARNING("LLM cache is disabled (LLM_CACHE_ENABLED=0)."))
+            return
+
+        if options["clear"]:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS("LLM cache cleared ✅"))
+
+        for k, v in cache.stats().items():
+            self.stdout.write(f"{k:>14}: {v}")
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from applications.services.llm_stub import StubConfig, make_server
+
+
+class Command(BaseCommand):
+    help = "Run a local OpenAI-compatible chat-completions stand-in with latency and fault injection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+
+        # latency
+        parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean response latency (default 300)")
+        parser.add_argument("--latency-dist", default="fixed",
+                            choices=["fixed", "uniform", "normal", "lognormal", "exponential"],
+                            help="Latency distribution (default fixed)")
+        parser.add_argument("--jitter-ms", type=float, default=100.0, help="Spread of the distribution (default 100)")
+        parser.add_argument("--token-delay-ms", type=float, default=20.0, help="Delay between streamed chunks (default 20)")
+
+        # faults (rates 0.0–1.0)
+        parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that hang (client timeout)")
+        parser.add_argument("--hang-seconds", type=float, default=120.0, help="How long a hanging request sleeps (default 120)")
+        parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered with HTTP 429")
+        parser.add_argument("--retry-after", type=int, default=1, help="Retry-After header sent with 429 (seconds)")
+        parser.add_argument("--rate-5xx", type=float, default=0.0, help="Share of requests answered with HTTP 500/502/503")
+        parser.add_argument("--truncate-rate", type=float, default=0.0, help="Share of seed JSON replies cut in half")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+
+    def handle(self, *args, **options):
+        config = StubConfig(
+            latency_ms=options["latency_ms"],
+            latency_dist=options["latency_dist"],
+            jitter_ms=options["jitter_ms"],
+            token_delay_ms=options["token_delay_ms"],
+            timeout_rate=options["timeout_rate"],
+            hang_seconds=options["hang_seconds"],
+            rate_429=options["rate_429"],
+            retry_after=options["retry_after"],
+            rate_5xx=options["rate_5xx"],
+            truncate_rate=options["truncate_rate"],
+            seed=options["seed"],
+        )
+        server = make_server(options["host"], options["port"], config)
+        base = f"http://{options['host']}:{options['port']}/v1"
+
+        self.stdout.write(self.style.SUCCESS(f"LLM stub listening on {base}"))
+        self.stdout.write(f"Point the app at it with LLM_API_BASE={base} (any MUJ_OPENAI_API_KEY works).")
+        self.stdout.write(f"Counters: GET {base}/stats")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Final counters: {server.state.counters}")
@@ -0,0 +1,84 @@
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from applications.services.jobs import claim_next, purge_finished, requeue_stale, run_job
+
+# jak často hlavní vlákno vrací zaseknuté úlohy do fronty a maže staré
+MAINTENANCE_SECONDS = 30
+
+
+class Command(BaseCommand):
+    help = "Process queued LLM jobs (analysis, Q&A, Mermaid, descriptions) with N worker threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Worker threads (default 4)")
+        parser.add_argument("--poll-interval", type=float, default=0.5,
+                            help="Seconds an idle thread waits before checking the queue again (default 0.5)")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+
+    def handle(self, *args, **options):
+        threads = max(1, options["threads"])
+        poll = max(0.05, options["poll_interval"])
+        once = options["once"]
+        stop = threading.Event()
+        stats = {"done": 0, "failed": 0}
+        stats_lock = threading.Lock()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._maintenance()
+
+        def work(idx):
+            name = f"{prefix}:{idx}"
+            try:
+                while not stop.is_set():
+                    close_old_connections()
+                    job = claim_next(name)
+                    if job is None:
+                        if once:
+                            return
+                        stop.wait(poll)
+                        continue
+
+                    started = time.perf_counter()
+                    job = run_job(job)
+                    elapsed = time.perf_counter() - started
+                    with stats_lock:
+                        stats[job.status] = stats.get(job.status, 0) + 1
+                    self.stdout.write(f"[{name}] {job.kind} #{job.pk} {job.status} in {elapsed:.2f}s")
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(threads)]
+        for t in workers:
+            t.start()
+
+        self.stdout.write(self.style.SUCCESS(f"LLM worker {prefix} running with {threads} thread(s)"))
+        try:
+            last = time.monotonic()
+            while any(t.is_alive() for t in workers):
+                for t in workers:
+                    t.join(timeout=1.0)
+                if time.monotonic() - last >= MAINTENANCE_SECONDS:
+                    self._maintenance()
+                    last = time.monotonic()
+        except KeyboardInterrupt:
+            # rozpracované úlohy doběhnou, nové se už neberou
+            self.stdout.write("Stopping, waiting for running jobs…")
+            stop.set()
+            for t in workers:
+                t.join()
+
+        self.stdout.write(self.style.SUCCESS(f"Worker finished: done={stats['done']} failed={stats['failed']}"))
+
+    def _maintenance(self):
+        close_old_connections()
+        requeued, failed = requeue_stale()
+        purged = purge_finished(getattr(settings, "LLM_JOB_RETENTION_HOURS", 24))
+        if requeued or failed or purged:
+            self.stdout.write(f"Maintenance: requeued={requeued} timed_out={failed} purged={purged}")
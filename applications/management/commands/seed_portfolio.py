@@ -1,13 +1,19 @@
 import json
 import re
+import time
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
 from applications.models import Application, Integration, Capability, TechDebtItem
-from applications.services.llm_client import ask_llm, LLMError
+from applications.services.llm_client import ask_llm, LLMError, session_stats
+from applications.services.prompt_budget import PromptBuilder
+from applications.services.mermaid import build_mermaid
+from applications.services.mermaid_check import validate
 
 
 # ----------------------------
@@ -52,6 +58,19 @@ FREQUENCY_POOL = ["realtime", "hourly", "daily", "weekly", "batch-nightly"]
 # ----------------------------
 # Small helpers
 # ----------------------------
+# dokončená logická LLM volání (session_stats()["requests"] počítá HTTP pokusy včetně retry a hedgingu)
+_llm_calls = 0
+_llm_calls_lock = threading.Lock()
+
+
+def _ask(prompt: str, use_cache: bool = True) -> str:
+    global _llm_calls
+    answer = ask_llm(prompt, use_cache=use_cache)
+    with _llm_calls_lock:
+        _llm_calls += 1
+    return answer
+
+
 def _norm(v, allowed, fallback):
     if v is None:
         return fallback
@@ -125,7 +144,7 @@ def _repair_json_with_llm(bad_json_text: str) -> str:
         "TEXT:\n"
         f"{bad_json_text}"
     )
-    return ask_llm(prompt).strip()
+    return _ask(prompt).strip()
 
 
 def _parse_json_robust(raw: str) -> dict:
@@ -189,23 +208,19 @@ def _prompt_apps(n: int, existing_names: Optional[List[str]] = None) -> str:
         ]
     }
 
-    avoid = ""
-    if existing_names:
-        avoid_list = existing_names[:200]
-        avoid = (
-            "\n\nNEOPAKUJ tato jména (už existují):\n"
-            f"{json.dumps(avoid_list, ensure_ascii=False)}"
-        )
-
-    return (
+    builder = PromptBuilder("seed_apps")
+    builder.add(
         "Vygeneruj mock dataset bankovních aplikací.\n"
         f"Vygeneruj PŘESNĚ {n} aplikací.\n"
         "VÝSTUP MUSÍ BÝT POUZE validní JSON (bez ```).\n"
         "Každá aplikace musí mít unikátní name.\n"
         "Nepiš žádný komentáře ani text mimo JSON."
-        f"{avoid}\n\n"
-        f"SCHEMA:\n{json.dumps(schema, ensure_ascii=False)}"
+        f"\n\nSCHEMA:\n{json.dumps(schema, ensure_ascii=False)}"
     )
+    if existing_names:
+        # jména jako prostý seznam (ne JSON) – vejde se jich víc, zbytek ořízne token budget
+        builder.add_list("\n\nNEOPAKUJ tato jména (už existují):", existing_names, sep="; ")
+    return builder.build()
 
 
 def _prompt_integrations(app_names: List[str], n: int) -> str:
@@ -221,16 +236,45 @@ def _prompt_integrations(app_names: List[str], n: int) -> str:
         ]
     }
 
-    return (
+    builder = PromptBuilder("seed_integrations")
+    builder.add(
         "Vygeneruj integrace mezi bankovními aplikacemi.\n"
         f"Vygeneruj PŘESNĚ {n} integrací.\n"
         "VÝSTUP MUSÍ BÝT POUZE validní JSON (bez ```).\n"
         "- source_app_name a target_app_name MUSÍ být přesně z tohoto seznamu názvů.\n"
         "- source != target.\n"
         "- Nevracej žádný text mimo JSON.\n\n"
-        f"SEZNAM APLIKACÍ:\n{json.dumps(app_names, ensure_ascii=False)}\n\n"
-        f"SCHEMA:\n{json.dumps(schema, ensure_ascii=False)}"
+        f"SCHEMA:\n{json.dumps(schema, ensure_ascii=False)}\n\n"
     )
+    # zamíchané pořadí: když budget ořízne seznam, každý batch dostane jiný výřez aplikací
+    builder.add_list("SEZNAM APLIKACÍ (jeden název na řádek):", random.sample(app_names, len(app_names)))
+    return builder.build()
+
+
+# ----------------------------
+# LLM batch calls (běží i paralelně v thread poolu)
+# ----------------------------
+def _fetch_apps_batch(n: int, existing_names: List[str]) -> List[Dict[str, Any]]:
+    # bez cache: opakovaný stejný prompt musí vrátit nová data
+    raw = _ask(_prompt_apps(n, existing_names=existing_names), use_cache=False).strip()
+    data = _parse_json_robust(raw)
+    return data.get("applications", []) or []
+
+
+def _fetch_integrations_batch(app_names: List[str], n: int) -> List[Dict[str, Any]]:
+    raw = _ask(_prompt_integrations(app_names, n), use_cache=False).strip()
+    data = _parse_json_robust(raw)
+    return data.get("integrations", []) or []
+
+
+def _plan_batches(remaining: int, batch_size: int, slots: int) -> List[int]:
+    """Rozdělí zbývající počet do max. `slots` batchů (každý max. batch_size)."""
+    sizes = []
+    while remaining > 0 and len(sizes) < slots:
+        n = min(batch_size, remaining)
+        sizes.append(n)
+        remaining -= n
+    return sizes
 
 
 # ----------------------------
@@ -299,6 +343,25 @@ def _fallback_integrations(app_names: List[str], n: int) -> List[dict]:
     return out
 
 
+# ----------------------------
+# Mermaid check
+# ----------------------------
+def _check_diagrams():
+    """Deterministické diagramy všech aplikací přes lokální validátor (2 dotazy do DB)."""
+    inbound, outbound = {}, {}
+    for i in Integration.objects.select_related("source_app", "target_app").order_by("id"):
+        outbound.setdefault(i.source_app_id, []).append(i)
+        inbound.setdefault(i.target_app_id, []).append(i)
+
+    checked, invalid = 0, []
+    for app in Application.objects.only("id", "name"):
+        checked += 1
+        errors = validate(build_mermaid(app, inbound.get(app.id, []), outbound.get(app.id, [])))
+        if errors:
+            invalid.append((app, errors))
+    return checked, invalid
+
+
 # ----------------------------
 # Command
 # ----------------------------
@@ -317,6 +380,9 @@ class Command(BaseCommand):
         parser.add_argument("--int-batch", type=int, default=25, help="How many integrations to request per LLM call (default 25)")
         parser.add_argument("--int-max-attempts", type=int, default=12, help="Max LLM calls for integrations generation (default 12)")
 
+        # parallel LLM calls
+        parser.add_argument("--concurrency", type=int, default=1, help="How many LLM batches to run in parallel (default 1 = sequential)")
+
     def handle(self, *args, **options):
         target_apps = int(options["apps"])
         # as before: at least 50, otherwise 2x apps
@@ -329,54 +395,62 @@ class Command(BaseCommand):
         batch_size_int = max(1, int(options["int_batch"]))
         max_attempts_int = max(1, int(options["int_max_attempts"]))
 
+        concurrency = max(1, int(options["concurrency"]))
+        started = time.perf_counter()
+        calls_before = _llm_calls
+        requests_before = session_stats()["requests"]
+
         # ----------------------------
         # 1) Generate APPS (batched + retries)
         # ----------------------------
         self.stdout.write(self.style.WARNING(
-            f"Generating {target_apps} applications via LLM (batch={batch_size_apps})..."
+            f"Generating {target_apps} applications via LLM (batch={batch_size_apps}, concurrency={concurrency})..."
         ))
 
         collected_apps: List[Dict[str, Any]] = []
         attempt = 0
 
-        while len(collected_apps) < target_apps and attempt < max_attempts_apps:
-            attempt += 1
-            remaining = target_apps - len(collected_apps)
-            n = min(batch_size_apps, remaining)
-
-            existing_names = [_clean_str(a.get("name"), 200, "") for a in collected_apps]
-            prompt = _prompt_apps(n, existing_names=existing_names)
-
-            try:
-                raw = ask_llm(prompt).strip()
-                data = _parse_json_robust(raw)
-                batch = data.get("applications", []) or []
-
-                # dedupe within batch + against collected
-                batch = _dedupe_apps_keep_order(batch)
-
-                before = len(collected_apps)
-                existing_lower = {(_clean_str(a.get("name"), 200, "")).strip().lower() for a in collected_apps}
-
-                for a in batch:
-                    nm = _clean_str(a.get("name"), 200, "").strip()
-                    if not nm:
-                        continue
-                    if nm.lower() in existing_lower:
-                        continue
-                    collected_apps.append(a)
-                    existing_lower.add(nm.lower())
-
-                gained = len(collected_apps) - before
-                self.stdout.write(self.style.WARNING(
-                    f"Apps attempt {attempt}/{max_attempts_apps}: requested {n}, gained {gained}, "
-                    f"total {len(collected_apps)}/{target_apps}"
-                ))
-
-            except LLMError as e:
-                self.stdout.write(self.style.ERROR(f"LLM apps attempt {attempt} failed: {e}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Apps attempt {attempt} parse/other error: {e}"))
+        # každé kolo pošle až `concurrency` batchů naráz; výsledky se slučují v pořadí odeslání
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while len(collected_apps) < target_apps and attempt < max_attempts_apps:
+                sizes = _plan_batches(
+                    target_apps - len(collected_apps),
+                    batch_size_apps,
+                    min(concurrency, max_attempts_apps - attempt),
+                )
+                existing_names = [_clean_str(a.get("name"), 200, "") for a in collected_apps]
+                futures = [pool.submit(_fetch_apps_batch, n, existing_names) for n in sizes]
+
+                for n, future in zip(sizes, futures):
+                    attempt += 1
+                    try:
+                        batch = future.result()
+
+                        # dedupe within batch + against collected
+                        batch = _dedupe_apps_keep_order(batch)
+
+                        before = len(collected_apps)
+                        existing_lower = {(_clean_str(a.get("name"), 200, "")).strip().lower() for a in collected_apps}
+
+                        for a in batch:
+                            nm = _clean_str(a.get("name"), 200, "").strip()
+                            if not nm:
+                                continue
+                            if nm.lower() in existing_lower:
+                                continue
+                            collected_apps.append(a)
+                            existing_lower.add(nm.lower())
+
+                        gained = len(collected_apps) - before
+                        self.stdout.write(self.style.WARNING(
+                            f"Apps attempt {attempt}/{max_attempts_apps}: requested {n}, gained {gained}, "
+                            f"total {len(collected_apps)}/{target_apps}"
+                        ))
+
+                    except LLMError as e:
+                        self.stdout.write(self.style.ERROR(f"LLM apps attempt {attempt} failed: {e}"))
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"Apps attempt {attempt} parse/other error: {e}"))
 
         if len(collected_apps) < target_apps:
             self.stdout.write(self.style.WARNING(
@@ -467,34 +541,38 @@ class Command(BaseCommand):
         # 3) Generate INTEGRATIONS (batched + retries + fallback remainder)
         # ----------------------------
         self.stdout.write(self.style.WARNING(
-            f"Generating {target_integrations} integrations via LLM (batch={batch_size_int})..."
+            f"Generating {target_integrations} integrations via LLM (batch={batch_size_int}, concurrency={concurrency})..."
         ))
 
         collected_integrations: List[Dict[str, Any]] = []
         attempt = 0
 
-        while len(collected_integrations) < target_integrations and attempt < max_attempts_int:
-            attempt += 1
-            remaining = target_integrations - len(collected_integrations)
-            n = min(batch_size_int, remaining)
-
-            try:
-                raw = ask_llm(_prompt_integrations(app_names, n)).strip()
-                data = _parse_json_robust(raw)
-                batch = data.get("integrations", []) or []
-
-                before = len(collected_integrations)
-                collected_integrations.extend(batch)
-                gained = len(collected_integrations) - before
-
-                self.stdout.write(self.style.WARNING(
-                    f"Integrations attempt {attempt}/{max_attempts_int}: requested {n}, gained {gained}, "
-                    f"total {len(collected_integrations)}/{target_integrations}"
-                ))
-            except LLMError as e:
-                self.stdout.write(self.style.ERROR(f"LLM integrations attempt {attempt} failed: {e}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Integrations attempt {attempt} parse/other error: {e}"))
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while len(collected_integrations) < target_integrations and attempt < max_attempts_int:
+                sizes = _plan_batches(
+                    target_integrations - len(collected_integrations),
+                    batch_size_int,
+                    min(concurrency, max_attempts_int - attempt),
+                )
+                futures = [pool.submit(_fetch_integrations_batch, app_names, n) for n in sizes]
+
+                for n, future in zip(sizes, futures):
+                    attempt += 1
+                    try:
+                        batch = future.result()
+
+                        before = len(collected_integrations)
+                        collected_integrations.extend(batch)
+                        gained = len(collected_integrations) - before
+
+                        self.stdout.write(self.style.WARNING(
+                            f"Integrations attempt {attempt}/{max_attempts_int}: requested {n}, gained {gained}, "
+                            f"total {len(collected_integrations)}/{target_integrations}"
+                        ))
+                    except LLMError as e:
+                        self.stdout.write(self.style.ERROR(f"LLM integrations attempt {attempt} failed: {e}"))
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"Integrations attempt {attempt} parse/other error: {e}"))
 
         if len(collected_integrations) < target_integrations:
             missing = target_integrations - len(collected_integrations)
@@ -590,5 +668,20 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f"Integrations created: {created}"))
         self.stdout.write(self.style.WARNING(f"Integrations skipped: {skipped}"))
+
+        # názvy z LLM (uvozovky, závorky...) nesmí rozbít Mermaid diagramy
+        checked, invalid = _check_diagrams()
+        for app, errors in invalid[:10]:
+            self.stdout.write(self.style.ERROR(f"Mermaid for {app.name!r}: {errors[0]}"))
+        style = self.style.ERROR if invalid else self.style.SUCCESS
+        self.stdout.write(style(f"Mermaid diagrams valid: {checked - len(invalid)}/{checked}"))
+
+        wall = time.perf_counter() - started
+        calls = _llm_calls - calls_before
+        requests = session_stats()["requests"] - requests_before
+        self.stdout.write(self.style.SUCCESS(
+            f"Wall-clock {wall:.1f}s, LLM calls {calls}, {calls / wall if wall else 0:.2f} calls/s "
+            f"({requests} HTTP requests incl. retries and hedges)"
+        ))
         self.stdout.write(self.style.SUCCESS("Seed finished ✅"))
 
@@ -0,0 +1,57 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+from .services.request_timing import finish_request, start_request
+
+logger = logging.getLogger("applications.timing")
+
+
+def _report(request, response, timings):
+    # Server-Timing ukazuje prohlížeč v DevTools (Network -> Timing)
+    response["Server-Timing"] = timings.server_timing(streaming=response.streaming)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            # streamovaná odpověď: čísla jsou do odeslání hlaviček, řádky se renderují až potom
+            "streaming": response.streaming,
+            **timings.as_dict(),
+        }, separators=(",", ":")))
+
+
+@sync_and_async_middleware
+def request_timing_middleware(get_response):
+    """
+    Počet a čas SQL dotazů, LLM volání a renderu šablon za request
+    (hlavička Server-Timing + JSON řádek v loggeru applications.timing).
+    Patří na začátek MIDDLEWARE, aby zahrnul i dotazy ostatních middleware.
+    """
+    if not getattr(settings, "REQUEST_TIMING_ENABLED", True):
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            timings, token = start_request()
+            try:
+                response = await get_response(request)
+            finally:
+                finish_request(token)
+            _report(request, response, timings)
+            return response
+    else:
+        def middleware(request):
+            timings, token = start_request()
+            try:
+                response = get_response(request)
+            finally:
+                finish_request(token)
+            _report(request, response, timings)
+            return response
+
+    return middleware
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-17 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0004_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_apps', models.IntegerField(default=0)),
+                ('counts', models.JSONField(default=dict)),
+                ('debt_sum', models.BigIntegerField(default=0)),
+                ('top_debt', models.JSONField(default=list)),
+                ('top_size', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
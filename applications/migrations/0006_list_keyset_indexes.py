@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-17 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0005_portfoliosummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['name', 'id'], name='app_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='integration',
+            index=models.Index(fields=['-daily_volume', 'id'], name='integration_volume_id_idx'),
+        ),
+    ]
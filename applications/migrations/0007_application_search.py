@@ -0,0 +1,65 @@
+# Generated by Django 6.0.2 on 2026-10-17 02:49
+
+import applications.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+# FTS5 tabulka existuje jen na SQLite; model ApplicationSearch je unmanaged
+FTS_TABLE = "applications_app_fts"
+# bm25 váhy sloupců: name, domain, vendor, tech_stack, vendor_products, database_technology, capabilities
+RANK = "bm25(10.0, 3.0, 4.0, 2.0, 2.0, 2.0, 3.0)"
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, domain, vendor, tech_stack, vendor_products, database_technology, capabilities,"
+        " tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', '{RANK}')")
+    # backfill existujících aplikací
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE}"
+        " (rowid, name, domain, vendor, tech_stack, vendor_products, database_technology, capabilities)"
+        " SELECT a.id, a.name, a.domain, a.vendor, a.tech_stack, a.vendor_products, a.database_technology,"
+        " COALESCE((SELECT group_concat(c.name, ' ') FROM applications_application_capabilities ac"
+        "  JOIN applications_capability c ON c.id = ac.capability_id WHERE ac.application_id = a.id), '')"
+        " FROM applications_application a"
+    )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0006_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationSearch',
+            fields=[
+                ('application', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_doc', serialize=False, to='applications.application')),
+                ('name', models.TextField()),
+                ('domain', models.TextField()),
+                ('vendor', models.TextField()),
+                ('tech_stack', models.TextField()),
+                ('vendor_products', models.TextField()),
+                ('database_technology', models.TextField()),
+                ('capabilities', models.TextField()),
+                ('document', applications.models.FTSDocumentField(db_column='applications_app_fts')),
+                ('rank', models.FloatField(db_column='rank')),
+            ],
+            options={
+                'db_table': 'applications_app_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 6.0.2 on 2026-10-17 02:52
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def dedupe_integrations(apps, schema_editor):
+    """Před unique constraint: ze stejné trojice (zdroj, cíl, typ) zůstane nejstarší integrace."""
+    Integration = apps.get_model("applications", "Integration")
+    triples = (
+        Integration.objects.values("source_app", "target_app", "integration_type")
+        .annotate(n=Count("id"), keep=Min("id"))
+        .filter(n__gt=1)
+    )
+    for t in triples:
+        Integration.objects.filter(
+            source_app=t["source_app"], target_app=t["target_app"], integration_type=t["integration_type"]
+        ).exclude(id=t["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0007_application_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['criticality'], name='app_criticality_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['environment'], name='app_environment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['region'], name='app_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['hosting'], name='app_hosting_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['vendor'], name='app_vendor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['data_sensitivity'], name='app_sensitivity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['domain', 'criticality', 'environment', 'region', 'hosting', 'vendor', 'data_sensitivity'], name='app_facets_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['-tech_debt_score', 'id'], name='app_tech_debt_idx'),
+        ),
+        migrations.RunPython(dedupe_integrations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='integration',
+            constraint=models.UniqueConstraint(fields=('source_app', 'target_app', 'integration_type'), name='integration_unique_triple'),
+        ),
+    ]
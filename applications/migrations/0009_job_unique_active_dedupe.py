@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:21
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fail_duplicate_jobs(apps, schema_editor):
+    """Před unique constraint: ze stejných čekajících/běžících úloh zůstane aktivní jen nejnovější."""
+    Job = apps.get_model("applications", "Job")
+    active = Job.objects.filter(status__in=["queued", "running"]).exclude(dedupe_key="")
+    duplicates = (
+        active.values("kind", "dedupe_key")
+        .annotate(n=Count("id"), keep=Max("id"))
+        .filter(n__gt=1)
+    )
+    for d in duplicates:
+        active.filter(kind=d["kind"], dedupe_key=d["dedupe_key"]).exclude(id=d["keep"]).update(
+            status="failed", error="Duplicitní úloha."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0008_portfolio_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running']), models.Q(('dedupe_key', ''), _negated=True)), fields=('kind', 'dedupe_key'), name='job_unique_active_dedupe'),
+        ),
+    ]
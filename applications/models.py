@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Lookup
 
 
 class Capability(models.Model):
@@ -9,6 +10,43 @@ class Capability(models.Model):
         return self.name
 
 
+class ApplicationQuerySet(models.QuerySet):
+    """Hromadné operace obcházejí signály (nebo je pouštějí po řádcích) => souhrn, fulltext a verze se dorovnají tady."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .services.page_cache import portfolio_changed
+        from .services.search import index_apps
+        from .services.summary import apply_created
+
+        created = super().bulk_create(objs, *args, **kwargs)
+        apply_created(created)
+        index_apps([obj.pk for obj in created])
+        portfolio_changed()
+        return created
+
+    def update(self, **kwargs):
+        from .services.page_cache import portfolio_changed
+        from .services.search import SEARCH_FIELDS, index_apps
+        from .services.summary import SUMMARY_FIELDS, bulk_changes
+
+        portfolio_changed()
+        # po update už filtr nemusí sedět na stejné řádky => id předem
+        reindex = [] if SEARCH_FIELDS.isdisjoint(kwargs) else list(self.values_list("pk", flat=True))
+        if SUMMARY_FIELDS.isdisjoint(kwargs):
+            rows = super().update(**kwargs)
+        else:
+            with bulk_changes():
+                rows = super().update(**kwargs)
+        index_apps(reindex)
+        return rows
+
+    def delete(self):
+        from .services.summary import bulk_changes
+
+        with bulk_changes():
+            return super().delete()
+
+
 class Application(models.Model):
     name = models.CharField(max_length=200)
     domain = models.CharField(max_length=100)
@@ -37,6 +75,28 @@ class Application(models.Model):
     # Capability (DB scope)
     capabilities = models.ManyToManyField(Capability, blank=True, related_name="applications")
 
+    objects = ApplicationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset stránkování seznamu aplikací
+            models.Index(fields=["name", "id"], name="app_name_id_idx"),
+            # filtry seznamu (rovnost na jednu dimenzi) a GROUP BY v souhrnu portfolia
+            models.Index(fields=["criticality"], name="app_criticality_idx"),
+            models.Index(fields=["environment"], name="app_environment_idx"),
+            models.Index(fields=["region"], name="app_region_idx"),
+            models.Index(fields=["hosting"], name="app_hosting_idx"),
+            models.Index(fields=["vendor"], name="app_vendor_idx"),
+            models.Index(fields=["data_sensitivity"], name="app_sensitivity_idx"),
+            # facety: GROUP BY přes všechny filtry jen z indexu (pokrývá i filtr na doménu)
+            models.Index(
+                fields=["domain", "criticality", "environment", "region", "hosting", "vendor", "data_sensitivity"],
+                name="app_facets_idx",
+            ),
+            # top tech debt (souhrn, doplnění top-N)
+            models.Index(fields=["-tech_debt_score", "id"], name="app_tech_debt_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -64,6 +124,18 @@ class Integration(models.Model):
     frequency = models.CharField(max_length=80, blank=True)  # realtime/batch/hourly/daily...
     interface_name = models.CharField(max_length=120, blank=True)  # např. "Payments API v2"
 
+    class Meta:
+        indexes = [
+            # keyset stránkování seznamu integrací
+            models.Index(fields=["-daily_volume", "id"], name="integration_volume_id_idx"),
+        ]
+        constraints = [
+            # jedna integrace daného typu mezi dvojicí aplikací (get_or_create v seedu, formulář)
+            models.UniqueConstraint(
+                fields=["source_app", "target_app", "integration_type"], name="integration_unique_triple"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.source_app.name} -> {self.target_app.name}"
 
@@ -86,4 +158,137 @@ class TechDebtItem(models.Model):
     target_date = models.DateField(null=True, blank=True)
 
     def __str__(self):
-        return f"{self.application.name}: {self.title}"
\ No newline at end of file
+        return f"{self.application.name}: {self.title}"
+
+
+class Job(models.Model):
+    """LLM úloha zpracovaná mimo request (management command run_llm_worker)."""
+
+    KIND_ANALYSIS = "analysis"
+    KIND_QA = "qa"
+    KIND_MERMAID = "mermaid"
+    KIND_DESCRIPTION = "description"
+    KIND_CHOICES = [
+        (KIND_ANALYSIS, "Portfolio analysis"),
+        (KIND_QA, "Q&A"),
+        (KIND_MERMAID, "Mermaid diagram"),
+        (KIND_DESCRIPTION, "Application description"),
+    ]
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    FINISHED = (STATUS_DONE, STATUS_FAILED)
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    params = models.JSONField(default=dict, blank=True)  # např. {"app_id": 12} / {"question": "..."}
+    dedupe_key = models.CharField(max_length=200, blank=True, db_index=True)  # stejná čekající úloha se nezakládá 2x
+
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=120, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+        constraints = [
+            # nejvýš jedna čekající / běžící úloha se stejným dedupe_key (souběžné enqueue)
+            models.UniqueConstraint(
+                fields=["kind", "dedupe_key"],
+                condition=models.Q(status__in=["queued", "running"]) & ~models.Q(dedupe_key=""),
+                name="job_unique_active_dedupe",
+            ),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class PortfolioSummary(models.Model):
+    """
+    Materializované agregace portfolia (jediný řádek) – dashboard, analýza i Q&A je čtou jedním dotazem.
+    Udržují je signály Application a hromadné operace (services.summary), celý přepočet: rebuild_summary.
+    """
+
+    SINGLETON_ID = 1
+
+    total_apps = models.IntegerField(default=0)
+    counts = models.JSONField(default=dict)  # {"criticality": {"High": 12, ...}, "environment": {...}, ...}
+    debt_sum = models.BigIntegerField(default=0)  # součet tech_debt_score
+    # [[id, name, domain, criticality, environment, tech_debt_score], ...] seřazené podle (-score, id)
+    top_debt = models.JSONField(default=list)
+    top_size = models.IntegerField(default=0)  # kolik řádků top_debt drží (když je aplikací dost)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def avg_debt(self) -> float:
+        return self.debt_sum / self.total_apps if self.total_apps else 0.0
+
+    def top_counts(self, dimension: str, limit: int = None):
+        """[(hodnota, počet)] seřazené sestupně – jako values().annotate(Count).order_by("-c")."""
+        items = sorted(self.counts.get(dimension, {}).items(), key=lambda kv: (-kv[1], kv[0]))
+        return items[:limit] if limit else items
+
+    def __str__(self):
+        return f"Portfolio summary ({self.total_apps} apps)"
+
+
+class FTSDocumentField(models.TextField):
+    """Skrytý sloupec FTS5 tabulky se stejným jménem jako tabulka (cíl MATCH)."""
+
+
+@FTSDocumentField.register_lookup
+class FTSMatch(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class ApplicationSearch(models.Model):
+    """
+    Fulltextový index aplikací: FTS5 virtuální tabulka z migrace 0007 (jen SQLite), rowid = id aplikace.
+    Model slouží jen pro JOIN z Application (search_doc__document__match, search_doc__rank);
+    zapisuje do ní services.search.
+    """
+
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_doc",
+    )
+    name = models.TextField()
+    domain = models.TextField()
+    vendor = models.TextField()
+    tech_stack = models.TextField()
+    vendor_products = models.TextField()
+    database_technology = models.TextField()
+    capabilities = models.TextField()  # názvy capabilities oddělené mezerou
+    document = FTSDocumentField(db_column="applications_app_fts")
+    rank = models.FloatField(db_column="rank")  # bm25 s vahami sloupců (nižší = lepší shoda)
+
+    class Meta:
+        managed = False
+        db_table = "applications_app_fts"
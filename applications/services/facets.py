@@ -0,0 +1,97 @@
+"""
+Facety pro seznam aplikací: hodnoty každého filtru a kolik aplikací by s nimi zůstalo.
+
+- jeden GROUP BY přes všechny filtrované sloupce => řádek na kombinaci hodnot + počet aplikací
+  (kombinací je řádově méně než aplikací, sloupce mají nízkou kardinalitu)
+- kombinace se zakódují do NumPy polí (kód hodnoty na sloupec); počty facet pak jsou jen masky + bincount
+- počet u hodnoty respektuje ostatní aktivní filtry, ale ne filtr vlastního sloupce
+  (vidět jsou i alternativy k vybrané hodnotě)
+- index bez fulltextu (?q=) se cachuje podle verze portfolia; s ?q= se staví nad vyfiltrovanými aplikacemi
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count
+
+from ..models import Application
+from .versions import PORTFOLIO, get_version
+
+# GET parametr -> pole modelu
+FACETS = (
+    ("domain", "domain"),
+    ("criticality", "criticality"),
+    ("environment", "environment"),
+    ("region", "region"),
+    ("hosting", "hosting"),
+    ("vendor", "vendor"),
+    ("sensitivity", "data_sensitivity"),
+)
+FACET_CACHE_SECONDS = 3600
+
+
+class FacetIndex:
+    """Kombinace hodnot filtrů (GROUP BY) jako NumPy kódy + počty aplikací."""
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * (len(FACETS) + 1)
+        self.counts = np.fromiter(columns[-1], dtype=np.int64, count=len(rows))
+        self.labels = []
+        self.lookup = []
+        codes = []
+        for col in columns[:-1]:
+            labels = sorted(set(col))
+            lookup = {v: i for i, v in enumerate(labels)}
+            self.labels.append(labels)
+            self.lookup.append(lookup)
+            codes.append(np.fromiter((lookup[v] for v in col), dtype=np.int64, count=len(rows)))
+        self.codes = np.vstack(codes) if rows else np.zeros((len(FACETS), 0), dtype=np.int64)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def facet_counts(self, selected: dict):
+        """
+        selected = {GET parametr: hodnota} (prázdné = bez filtru).
+        Vrací ({parametr: [{"value", "count"}, ...]}, počet aplikací po všech filtrech).
+        """
+        # misses[r] = kolik aktivních filtrů kombinace r nesplňuje
+        misses = np.zeros(self.counts.shape[0], dtype=np.int64)
+        failed = []
+        for d, (param, _) in enumerate(FACETS):
+            value = selected.get(param)
+            if value:
+                fail = self.codes[d] != self.lookup[d].get(value, -1)
+                misses += fail
+                failed.append(fail)
+            else:
+                failed.append(None)
+
+        facets = {}
+        for d, (param, _) in enumerate(FACETS):
+            # ostatní filtry splněné (vlastní sloupec se nepočítá)
+            keep = misses == 0 if failed[d] is None else misses - failed[d] == 0
+            counts = np.bincount(self.codes[d][keep], weights=self.counts[keep], minlength=len(self.labels[d]))
+            facets[param] = [
+                {"value": value, "count": int(c)} for value, c in zip(self.labels[d], counts)
+            ]
+            value = selected.get(param)
+            if value and value not in self.lookup[d]:
+                # vybraná hodnota, která v datech není, zůstane v nabídce
+                facets[param].append({"value": value, "count": 0})
+        return facets, int(self.counts[misses == 0].sum())
+
+
+def build_facet_index(qs=None) -> FacetIndex:
+    qs = Application.objects.all() if qs is None else qs
+    fields = [field for _, field in FACETS]
+    return FacetIndex(list(qs.order_by().values_list(*fields).annotate(c=Count("id"))))
+
+
+def get_facet_index() -> FacetIndex:
+    """Index celého portfolia pro aktuální verzi; cache hit = 0 dotazů do DB."""
+    key = f"facets:v{get_version(PORTFOLIO)}"
+    index = cache.get(key)
+    if index is None:
+        index = build_facet_index()
+        cache.set(key, index, timeout=FACET_CACHE_SECONDS)
+    return index
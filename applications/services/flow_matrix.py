@@ -0,0 +1,98 @@
+"""
+Matice toků mezi doménami / regiony / hostingy (součet daily_volume a počet integrací).
+
+- jeden values_list dotaz (integrace + atributy zdrojové a cílové aplikace přes JOIN)
+- agregace v NumPy: kódování kategorií na čísla + bincount přes zdroj * k + cíl => k x k matice,
+  žádná Python smyčka přes objekty Integration
+- výsledek se cachuje podle verze grafu (signály Application/Integration)
+"""
+import time
+
+import numpy as np
+from django.core.cache import cache
+
+from ..models import Integration
+from .versions import GRAPH, get_version
+
+DIMENSIONS = ("domain", "region", "hosting")
+FLOW_CACHE_SECONDS = 3600
+TOP_FLOWS = 10
+
+
+def factorize(columns):
+    """
+    Sloupce hodnot jedné dimenze -> (seřazené labels, [NumPy pole kódů pro každý sloupec]).
+    Kódování přes dict (O(n)); np.unique nad řetězci by je třídil po jednom v Pythonu.
+    """
+    lookup = {}
+    codes = [
+        np.fromiter((lookup.setdefault(v or "N/A", len(lookup)) for v in col), dtype=np.int64, count=len(col))
+        for col in columns
+    ]
+    labels = sorted(lookup)
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[[lookup[x] for x in labels]] = np.arange(len(labels))
+    return labels, [rank[c] for c in codes]
+
+
+def flow_matrix(src, dst, volume, k):
+    """Kódy zdroje a cíle (0..k-1) + objemy -> (počty, objemy) jako matice k x k, [i][j] = tok z i do j."""
+    cell = src * k + dst
+    counts = np.bincount(cell, minlength=k * k).reshape(k, k)
+    volumes = np.bincount(cell, weights=volume, minlength=k * k).reshape(k, k).astype(np.int64)
+    return counts, volumes
+
+
+def top_cross_flows(labels, counts, volumes, top=TOP_FLOWS):
+    """Největší toky mimo diagonálu (mezi různými hodnotami): podle objemu, pak počtu integrací."""
+    off = volumes.copy()
+    np.fill_diagonal(off, -1)
+    total = int(volumes.sum()) or 1
+    order = np.lexsort((counts.ravel(), off.ravel()))[::-1][:top]
+    flows = []
+    for flat in order:
+        i, j = divmod(int(flat), len(labels))
+        if i == j or not counts[i, j]:
+            break
+        flows.append({
+            "source": labels[i],
+            "target": labels[j],
+            "integrations": int(counts[i, j]),
+            "daily_volume": int(volumes[i, j]),
+            "share": round(100 * int(volumes[i, j]) / total, 1),
+        })
+    return flows
+
+
+def build_flow_matrices():
+    started = time.perf_counter()
+    fields = ["daily_volume"]
+    for dim in DIMENSIONS:
+        fields += [f"source_app__{dim}", f"target_app__{dim}"]
+    rows = list(Integration.objects.values_list(*fields))
+
+    columns = list(zip(*rows)) if rows else [()] * len(fields)
+    volume = np.fromiter((v or 0 for v in columns[0]), dtype=np.int64, count=len(rows))
+    result = {"integrations": len(rows), "total_volume": int(volume.sum()), "matrices": {}}
+    for n, dim in enumerate(DIMENSIONS):
+        labels, (src, dst) = factorize(columns[1 + 2 * n:3 + 2 * n])
+        counts, volumes = flow_matrix(src, dst, volume, len(labels))
+        result["matrices"][dim] = {
+            "labels": labels,
+            "count": counts.tolist(),
+            "volume": volumes.tolist(),
+            "cross_volume": int(volumes.sum() - np.trace(volumes)),
+            "top_flows": top_cross_flows(labels, counts, volumes),
+        }
+    result["computed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def get_flow_matrices():
+    """Matice pro aktuální verzi grafu; cache hit = 0 dotazů do DB."""
+    key = f"flow_matrix:v{get_version(GRAPH)}"
+    data = cache.get(key)
+    if data is None:
+        data = build_flow_matrices()
+        cache.set(key, data, timeout=FLOW_CACHE_SECONDS)
+    return data
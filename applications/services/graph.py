@@ -0,0 +1,723 @@
+"""
+In-memory engine integračního grafu pro diagramy, grafové dotazy a rankingy.
+
+- načte se jedním dotazem na tabulku (aplikace + integrace), nikdy ne dotazy po uzlech
+- uzly mají husté indexy 0..n-1, hrany jsou v CSR (compressed sparse row):
+  odchozí hrany uzlu i = out_edges[out_ptr[i]:out_ptr[i + 1]] (indexy do polí hran), obdobně příchozí
+- atributy hran jsou sloupcová pole array (daily_volume, sync/async, kód typu), ne objekty na hranu
+- změny ze signálů se aplikují inkrementálně (apply): nové hrany jdou do malého overlay mimo CSR,
+  smazané se jen označí; když overlay naroste, CSR se přepočítá z polí v paměti (bez DB)
+- copy-on-write: publikovaný index se nikdy nemění; změny jdou do kopie (clone), která se pak vymění
+  jedním přiřazením pod _index_lock => vlákna requestů čtou bez zámku vždy neměnný snapshot
+- kopie je levná: základní pole sloupců a CSR se sdílí, změny od poslední kompakce jsou v malých
+  vrstvách (_Column / _LayeredDict, index -> hodnota); kopíruje se jen vrstva sloupce, který apply mění,
+  tj. O(změn od kompakce), ne O(uzlů + hran); kompakce vrstvy složí do nových polí
+- drží se per proces; ostatní procesy dohoní verzi z delt uložených v cache, jinak graf načtou znovu
+- rankingy (stupeň, objem, PageRank, přibližná betweenness) počítá NumPy vektorově nad živými hranami
+"""
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+from django.core.cache import cache
+
+from ..models import Application, Integration
+from .versions import GRAPH, bump, get_version
+
+logger = logging.getLogger(__name__)
+
+DIRECTION_OUT = "out"  # co aplikace volá / komu posílá data (downstream)
+DIRECTION_IN = "in"  # kdo ji volá (upstream)
+DIRECTION_BOTH = "both"
+DIRECTIONS = (DIRECTION_OUT, DIRECTION_IN, DIRECTION_BOTH)
+
+# změny grafu (delty ze signálů)
+OP_APP = "app"  # (id, name, domain, criticality)
+OP_APP_DELETE = "app-"  # id
+OP_EDGE = "edge"  # (id, source_app_id, target_app_id, daily_volume, direction, integration_type)
+OP_EDGE_DELETE = "edge-"  # id
+
+DELTA_TTL_SECONDS = 3600
+MAX_CATCH_UP = 1000  # víc delt za sebou => levnější je načíst graf znovu
+# kompakce po tolika změnách (min.) nebo po setině počtu hran – drží vrstvy změn malé
+COMPACT_MIN_CHANGES = 500
+
+_MISSING = object()
+_REMOVED = object()
+
+METRIC_DEGREE = "degree"
+METRIC_VOLUME = "volume"
+METRIC_PAGERANK = "pagerank"
+METRIC_BETWEENNESS = "betweenness"
+METRICS = (METRIC_DEGREE, METRIC_VOLUME, METRIC_PAGERANK, METRIC_BETWEENNESS)
+
+
+def _csr(n: int, keys: array, alive: bytearray = None):
+    """Stabilní třídění hran podle uzlu: (ptr, order), hrany uzlu i jsou order[ptr[i]:ptr[i+1]]; bez mrtvých."""
+    k = np.frombuffer(keys, dtype=np.int64)
+    edges = np.arange(len(k), dtype=np.int64)
+    if alive is not None:
+        mask = np.frombuffer(alive, dtype=np.uint8).astype(bool)
+        edges, k = edges[mask], k[mask]
+    order = edges[np.argsort(k, kind="stable")]
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(k, minlength=n), out=ptr[1:])
+    # zpět do array: dotazy po jednotlivých prvcích jsou nad array rychlejší než nad NumPy
+    return array("q", ptr.tobytes()), array("q", order.tobytes())
+
+
+class _Column:
+    """
+    Sloupec s vrstvou změn: sdílené základní pole (array / list / bytearray, už se nemění)
+    + změněné a přidané pozice {index: hodnota}. Čte se stejně jako pole (index, len, iterace).
+    """
+    __slots__ = ("base", "changes", "length")
+
+    def __init__(self, base, changes=None, length=None):
+        self.base = base
+        self.changes = {} if changes is None else changes
+        self.length = len(base) if length is None else length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        value = self.changes.get(i, _MISSING)
+        return self.base[i] if value is _MISSING else value
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self[i]
+
+    def __setitem__(self, i, value):
+        self.changes[i] = value
+
+    def append(self, value):
+        self.changes[self.length] = value
+        self.length += 1
+
+    def copy(self) -> "_Column":
+        return _Column(self.base, dict(self.changes), self.length)
+
+    def materialize(self):
+        """Nové pole stejného typu jako base se změnami (base zůstává beze změny)."""
+        out = self.base[:]
+        size = len(self.base)
+        out.extend(self.changes[i] for i in range(size, self.length))
+        for i, value in self.changes.items():
+            if i < size:
+                out[i] = value
+        return out
+
+
+class _LayeredDict:
+    """Slovník s vrstvou změn nad sdíleným základem (_REMOVED = klíč smazaný ve vrstvě)."""
+    __slots__ = ("base", "changes")
+
+    def __init__(self, base, changes=None):
+        self.base = base
+        self.changes = {} if changes is None else changes
+
+    def get(self, key, default=None):
+        value = self.changes.get(key, _MISSING)
+        if value is _MISSING:
+            return self.base.get(key, default)
+        return default if value is _REMOVED else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key, value):
+        self.changes[key] = value
+
+    def pop(self, key, default=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.changes[key] = _REMOVED
+        return value
+
+    def copy(self) -> "_LayeredDict":
+        return _LayeredDict(self.base, dict(self.changes))
+
+    def materialize(self) -> dict:
+        out = dict(self.base)
+        for key, value in self.changes.items():
+            if value is _REMOVED:
+                out.pop(key, None)
+            else:
+                out[key] = value
+        return out
+
+
+# sloupce uzlů a hran (vrstvené při změnách), pos je _LayeredDict
+COLUMNS = (
+    "app_ids", "names", "domains", "criticality", "node_alive",
+    "edge_ids", "src", "dst", "volume", "is_sync", "type_codes", "edge_alive",
+)
+
+
+def _np(values, dtype):
+    """Sloupec jako NumPy pole (vždy kopie, sdílený buffer se tak nikdy nepřipojí k výsledku)."""
+    if not isinstance(values, _Column):
+        return np.frombuffer(values, dtype=dtype).copy()
+    out = np.empty(values.length, dtype=dtype)
+    size = len(values.base)
+    if size:
+        out[:size] = np.frombuffer(values.base, dtype=dtype)
+    for i, value in values.changes.items():
+        out[i] = value
+    return out
+
+
+def _gather(ptr, order, nodes):
+    """Hrany všech uzlů nodes z CSR (NumPy) bez Python smyčky: order[ptr[u]:ptr[u+1]] pro každé u."""
+    starts = ptr[nodes]
+    counts = ptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return order[offsets + np.arange(total)]
+
+
+class GraphIndex:
+    def __init__(self, apps, edges, version=None):
+        """
+        apps: iterable (id, name, domain, criticality)
+        edges: iterable (id, source_app_id, target_app_id, daily_volume, direction, integration_type),
+               seřazené podle id
+        """
+        self.version = version
+        self._owned = set(COLUMNS) | {"pos"}  # sloupce, které smí tahle instance měnit na místě
+        self.app_ids = array("q")
+        self.names, self.domains, self.criticality = [], [], []
+        self.node_alive = bytearray()
+        self.pos = {}
+        # _labels, _type_code a type_labels sdílí všechny kopie: jen se přidává, existující kód se nemění
+        self._labels = {}  # sdílené instance opakovaných řetězců (domény, criticality)
+        for app in apps:
+            self._add_node(*app)
+
+        self.edge_ids = array("q")
+        self.src, self.dst = array("q"), array("q")
+        self.volume = array("q")
+        self.is_sync = array("b")
+        self.type_codes = array("H")
+        self.type_labels = []
+        self._type_code = {}
+        # hlavní smyčka načtení – bez volání metod na řádek
+        pos, type_code = self.pos, self._type_code
+        add_id, add_src, add_dst = self.edge_ids.append, self.src.append, self.dst.append
+        add_volume, add_sync, add_type = self.volume.append, self.is_sync.append, self.type_codes.append
+        for edge_id, source_id, target_id, volume, direction, integration_type in edges:
+            s, t = pos.get(source_id), pos.get(target_id)
+            if s is None or t is None:
+                continue
+            code = type_code.get(integration_type)
+            if code is None:
+                code = self._type(integration_type)
+            add_id(edge_id)
+            add_src(s)
+            add_dst(t)
+            add_volume(volume or 0)
+            add_sync(direction == "sync" or (direction or "").lower() == "sync")
+            add_type(code)
+        self.edge_alive = bytearray(b"\x01") * len(self.edge_ids)
+
+        self._dead_nodes = 0
+        self._dead_edges = 0
+        self.compact()
+
+    # -------- sestavení --------
+
+    @classmethod
+    def load(cls, version=None) -> "GraphIndex":
+        started = time.perf_counter()
+        apps = Application.objects.order_by("id").values_list("id", "name", "domain", "criticality")
+        edges = Integration.objects.order_by("id").values_list(
+            "id", "source_app_id", "target_app_id", "daily_volume", "direction", "integration_type"
+        )
+        index = cls(apps.iterator(chunk_size=5000), edges.iterator(chunk_size=5000), version)
+        logger.info(
+            "Graph index v%s: %d apps, %d integrations in %.0f ms",
+            version, index.node_count, index.edge_count, (time.perf_counter() - started) * 1000,
+        )
+        return index
+
+    def _label(self, value) -> str:
+        value = value or "N/A"
+        return self._labels.setdefault(value, value)
+
+    def _add_node(self, app_id, name, domain, criticality) -> int:
+        i = len(self.app_ids)
+        self._writable("pos")[app_id] = i
+        self._writable("app_ids").append(app_id)
+        self._writable("names").append(name)
+        self._writable("domains").append(self._label(domain))
+        self._writable("criticality").append(self._label(criticality))
+        self._writable("node_alive").append(1)
+        return i
+
+    def _type(self, integration_type) -> int:
+        code = self._type_code.get(integration_type)
+        if code is None:
+            code = self._type_code[integration_type] = len(self.type_labels)
+            self.type_labels.append(integration_type or "")
+        return code
+
+    def _set_edge(self, e, s, t, volume, direction, integration_type):
+        self._writable("src")[e] = s
+        self._writable("dst")[e] = t
+        self._writable("volume")[e] = volume or 0
+        self._writable("is_sync")[e] = 1 if (direction or "").lower() == "sync" else 0
+        self._writable("type_codes")[e] = self._type(integration_type)
+
+    def _append_edge(self, edge_id, s, t, volume, direction, integration_type) -> int:
+        e = len(self.edge_ids)
+        self._writable("edge_ids").append(edge_id)
+        self._writable("src").append(s)
+        self._writable("dst").append(t)
+        self._writable("volume").append(volume or 0)
+        self._writable("is_sync").append(1 if (direction or "").lower() == "sync" else 0)
+        self._writable("type_codes").append(self._type(integration_type))
+        self._writable("edge_alive").append(1)
+        return e
+
+    def compact(self):
+        """Vrstvy změn do nových polí, CSR znovu z nich (jen živé hrany), overlay se vyprázdní."""
+        for name in COLUMNS + ("pos",):
+            column = getattr(self, name)
+            if isinstance(column, (_Column, _LayeredDict)):
+                setattr(self, name, column.materialize())
+                self._owned.add(name)
+        n = len(self.app_ids)
+        alive = self.edge_alive if self._dead_edges else None
+        self.out_ptr, self.out_edges = _csr(n, self.src, alive)
+        self.in_ptr, self.in_edges = _csr(n, self.dst, alive)
+        self._extra_out, self._extra_in = {}, {}
+        self._changes = 0  # změny od kompakce (velikost vrstev)
+        self._overlay = 0  # hrany v overlay (mimo CSR)
+        self._stale = 0  # smazané / přesunuté hrany, které CSR ještě obsahuje
+        self._dirty = False  # True = CSR může obsahovat smazané / přesunuté hrany => out_of filtruje
+        self._rankings = {}
+
+    # -------- inkrementální změny --------
+
+    def clone(self) -> "GraphIndex":
+        """
+        Kopie pro apply (copy-on-write). Sdílí základní pole, CSR i vrstvy; sloupec se zkopíruje
+        (jen jeho vrstva změn) až při prvním zápisu do něj, viz _writable.
+        """
+        other = object.__new__(GraphIndex)
+        other.__dict__.update(self.__dict__)
+        other._owned = set()
+        other._extra_out, other._extra_in = dict(self._extra_out), dict(self._extra_in)
+        other._rankings = {}
+        return other
+
+    def _writable(self, name):
+        """Sloupec, do kterého smí tahle instance zapisovat (sdílený se nejdřív obalí / zkopíruje)."""
+        column = getattr(self, name)
+        if name not in self._owned:
+            if isinstance(column, (_Column, _LayeredDict)):
+                column = column.copy()
+            elif isinstance(column, dict):
+                column = _LayeredDict(column)
+            else:
+                column = _Column(column)
+            setattr(self, name, column)
+            self._owned.add(name)
+        return column
+
+    def apply(self, op) -> bool:
+        """
+        Aplikuje deltu ze signálu na místě – jen na kopii z clone(), ne na publikovaný index.
+        False = změnu nejde udělat inkrementálně (volající kopii zahodí a graf načte znovu).
+        """
+        kind, payload = op
+        self._rankings = {}
+        if kind == OP_APP:
+            self._upsert_node(*payload)
+        elif kind == OP_APP_DELETE:
+            self._remove_node(payload)
+        elif kind == OP_EDGE:
+            if not self._upsert_edge(*payload):
+                return False
+        elif kind == OP_EDGE_DELETE:
+            self._remove_edge(payload)
+        else:
+            return False
+
+        self._changes += 1
+        if self._changes > max(COMPACT_MIN_CHANGES, self.edge_count // 100):
+            self.compact()
+        return True
+
+    def _upsert_node(self, app_id, name, domain, criticality):
+        i = self.pos.get(app_id)
+        if i is None:
+            self._add_node(app_id, name, domain, criticality)
+            return
+        self._writable("names")[i] = name
+        self._writable("domains")[i] = self._label(domain)
+        self._writable("criticality")[i] = self._label(criticality)
+
+    def _remove_node(self, app_id):
+        if app_id not in self.pos:
+            return
+        i = self._writable("pos").pop(app_id)
+        # integrace mizí kaskádou (vlastní signály), tohle je jen pojistka
+        for e in list(self.out_of(i)) + list(self.into(i)):
+            self._remove_edge(self.edge_ids[e])
+        self._writable("node_alive")[i] = 0
+        self._dead_nodes += 1
+
+    def _edge_slot(self, edge_id):
+        # edge_ids jsou seřazená (načtení podle id, nové hrany mají vyšší id) => binární hledání
+        e = bisect_left(self.edge_ids, edge_id)
+        return e if e < len(self.edge_ids) and self.edge_ids[e] == edge_id else None
+
+    def _link(self, ptr, order, extra, node, e):
+        if node < len(ptr) - 1 and e in order[ptr[node]:ptr[node + 1]]:
+            return
+        current = extra.get(node, ())
+        if e not in current:
+            # nová n-tice místo append: clone() kopíruje jen slovník, n-tice sdílí s publikovaným indexem
+            extra[node] = current + (e,)
+            self._overlay += 1
+
+    def _upsert_edge(self, edge_id, source_id, target_id, volume, direction, integration_type) -> bool:
+        s, t = self.pos.get(source_id), self.pos.get(target_id)
+        if s is None or t is None:
+            return False
+        e = self._edge_slot(edge_id)
+        if e is None:
+            if self.edge_ids and edge_id < self.edge_ids[-1]:
+                return False  # id mimo pořadí => bisect by neplatil
+            e = self._append_edge(edge_id, s, t, volume, direction, integration_type)
+        else:
+            if not self.edge_alive[e]:
+                self._writable("edge_alive")[e] = 1
+                self._dead_edges -= 1
+            if (self.src[e], self.dst[e]) != (s, t):
+                self._stale += 1
+                self._dirty = True
+            self._set_edge(e, s, t, volume, direction, integration_type)
+        self._link(self.out_ptr, self.out_edges, self._extra_out, s, e)
+        self._link(self.in_ptr, self.in_edges, self._extra_in, t, e)
+        return True
+
+    def _remove_edge(self, edge_id):
+        e = self._edge_slot(edge_id)
+        if e is None or not self.edge_alive[e]:
+            return
+        self._writable("edge_alive")[e] = 0
+        self._dead_edges += 1
+        self._stale += 1
+        self._dirty = True
+
+    # -------- dotazy --------
+
+    @property
+    def node_count(self) -> int:
+        return len(self.app_ids) - self._dead_nodes
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_ids) - self._dead_edges
+
+    def edge_type(self, e: int) -> str:
+        return self.type_labels[self.type_codes[e]]
+
+    def _adjacent(self, ptr, order, extra, ends, i):
+        edges = order[ptr[i]:ptr[i + 1]] if i < len(ptr) - 1 else ()
+        more = extra.get(i)
+        if not self._dirty and not more:
+            return edges
+        alive = self.edge_alive
+        result = [e for e in edges if alive[e] and ends[e] == i]
+        if more:
+            result.extend(e for e in more if alive[e] and ends[e] == i)
+        return result
+
+    def out_of(self, i: int):
+        return self._adjacent(self.out_ptr, self.out_edges, self._extra_out, self.src, i)
+
+    def into(self, i: int):
+        return self._adjacent(self.in_ptr, self.in_edges, self._extra_in, self.dst, i)
+
+    def alive_nodes(self):
+        return (i for i, alive in enumerate(self.node_alive) if alive)
+
+    def neighbourhood(self, roots, hops=1, direction=DIRECTION_BOTH, min_volume=0, max_nodes=None):
+        """
+        BFS do hloubky hops z kořenů (indexy uzlů). Vrací (uzly {index: hloubka}, hrany [index hrany],
+        truncated) – hrany jsou ty, po kterých BFS prošlo (i mezi už navštívenými uzly).
+        """
+        depth = {r: 0 for r in roots}
+        frontier = list(depth)
+        seen_edges = set()
+        truncated = False
+
+        for level in range(1, hops + 1):
+            nxt = []
+            for node in frontier:
+                candidates = []
+                if direction in (DIRECTION_OUT, DIRECTION_BOTH):
+                    candidates.extend((e, self.dst[e]) for e in self.out_of(node))
+                if direction in (DIRECTION_IN, DIRECTION_BOTH):
+                    candidates.extend((e, self.src[e]) for e in self.into(node))
+
+                for e, other in candidates:
+                    if self.volume[e] < min_volume or e in seen_edges:
+                        continue
+                    if other not in depth:
+                        if max_nodes and len(depth) >= max_nodes:
+                            truncated = True
+                            continue
+                        depth[other] = level
+                        nxt.append(other)
+                    seen_edges.add(e)
+            frontier = nxt
+            if not frontier:
+                break
+
+        return depth, sorted(seen_edges), truncated
+
+    def domain_flows(self, min_volume=0):
+        """{(doména zdroje, doména cíle): [počet integrací, součet daily_volume]}."""
+        flows = {}
+        alive = self.edge_alive
+        for e in range(len(self.edge_ids)):
+            if not alive[e] or self.volume[e] < min_volume:
+                continue
+            key = (self.domains[self.src[e]], self.domains[self.dst[e]])
+            agg = flows.setdefault(key, [0, 0])
+            agg[0] += 1
+            agg[1] += self.volume[e]
+        return flows
+
+    def domain_sizes(self) -> Counter:
+        return Counter(self.domains[i] for i in self.alive_nodes())
+
+    # -------- vektorové rankingy (NumPy) --------
+
+    def edge_arrays(self):
+        """Živé hrany jako NumPy pole (src, dst, daily_volume, is_sync) + maska živých uzlů."""
+        src, dst = _np(self.src, np.int64), _np(self.dst, np.int64)
+        volume = _np(self.volume, np.int64)
+        is_sync = _np(self.is_sync, np.int8).astype(bool)
+        nodes = _np(self.node_alive, np.uint8).astype(bool)
+        if self._dead_edges:
+            alive = _np(self.edge_alive, np.uint8).astype(bool)
+            src, dst, volume, is_sync = src[alive], dst[alive], volume[alive], is_sync[alive]
+        return src, dst, volume, is_sync, nodes
+
+    def degrees(self) -> dict:
+        """Počty a objemy odchozích/příchozích integrací na uzel (pole délky počtu slotů)."""
+        src, dst, volume, _, nodes = self.edge_arrays()
+        n = len(nodes)
+        return {
+            "out": np.bincount(src, minlength=n),
+            "in": np.bincount(dst, minlength=n),
+            "volume_out": np.bincount(src, weights=volume, minlength=n),
+            "volume_in": np.bincount(dst, weights=volume, minlength=n),
+        }
+
+    def pagerank(self, damping=0.85, weighted=True, tol=1e-9, max_iter=100) -> np.ndarray:
+        """
+        PageRank po směru toku dat (power iteration, každá iterace = 2x bincount nad hranami).
+        weighted: hrana váží daily_volume (min. 1). Uzly bez odchozích hran rozdělí skóre rovnoměrně.
+        """
+        src, dst, volume, _, nodes = self.edge_arrays()
+        n, count = len(nodes), int(nodes.sum())
+        if not count:
+            return np.zeros(n)
+        weight = np.maximum(volume, 1).astype(np.float64) if weighted else np.ones(len(src))
+        out_weight = np.bincount(src, weights=weight, minlength=n)
+        dangling = nodes & (out_weight == 0)
+        base = nodes / count
+
+        rank = base.copy()
+        for _ in range(max_iter):
+            share = np.divide(rank, out_weight, out=np.zeros(n), where=out_weight > 0)
+            nxt = np.bincount(dst, weights=share[src] * weight, minlength=n)
+            nxt = damping * (nxt + rank[dangling].sum() * base) + (1 - damping) * base
+            if np.abs(nxt - rank).sum() < tol:
+                rank = nxt
+                break
+            rank = nxt
+        return rank
+
+    def betweenness(self, samples=64, seed=0) -> np.ndarray:
+        """
+        Přibližná betweenness (Brandes z `samples` náhodných zdrojů, po směru toku, bez vah).
+        BFS i zpětná akumulace jdou po úrovních vektorově – Python smyčka je jen přes úrovně.
+        """
+        src, dst, _, _, nodes = self.edge_arrays()
+        n = len(nodes)
+        scores = np.zeros(n)
+        candidates = np.flatnonzero(nodes)
+        if not len(candidates) or not len(src):
+            return scores
+
+        # násobné integrace mezi stejnou dvojicí = jedna hrana
+        pairs = np.unique(src * n + dst)
+        src, dst = pairs // n, pairs % n
+        order = np.argsort(src, kind="stable")
+        ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=ptr[1:])
+
+        rng = np.random.default_rng(seed)
+        sources = candidates if samples >= len(candidates) else rng.choice(candidates, samples, replace=False)
+        for s in sources:
+            dist = np.full(n, -1, dtype=np.int64)
+            sigma = np.zeros(n)
+            dist[s], sigma[s] = 0, 1.0
+            frontier = np.array([s])
+            levels = []
+            level = 0
+            while frontier.size:
+                edges = _gather(ptr, order, frontier)
+                targets = dst[edges]
+                new = np.unique(targets[dist[targets] < 0])
+                dist[new] = level + 1
+                on_path = edges[dist[targets] == level + 1]
+                if on_path.size:
+                    sigma += np.bincount(dst[on_path], weights=sigma[src[on_path]], minlength=n)
+                    levels.append(on_path)
+                frontier = new
+                level += 1
+
+            delta = np.zeros(n)
+            for on_path in reversed(levels):
+                u, v = src[on_path], dst[on_path]
+                delta += np.bincount(u, weights=sigma[u] / sigma[v] * (1 + delta[v]), minlength=n)
+            delta[s] = 0
+            scores += delta
+
+        return scores * (len(candidates) / len(sources))
+
+    def rankings(self, metric=METRIC_PAGERANK, top=20, samples=64):
+        """Top N aplikací podle metriky: [{"index", "score"}]; výsledek se drží do další změny grafu."""
+        key = (metric, samples)
+        scores = self._rankings.get(key)
+        if scores is None:
+            if metric == METRIC_DEGREE:
+                d = self.degrees()
+                scores = (d["out"] + d["in"]).astype(np.float64)
+            elif metric == METRIC_VOLUME:
+                d = self.degrees()
+                scores = d["volume_out"] + d["volume_in"]
+            elif metric == METRIC_PAGERANK:
+                scores = self.pagerank()
+            elif metric == METRIC_BETWEENNESS:
+                scores = self.betweenness(samples)
+            else:
+                raise ValueError(f"Unknown metric: {metric}")
+            scores = np.where(_np(self.node_alive, np.uint8).astype(bool), scores, -np.inf)
+            self._rankings[key] = scores
+
+        top = max(0, min(top, self.node_count))
+        if not top:
+            return []
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.lexsort((best, -scores[best]))]
+        return [{"index": int(i), "score": float(scores[i])} for i in best]
+
+    def nbytes(self) -> int:
+        """Velikost sloupcových polí (CSR + atributy hran a uzlů), bez Python seznamů a dictů a vrstev změn."""
+        arrays = (
+            self.app_ids, self.node_alive, self.edge_ids, self.src, self.dst, self.volume, self.is_sync,
+            self.type_codes, self.edge_alive, self.out_ptr, self.out_edges, self.in_ptr, self.in_edges,
+        )
+        arrays = [a.base if isinstance(a, _Column) else a for a in arrays]
+        return sum(len(a) * getattr(a, "itemsize", 1) for a in arrays)
+
+
+# -------- index per proces --------
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _delta_key(version: int) -> str:
+    return f"graph:delta:{version}"
+
+
+def _catch_up(index: GraphIndex, version: int):
+    """Kopie indexu dohnaná na verzi z delt v cache; None => je potřeba načíst znovu."""
+    gap = version - (index.version or 0)
+    if gap == 0:
+        return index
+    if not 0 < gap <= MAX_CATCH_UP:
+        return None
+    keys = [_delta_key(v) for v in range(index.version + 1, version + 1)]
+    deltas = cache.get_many(keys)
+    if len(deltas) != len(keys):
+        return None
+    new = index.clone()
+    for key in keys:
+        if not new.apply(deltas[key]):
+            return None
+    new.version = version
+    return new
+
+
+def get_graph() -> GraphIndex:
+    """Index pro aktuální verzi grafu (per proces; sestaví se jen jednou i při souběhu)."""
+    global _index
+    version = get_version(GRAPH)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock:
+        index = _index
+        if index is None or index.version != version:
+            index = _catch_up(index, version) if index is not None else None
+            if index is None:
+                index = GraphIndex.load(version)
+            # jediné přiřazení = publikace; čtenáři drží dál svůj starý snapshot
+            _index = index
+        return index
+
+
+def record_change(op):
+    """
+    Po commitu změny (signály): nová verze grafu + delta do cache pro ostatní procesy,
+    index tohoto procesu se nahradí upravenou kopií (bez načítání z DB).
+    """
+    global _index
+    version = bump(GRAPH)
+    cache.set(_delta_key(version), op, timeout=DELTA_TTL_SECONDS)
+    with _index_lock:
+        index = _index
+        if index is None or index.version != version - 1:
+            return
+        new = index.clone()
+        # neúspěch: starý index zůstane (nižší verze), get_graph ho načte znovu
+        if new.apply(op):
+            new.version = version
+            _index = new
+
+
+def app_change(app):
+    return OP_APP, (app.pk, app.name, app.domain, app.criticality)
+
+
+def edge_change(integration):
+    i = integration
+    return OP_EDGE, (i.pk, i.source_app_id, i.target_app_id, i.daily_volume, i.direction, i.integration_type)
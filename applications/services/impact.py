@@ -0,0 +1,143 @@
+"""
+Blast radius: které aplikace výpadek zasáhne a jaký denní objem je v ohrožení.
+
+- omezené BFS nad in-memory grafem (GraphIndex) – žádné dotazy po uzlech, hloubka i počet aplikací mají strop
+- dopad teče po směru toku dat (source_app -> target_app); volitelně i na synchronní volající
+  (source_app volá výpadlý target_app přes sync integraci => jeho volání selžou)
+- síla dopadu = součin vah hran na nejsilnější cestě: sync 1.0 (okamžitý výpadek),
+  async ASYNC_IMPACT (fronta/soubor to chvíli utlumí)
+- výsledek se cachuje podle verze grafu (po změně integrací se klíč sám změní)
+"""
+import hashlib
+
+from django.core.cache import cache
+
+from .graph import get_graph
+from .versions import GRAPH, get_version
+
+ASYNC_IMPACT = 0.5
+DEFAULT_HOPS = 4
+MAX_HOPS = 10
+MAX_AFFECTED = 10_000
+IMPACT_CACHE_SECONDS = 3600
+
+CRITICALITY_ORDER = ["Critical", "High", "Medium", "Low"]
+
+
+def _criticality_rank(value: str) -> int:
+    return CRITICALITY_ORDER.index(value) if value in CRITICALITY_ORDER else len(CRITICALITY_ORDER)
+
+
+def blast_radius(graph, roots, hops=DEFAULT_HOPS, include_callers=False, min_volume=0, max_affected=MAX_AFFECTED):
+    """
+    roots: indexy uzlů (výpadek). Vrací dict s dotčenými aplikacemi (bez kořenů), objemy v ohrožení
+    a skupinami podle criticality.
+    """
+    roots = list(dict.fromkeys(roots))
+    failed = set(roots)
+    impact = {r: 1.0 for r in roots}
+    depth = {r: 0 for r in roots}
+    risk_edges = {}  # index hrany -> zasažená aplikace
+    direct = 0  # objem hran přímo z výpadlých aplikací
+    truncated = False
+
+    frontier = roots
+    for level in range(1, hops + 1):
+        improved = {}
+        for u in frontier:
+            candidates = [(e, graph.dst[e]) for e in graph.out_of(u)]
+            if include_callers:
+                candidates.extend((e, graph.src[e]) for e in graph.into(u) if graph.is_sync[e])
+
+            for e, v in candidates:
+                if v in failed or graph.volume[e] < min_volume:
+                    continue
+                if v not in depth:
+                    if len(depth) - len(failed) >= max_affected:
+                        truncated = True
+                        continue
+                    depth[v] = level
+                if level == 1 and e not in risk_edges:
+                    direct += graph.volume[e]
+                risk_edges[e] = v
+                score = impact[u] * (1.0 if graph.is_sync[e] else ASYNC_IMPACT)
+                if score > impact.get(v, 0.0):
+                    # silnější cesta => šíří se dál znovu (jen do limitu hops)
+                    impact[v] = score
+                    improved[v] = True
+        frontier = list(improved)
+        if not frontier:
+            break
+
+    volume_by_app = {}
+    sync_volume = 0
+    for e, v in risk_edges.items():
+        volume_by_app[v] = volume_by_app.get(v, 0) + graph.volume[e]
+        if graph.is_sync[e]:
+            sync_volume += graph.volume[e]
+
+    apps = [
+        {
+            "id": graph.app_ids[i],
+            "name": graph.names[i],
+            "domain": graph.domains[i],
+            "criticality": graph.criticality[i],
+            "hops": depth[i],
+            "impact": round(impact[i], 4),
+            "mode": "sync" if impact[i] >= 1.0 else "async",
+            "volume_at_risk": volume_by_app.get(i, 0),
+        }
+        for i in depth if i not in failed
+    ]
+    apps.sort(key=lambda a: (-a["impact"], -a["volume_at_risk"], a["name"]))
+
+    by_criticality = {}
+    for a in sorted(apps, key=lambda a: _criticality_rank(a["criticality"])):
+        group = by_criticality.setdefault(a["criticality"], {"criticality": a["criticality"], "count": 0, "volume_at_risk": 0, "apps": []})
+        group["count"] += 1
+        group["volume_at_risk"] += a["volume_at_risk"]
+        group["apps"].append(a)
+
+    return {
+        "roots": [{"id": graph.app_ids[r], "name": graph.names[r]} for r in roots],
+        "hops": hops,
+        "include_callers": include_callers,
+        "min_volume": min_volume,
+        "affected_count": len(apps),
+        "sync_affected_count": sum(1 for a in apps if a["mode"] == "sync"),
+        "direct_volume_at_risk": direct,
+        "volume_at_risk": sum(volume_by_app.values()),
+        "sync_volume_at_risk": sync_volume,
+        "truncated": truncated,
+        "by_criticality": list(by_criticality.values()),
+        "apps": apps,
+    }
+
+
+def _cache_key(app_ids, hops, include_callers, min_volume) -> str:
+    params = f"{sorted(set(app_ids))}:{hops}:{int(include_callers)}:{min_volume}"
+    digest = hashlib.sha256(params.encode("utf-8")).hexdigest()[:32]
+    return f"impact:v{get_version(GRAPH)}:{digest}"
+
+
+def get_impact(app_ids, hops=DEFAULT_HOPS, include_callers=False, min_volume=0):
+    """
+    Blast radius pro ID aplikací. Vrací (výsledek, neznámá ID); výsledek je None, když žádné ID neexistuje.
+    Cache hit = 0 dotazů do DB i bez procházení grafu.
+    """
+    hops = max(1, min(MAX_HOPS, int(hops)))
+    key = _cache_key(app_ids, hops, include_callers, min_volume)
+    result = cache.get(key)
+    if result is not None:
+        return result, []
+
+    graph = get_graph()
+    roots = [graph.pos[a] for a in app_ids if a in graph.pos]
+    unknown = [a for a in app_ids if a not in graph.pos]
+    if not roots:
+        return None, unknown
+
+    result = blast_radius(graph, roots, hops, include_callers, min_volume)
+    if not unknown:
+        cache.set(key, result, timeout=IMPACT_CACHE_SECONDS)
+    return result, unknown
@@ -0,0 +1,209 @@
+"""
+Fronta LLM úloh v DB (bez brokera) – views jen založí Job a vrátí jeho id,
+LLM volá až management command run_llm_worker.
+
+- enqueue_*: založí úlohu; stejná čekající/běžící úloha (dedupe_key) se nezakládá znovu – hlídá to
+  podmíněný unique constraint, souběžný enqueue dostane úlohu toho, kdo ji založil první
+- claim_next: podmíněný UPDATE queued -> running, takže si úlohu nevezmou dvě vlákna ani dva procesy
+- requeue_stale: úloha běžící déle než LLM_JOB_TIMEOUT_SECONDS (spadlý worker) jde zpět do fronty,
+  po LLM_JOB_MAX_ATTEMPTS pokusech skončí jako failed
+"""
+import hashlib
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import Application, Job
+from .llm_client import ask_llm, LLMError
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+class JobError(Exception):
+    """Úloha doběhla, ale výsledek nejde použít (zpráva jde uživateli)."""
+
+
+def jobs_enabled() -> bool:
+    return bool(getattr(settings, "LLM_JOBS_ENABLED", False))
+
+
+def _timeout_seconds() -> int:
+    return int(getattr(settings, "LLM_JOB_TIMEOUT_SECONDS", 300))
+
+
+def _max_attempts() -> int:
+    return max(1, int(getattr(settings, "LLM_JOB_MAX_ATTEMPTS", 2)))
+
+
+def handler(kind):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+# -------- enqueue --------
+
+def _active_job(kind: str, dedupe_key: str):
+    return Job.objects.filter(
+        kind=kind, dedupe_key=dedupe_key, status__in=[Job.STATUS_QUEUED, Job.STATUS_RUNNING]
+    ).first()
+
+
+def enqueue(kind: str, params: dict = None, dedupe_key: str = "") -> Job:
+    if not dedupe_key:
+        return Job.objects.create(kind=kind, params=params or {})
+    existing = _active_job(kind, dedupe_key)
+    if existing:
+        return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(kind=kind, params=params or {}, dedupe_key=dedupe_key)
+    except IntegrityError:
+        # souběžný enqueue ji založil mezi dotazem a INSERT (job_unique_active_dedupe) => jeho úloha
+        existing = _active_job(kind, dedupe_key)
+        if existing is None:
+            raise
+        return existing
+
+
+def enqueue_analysis() -> Job:
+    # analýza je jen jedna => souběžné požadavky sdílí jednu úlohu
+    return enqueue(Job.KIND_ANALYSIS, dedupe_key="analysis")
+
+
+def enqueue_qa(question: str) -> Job:
+    digest = hashlib.sha256(question.strip().lower().encode("utf-8")).hexdigest()[:32]
+    return enqueue(Job.KIND_QA, {"question": question}, dedupe_key=f"qa:{digest}")
+
+
+def enqueue_mermaid(app_id: int) -> Job:
+    return enqueue(Job.KIND_MERMAID, {"app_id": app_id}, dedupe_key=f"mermaid:{app_id}")
+
+
+def enqueue_description(app_id: int) -> Job:
+    return enqueue(Job.KIND_DESCRIPTION, {"app_id": app_id}, dedupe_key=f"description:{app_id}")
+
+
+# async views
+aenqueue_analysis = sync_to_async(enqueue_analysis)
+aenqueue_qa = sync_to_async(enqueue_qa)
+aenqueue_mermaid = sync_to_async(enqueue_mermaid)
+aenqueue_description = sync_to_async(enqueue_description)
+
+
+# -------- worker --------
+
+def claim_next(worker: str):
+    """Vezme nejstarší čekající úlohu (nebo None)."""
+    candidates = (
+        Job.objects.filter(status=Job.STATUS_QUEUED)
+        .order_by("created_at", "id")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in list(candidates):
+        claimed = Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            started_at=timezone.now(),
+            worker=worker,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job: Job) -> Job:
+    fn = HANDLERS.get(job.kind)
+    try:
+        if fn is None:
+            raise JobError(f"Neznámý typ úlohy: {job.kind}")
+        job.result = fn(job.params) or ""
+        job.status = Job.STATUS_DONE
+    except (LLMError, JobError) as e:
+        job.status = Job.STATUS_FAILED
+        job.error = f"LLM chyba: {str(e)}" if isinstance(e, LLMError) else str(e)
+    except Exception:
+        logger.exception("Job %s failed", job.pk)
+        job.status = Job.STATUS_FAILED
+        job.error = "Nastala neočekávaná chyba."
+
+    job.finished_at = timezone.now()
+    # jen pokud ji mezitím nepřevzal jiný worker (requeue_stale)
+    Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, worker=job.worker).update(
+        status=job.status, result=job.result, error=job.error, finished_at=job.finished_at,
+    )
+    return job
+
+
+def requeue_stale() -> tuple:
+    """Vrátí (requeued, failed) pro úlohy, které běží déle než timeout."""
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=_timeout_seconds()))
+    failed = stale.filter(attempts__gte=_max_attempts()).update(
+        status=Job.STATUS_FAILED, error="Úloha nedoběhla (timeout workeru).", finished_at=now,
+    )
+    requeued = stale.update(status=Job.STATUS_QUEUED, worker="")
+    return requeued, failed
+
+
+def purge_finished(hours: int) -> int:
+    cutoff = timezone.now() - timedelta(hours=hours)
+    deleted, _ = Job.objects.filter(status__in=Job.FINISHED, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+# -------- handlery (sync, běží ve vlákně workeru) --------
+
+@handler(Job.KIND_ANALYSIS)
+def _run_analysis(params):
+    # prompt buildery žijí u views (async ORM) – importovat až tady kvůli cyklu
+    from ..views.pages.analysis import (
+        ANALYSIS_CACHE_KEY, ANALYSIS_TTL_SECONDS, _build_analysis_prompt, _stale_seconds,
+    )
+    from .singleflight import store
+
+    result = ask_llm(async_to_sync(_build_analysis_prompt)())
+    store(ANALYSIS_CACHE_KEY, result, ANALYSIS_TTL_SECONDS, _stale_seconds())
+    return result
+
+
+@handler(Job.KIND_QA)
+def _run_qa(params):
+    from ..views.pages.qa import _build_qa_prompt
+
+    return ask_llm(async_to_sync(_build_qa_prompt)(params["question"]))
+
+
+def _get_app(params):
+    try:
+        return Application.objects.get(pk=params.get("app_id"))
+    except Application.DoesNotExist:
+        raise JobError("Aplikace neexistuje.")
+
+
+@handler(Job.KIND_MERMAID)
+def _run_mermaid(params):
+    from .mermaid import beautify_mermaid
+
+    data, error = beautify_mermaid(params.get("app_id"))
+    if data is None:
+        raise JobError("Aplikace neexistuje.")
+    if error:
+        # neověřené zkrášlení => vrací se základní (deterministický) diagram
+        logger.warning("Mermaid job for app %s: %s", params.get("app_id"), error)
+    return data["mermaid"]
+
+
+@handler(Job.KIND_DESCRIPTION)
+def _run_description(params):
+    from ..views.pages.qa import _build_description_prompt
+
+    return ask_llm(_build_description_prompt(_get_app(params)))
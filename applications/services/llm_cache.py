@@ -0,0 +1,214 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def make_key(model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+    """Content-addressed klíč: stejný model + parametry + prompt => stejná odpověď."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    raw = json.dumps([model, float(temperature), int(max_tokens), prompt_hash])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Dvouúrovňová cache odpovědí LLM:
+    - paměť: omezené LRU (OrderedDict), per proces
+    - disk: SQLite soubor s TTL a limitem velikosti (sdílený mezi procesy)
+    """
+
+    def __init__(self, memory_items=256, ttl_seconds=86400, path=None, disk_max_bytes=50 * 1024 * 1024):
+        self.memory_items = max(0, int(memory_items))
+        self.ttl_seconds = max(1, int(ttl_seconds))
+        self.path = str(path) if path else None
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._schema_ready = False
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    # -------- disk tier --------
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache(last_access)")
+            self._schema_ready = True
+        return conn
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        conn = self._conn()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        return value
+
+    def _disk_set(self, key: str, value: str, now: float) -> None:
+        conn = self._conn()
+        if conn is None:
+            return
+        size = len(value.encode("utf-8"))
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache(key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, value, size, now + self.ttl_seconds, now),
+        )
+        self._disk_evict(conn, now)
+
+    def _disk_evict(self, conn: sqlite3.Connection, now: float) -> None:
+        evicted = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+        if self.disk_max_bytes:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total > self.disk_max_bytes:
+                # nejdéle nepoužité záznamy pryč, dokud se nevejdeme do limitu
+                for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access").fetchall():
+                    if total <= self.disk_max_bytes:
+                        break
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    total -= size
+                    evicted += 1
+        if evicted:
+            with self._lock:
+                self._stats["evictions"] += evicted
+
+    # -------- public API --------
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+        return self._disk_lookup(key, now)
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        self._memory_set(key, value, now)
+        self._disk_write(key, value, now)
+
+    # async views: paměť přímo v event loopu, disk (SQLite dotazy, eviction) ve vlákně executoru
+
+    async def aget(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+        if not self.path:
+            return self._disk_lookup(key, now)
+        return await sync_to_async(self._disk_lookup, thread_sensitive=False)(key, now)
+
+    async def aset(self, key: str, value: str) -> None:
+        now = time.time()
+        self._memory_set(key, value, now)
+        if not self.path:
+            self._disk_write(key, value, now)
+            return
+        await sync_to_async(self._disk_write, thread_sensitive=False)(key, value, now)
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return value
+            del self._memory[key]
+            return None
+
+    def _disk_lookup(self, key: str, now: float) -> Optional[str]:
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+        self._memory_set(key, value, now)
+        return value
+
+    def _disk_write(self, key: str, value: str, now: float) -> None:
+        self._disk_set(key, value, now)
+        with self._lock:
+            self._stats["writes"] += 1
+
+    def _memory_set(self, key: str, value: str, now: float) -> None:
+        if not self.memory_items:
+            return
+        with self._lock:
+            self._memory[key] = (now + self.ttl_seconds, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        conn = self._conn()
+        if conn is not None:
+            conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["memory_items"] = len(self._memory)
+        lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+        out["hit_ratio"] = round((out["memory_hits"] + out["disk_hits"]) / lookups, 3) if lookups else 0.0
+
+        conn = self._conn()
+        if conn is not None:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            out["disk_items"] = count
+            out["disk_bytes"] = size
+        return out
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Sdílená instance podle settings; None když je cache vypnutá."""
+    global _cache
+    if not getattr(settings, "LLM_CACHE_ENABLED", True):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    memory_items=getattr(settings, "LLM_CACHE_MEMORY_ITEMS", 256),
+                    ttl_seconds=getattr(settings, "LLM_CACHE_TTL_SECONDS", 86400),
+                    path=getattr(settings, "LLM_CACHE_PATH", None),
+                    disk_max_bytes=int(getattr(settings, "LLM_CACHE_DISK_MAX_MB", 50)) * 1024 * 1024,
+                )
+    return _cache
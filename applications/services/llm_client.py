@@ -1,7 +1,21 @@
+import os
+import json
 import time
+import asyncio
+import threading
+import weakref
+import httpx
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 
+from .llm_cache import get_llm_cache, make_key
+from .llm_resilience import (
+    RETRYABLE_STATUS, backoff_delay, counters, get_breaker, outcome_for_status, parse_retry_after,
+)
+from .request_timing import count_llm_call, timed_llm_call
+
 
 class LLMError(Exception):
     pass
@@ -20,18 +34,91 @@ def _get_model() -> str:
     return model
 
 
-def llm_ask(prompt: str) -> str:
-    print("LLM CALLED")
-    if not getattr(settings, "LLM_API_KEY", None):
-        raise LLMError("Missing LLM_API_KEY")
+def _get_api_base() -> str:
+    # lze přesměrovat na lokální OpenAI-kompatibilní server (benchmarky, testy)
+    base = getattr(settings, "LLM_API_BASE", None) or "https://api.openai.com/v1"
+    return base.rstrip("/")
 
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {settings.LLM_API_KEY}",
-        "Content-Type": "application/json",
+
+def _get_pool_size() -> int:
+    return max(1, int(getattr(settings, "LLM_POOL_SIZE", 10) or 10))
+
+
+# -------- Sdílená keep-alive session (1 na proces) --------
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "async_requests": 0}
+
+
+def get_session() -> requests.Session:
+    """
+    Vrátí sdílenou session s connection poolem.
+    Po forku (gunicorn workers) se vytvoří nová, sockety se mezi procesy nesdílí.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            pool_size = _get_pool_size()
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+            _session_pid = pid
+            with _stats_lock:
+                _stats["requests"] = 0
+                _stats["async_requests"] = 0
+    return _session
+
+
+def reset_session() -> None:
+    """Zavře pool (např. po změně LLM_API_BASE / LLM_POOL_SIZE)."""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+        with _stats_lock:
+            _stats["requests"] = 0
+            _stats["async_requests"] = 0
+
+
+def session_stats() -> dict:
+    """
+    Počítadla poolu: kolik requestů šlo ven a kolik z nich muselo otevřít nové spojení.
+    Čísla bere přímo z urllib3 poolů (num_connections = nově otevřená spojení).
+    """
+    new_connections = 0
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    new_connections += pool.num_connections
+
+    with _stats_lock:
+        total = _stats["requests"]
+        async_total = _stats["async_requests"]
+    return {
+        "requests": total,
+        "async_requests": async_total,
+        "new_connections": new_connections,
+        "reused_connections": max(0, total - new_connections),
+        "pool_size": _get_pool_size(),
     }
 
-    payload = {
+
+def _build_payload(prompt: str) -> dict:
+    return {
         "model": _get_model(),
         "messages": [
             {"role": "system", "content": "You are a helpful assistant."},
@@ -42,38 +129,398 @@ def llm_ask(prompt: str) -> str:
         "max_tokens": int(getattr(settings, "LLM_MAX_TOKENS", 600) or 600),
     }
 
+
+def _cache_key(payload: dict, prompt: str) -> str:
+    return make_key(payload["model"], payload["temperature"], payload["max_tokens"], prompt)
+
+
+def llm_ask(prompt: str, use_cache: bool = True) -> str:
+    """
+    use_cache=False => vždy nové volání (např. seed, kde chceme pokaždé jiná data).
+    """
+    payload = _build_payload(prompt)
+    cache = get_llm_cache() if use_cache else None
+    if cache is not None:
+        key = _cache_key(payload, prompt)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    answer = _post_chat(payload)
+
+    if cache is not None:
+        cache.set(key, answer)
+    return answer
+
+
+def _request_parts() -> tuple:
+    if not getattr(settings, "LLM_API_KEY", None):
+        raise LLMError("Missing LLM_API_KEY")
+
+    url = f"{_get_api_base()}/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {settings.LLM_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    return url, headers
+
+
+def _error_message(r) -> str:
+    # zkus vyčíst detail z JSON erroru
+    try:
+        err = r.json().get("error", {})
+        return err.get("message") or r.text
+    except Exception:
+        return r.text
+
+
+class _TransientError(LLMError):
+    """Chyba, u které má smysl retry (timeout, síť, 429, 5xx)."""
+
+    def __init__(self, message, outcome, retry_after=None):
+        super().__init__(message)
+        self.outcome = outcome
+        self.retry_after = retry_after
+
+
+def _get_max_retries() -> int:
+    return max(0, int(getattr(settings, "LLM_MAX_RETRIES", 2)))
+
+
+def _get_hedge_after() -> float:
+    # 0 = hedging vypnutý
+    return float(getattr(settings, "LLM_HEDGE_AFTER_SECONDS", 0) or 0)
+
+
+def _raise_for_status(r) -> None:
+    if r.status_code < 400:
+        return
+    msg = f"LLM HTTP {r.status_code}: {_error_message(r)}"
+    if r.status_code in RETRYABLE_STATUS:
+        raise _TransientError(msg, outcome_for_status(r.status_code), parse_retry_after(r.headers.get("Retry-After")))
+    raise LLMError(msg)
+
+
+def _content(r) -> str:
+    try:
+        return r.json()["choices"][0]["message"]["content"]
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        raise LLMError(f"LLM returned unexpected response: {e}")
+
+
+def _breaker_guard(breaker) -> None:
+    if not breaker.allow():
+        counters.incr("short_circuited")
+        raise LLMError("LLM is temporarily unavailable (circuit breaker open), try again later")
+
+
+def _send_once(session, url, headers, payload, timeout_seconds) -> str:
+    with _stats_lock:
+        _stats["requests"] += 1
+    try:
+        r = session.post(url, headers=headers, json=payload, timeout=timeout_seconds)
+    except requests.Timeout:
+        raise _TransientError(f"LLM request timed out (timeout={timeout_seconds}s)", "timeouts")
+    except requests.ConnectionError as e:
+        raise _TransientError(f"LLM request failed: {e}", "network_errors")
+    except requests.RequestException as e:
+        raise LLMError(f"LLM request failed: {e}")
+    _raise_for_status(r)
+    return _content(r)
+
+
+_hedge_executor = None
+_hedge_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=_get_pool_size() * 2, thread_name_prefix="llm-hedge")
+    return _hedge_executor
+
+
+def _send_hedged(send, hedge_after: float) -> str:
+    """
+    Hedged request: když první pokus neodpoví do hedge_after s, pošle se druhý
+    a vyhraje ten, který doběhne dřív (ořezává chvost latence za cenu tokenů navíc).
+    """
+    pool = _get_hedge_executor()
+    first = pool.submit(send)
+    done, _ = wait([first], timeout=hedge_after)
+    if done:
+        return first.result()
+
+    counters.incr("hedged")
+    second = pool.submit(send)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except LLMError as e:
+                error = e
+                continue
+            if future is second:
+                counters.incr("hedge_wins")
+            return result
+    raise error
+
+
+@timed_llm_call
+def _post_chat(payload: dict) -> str:
+    url, headers = _request_parts()
+
     timeout_seconds = _get_timeout()
+    session = get_session()
+    breaker = get_breaker()
+    max_retries = _get_max_retries()
+    hedge_after = _get_hedge_after()
+
+    def send():
+        return _send_once(session, url, headers, payload, timeout_seconds)
 
-    # 1 retry na timeout (typicky stačí)
-    for attempt in range(2):
+    attempt = 0
+    while True:
+        _breaker_guard(breaker)
         try:
-            r = requests.post(url, headers=headers, json=payload, timeout=timeout_seconds)
+            answer = _send_hedged(send, hedge_after) if hedge_after > 0 else send()
+        except _TransientError as e:
+            breaker.record_failure()
+            counters.incr(e.outcome)
+            delay = backoff_delay(attempt, e.retry_after) if attempt < max_retries else None
+            if delay is None or breaker.state == breaker.OPEN:
+                counters.incr("failed")
+                raise LLMError(str(e))
+            # jitterovaný exponenciální backoff (nebo Retry-After od serveru)
+            counters.incr("retries")
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except LLMError:
+            # provider odpověděl (4xx / divná odpověď) => není "down", breaker nepočítá
+            breaker.record_success()
+            counters.incr("failed")
+            raise
 
-            if r.status_code >= 400:
-                # zkus vyčíst detail z JSON erroru
+        breaker.record_success()
+        counters.incr("success")
+        return answer
+
+
+def resilience_stats() -> dict:
+    """Počítadla výsledků (success, retries, timeouts, http_429, ...) + stav breakeru."""
+    out = counters.snapshot()
+    out["breaker_state"] = get_breaker().state
+    return out
+
+
+def ask_llm(prompt: str, use_cache: bool = True) -> str:
+    return llm_ask(prompt, use_cache=use_cache)
+
+
+# -------- Async varianta (ASGI views) --------
+
+# httpx.AsyncClient je vázaný na event loop => 1 klient (pool) na loop.
+# Pod ASGI serverem běží jeden loop na proces, takže pool sdílí všechny requesty.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _get_async_max_connections() -> int:
+    return max(1, int(getattr(settings, "LLM_ASYNC_MAX_CONNECTIONS", 50) or 50))
+
+
+def get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=_get_async_max_connections(),
+            max_keepalive_connections=_get_pool_size(),
+        )
+        client = httpx.AsyncClient(limits=limits)
+        _async_clients[loop] = client
+    return client
+
+
+async def allm_ask(prompt: str, use_cache: bool = True) -> str:
+    """Async obdoba llm_ask – stejná cache, stejné chyby (LLMError)."""
+    payload = _build_payload(prompt)
+    cache = get_llm_cache() if use_cache else None
+    if cache is not None:
+        key = _cache_key(payload, prompt)
+        cached = await cache.aget(key)
+        if cached is not None:
+            return cached
+
+    answer = await _apost_chat(payload)
+
+    if cache is not None:
+        await cache.aset(key, answer)
+    return answer
+
+
+async def _asend_once(client, url, headers, payload, timeout_seconds) -> str:
+    with _stats_lock:
+        _stats["async_requests"] += 1
+    try:
+        r = await client.post(url, headers=headers, json=payload, timeout=timeout_seconds)
+    except httpx.TimeoutException:
+        raise _TransientError(f"LLM request timed out (timeout={timeout_seconds}s)", "timeouts")
+    except httpx.TransportError as e:
+        raise _TransientError(f"LLM request failed: {e}", "network_errors")
+    except httpx.HTTPError as e:
+        raise LLMError(f"LLM request failed: {e}")
+    _raise_for_status(r)
+    return _content(r)
+
+
+async def _asend_hedged(send, hedge_after: float) -> str:
+    first = asyncio.ensure_future(send())
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done:
+        return first.result()
+
+    counters.incr("hedged")
+    second = asyncio.ensure_future(send())
+    pending = {first, second}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
                 try:
-                    err = r.json().get("error", {})
-                    msg = err.get("message") or r.text
-                except Exception:
-                    msg = r.text
-                raise LLMError(f"LLM HTTP {r.status_code}: {msg}")
-
-            data = r.json()
-            return data["choices"][0]["message"]["content"]
-
-        except requests.Timeout:
-            if attempt == 0:
-                # krátká pauza a retry
-                time.sleep(0.4)
-                continue
-            raise LLMError(f"LLM request timed out (timeout={timeout_seconds}s)")
+                    result = task.result()
+                except LLMError as e:
+                    error = e
+                    continue
+                if task is second:
+                    counters.incr("hedge_wins")
+                return result
+        raise error
+    finally:
+        # pomalejší request už nepotřebujeme
+        for task in pending:
+            task.cancel()
+
+
+@timed_llm_call
+async def _apost_chat(payload: dict) -> str:
+    url, headers = _request_parts()
+    timeout_seconds = _get_timeout()
+    client = get_async_client()
+    breaker = get_breaker()
+    max_retries = _get_max_retries()
+    hedge_after = _get_hedge_after()
 
-        except requests.RequestException as e:
-            raise LLMError(f"LLM request failed: {e}")
+    def send():
+        return _asend_once(client, url, headers, payload, timeout_seconds)
 
-    raise LLMError("LLM request failed")
+    # stejná logika jako sync verze (backoff, Retry-After, breaker)
+    attempt = 0
+    while True:
+        _breaker_guard(breaker)
+        try:
+            answer = await (_asend_hedged(send, hedge_after) if hedge_after > 0 else send())
+        except _TransientError as e:
+            breaker.record_failure()
+            counters.incr(e.outcome)
+            delay = backoff_delay(attempt, e.retry_after) if attempt < max_retries else None
+            if delay is None or breaker.state == breaker.OPEN:
+                counters.incr("failed")
+                raise LLMError(str(e))
+            counters.incr("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except LLMError:
+            breaker.record_success()
+            counters.incr("failed")
+            raise
+
+        breaker.record_success()
+        counters.incr("success")
+        return answer
+
+
+async def aask_llm(prompt: str, use_cache: bool = True) -> str:
+    return await allm_ask(prompt, use_cache=use_cache)
+
+
+async def astream_llm(prompt: str, use_cache: bool = True):
+    """
+    Streamovaná odpověď (chat completions se "stream": true).
+    Yielduje kousky textu hned jak dorazí; celý text na konci uloží do cache.
+    """
+    payload = _build_payload(prompt)
+    cache = get_llm_cache() if use_cache else None
+    if cache is not None:
+        key = _cache_key(payload, prompt)
+        cached = await cache.aget(key)
+        if cached is not None:
+            yield cached
+            return
+
+    count_llm_call()
+    url, headers = _request_parts()
+    timeout_seconds = _get_timeout()
+    client = get_async_client()
+    breaker = get_breaker()
+    parts = []
+
+    # stream se neopakuje (text už odešel klientovi), jen breaker + počítadla
+    _breaker_guard(breaker)
+    try:
+        with _stats_lock:
+            _stats["async_requests"] += 1
+        async with client.stream(
+            "POST", url, headers=headers, json={**payload, "stream": True}, timeout=timeout_seconds
+        ) as r:
+            if r.status_code >= 400:
+                await r.aread()
+                _raise_for_status(r)
+
+            # server-sent events: "data: {...}" řádky, konec = "data: [DONE]"
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                except (ValueError, KeyError, IndexError):
+                    continue
+                if delta:
+                    parts.append(delta)
+                    yield delta
 
+    except _TransientError as e:
+        breaker.record_failure()
+        counters.incr(e.outcome)
+        counters.incr("failed")
+        raise LLMError(str(e))
+    except httpx.TimeoutException:
+        breaker.record_failure()
+        counters.incr("timeouts")
+        counters.incr("failed")
+        raise LLMError(f"LLM request timed out (timeout={timeout_seconds}s)")
+    except httpx.HTTPError as e:
+        breaker.record_failure()
+        counters.incr("network_errors")
+        counters.incr("failed")
+        raise LLMError(f"LLM request failed: {e}")
+    except LLMError:
+        breaker.record_success()
+        counters.incr("failed")
+        raise
 
+    breaker.record_success()
+    counters.incr("success")
 
-def ask_llm(prompt: str) -> str:
-    return llm_ask(prompt)  
\ No newline at end of file
+    if cache is not None and parts:
+        await cache.aset(key, "".join(parts))
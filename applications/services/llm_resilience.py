@@ -0,0 +1,152 @@
+"""
+Odolnost LLM klienta: exponenciální backoff s jitterem (respektuje Retry-After),
+circuit breaker a počítadla výsledků. Sdílí sync i async klient.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from django.conf import settings
+
+
+# HTTP kódy, u kterých má smysl to zkusit znovu
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+def outcome_for_status(status: int) -> str:
+    if status == 429:
+        return "http_429"
+    if status >= 500:
+        return "http_5xx"
+    return "http_4xx"
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Retry-After: sekundy nebo HTTP datum. Nevalidní hodnota => None."""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+    """
+    Pauza před dalším pokusem (attempt = 0 pro první retry).
+    Full jitter: náhodně 0..min(max, base * 2^attempt).
+    Retry-After od serveru má přednost; když je delší než LLM_BACKOFF_MAX_SECONDS, vrací None (nečekat, vzdát to).
+    """
+    base = float(getattr(settings, "LLM_BACKOFF_BASE_SECONDS", 0.4))
+    cap = float(getattr(settings, "LLM_BACKOFF_MAX_SECONDS", 8.0))
+    if retry_after is not None:
+        return retry_after if retry_after <= cap else None
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    closed -> (threshold chyb za sebou) -> open -> (po cooldown) -> half_open
+    V half_open projde jen jeden zkušební request: úspěch = closed, chyba = znovu open.
+    Zkušební request, který se nenahlásí do cooldown (např. přerušený stream), se zahodí.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=5, cooldown_seconds=30.0):
+        self.threshold = max(1, int(threshold))
+        self.cooldown_seconds = float(cooldown_seconds)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN:
+                now = time.monotonic()
+                if not self._probe_in_flight or now - self._probe_started >= self.cooldown_seconds:
+                    self._probe_in_flight = True
+                    self._probe_started = now
+                    return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class OutcomeCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def incr(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+counters = OutcomeCounters()
+
+
+def get_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    threshold=getattr(settings, "LLM_BREAKER_THRESHOLD", 5),
+                    cooldown_seconds=getattr(settings, "LLM_BREAKER_COOLDOWN_SECONDS", 30),
+                )
+    return _breaker
+
+
+def reset_breaker() -> None:
+    global _breaker
+    with _breaker_lock:
+        _breaker = None
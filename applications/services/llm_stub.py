@@ -0,0 +1,295 @@
+"""
+Lokální OpenAI-kompatibilní stand-in (POST /v1/chat/completions) pro benchmarky a load testy.
+
+Odpovědi jsou šablonované podle typu promptu (seed JSON, beautify Mermaid = beze změny,
+analýza/Q&A), latence a chyby (timeout, 429, 5xx, useknutý JSON) se dají nastavit přes StubConfig.
+"""
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 300.0
+    latency_dist: str = "fixed"  # fixed | uniform | normal | lognormal | exponential
+    jitter_ms: float = 100.0
+    token_delay_ms: float = 20.0  # pauza mezi chunky při stream=true
+    timeout_rate: float = 0.0
+    hang_seconds: float = 120.0  # jak dlouho "visí" request simulující timeout
+    rate_429: float = 0.0
+    retry_after: int = 1
+    rate_5xx: float = 0.0
+    truncate_rate: float = 0.0  # useknutý JSON u seed promptů
+    seed: Optional[int] = None
+
+
+DOMAINS = ["Payments", "Sales", "Risk", "CRM", "Data", "Compliance", "Security", "CoreBanking"]
+APP_WORDS = ["Hub", "Gateway", "Engine", "Portal", "Ledger", "Monitor", "Service", "Vault", "Desk", "Bridge"]
+
+
+class StubState:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "ok": 0, "streamed": 0, "timeouts": 0, "http_429": 0, "http_5xx": 0, "truncated": 0}
+        self.name_seq = 0
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def roll(self, rate) -> bool:
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.rng.random() < rate
+
+    def latency(self) -> float:
+        c = self.config
+        mean = c.latency_ms
+        with self.lock:
+            if c.latency_dist == "uniform":
+                ms = self.rng.uniform(max(0.0, mean - c.jitter_ms), mean + c.jitter_ms)
+            elif c.latency_dist == "normal":
+                ms = self.rng.gauss(mean, c.jitter_ms)
+            elif c.latency_dist == "lognormal":
+                # dlouhý chvost jako u reálného API; jitter ~ směrodatná odchylka v log prostoru
+                sigma = max(0.01, c.jitter_ms / max(1.0, mean))
+                ms = self.rng.lognormvariate(0, sigma) * mean
+            elif c.latency_dist == "exponential":
+                ms = self.rng.expovariate(1.0 / max(1.0, mean))
+            else:
+                ms = mean
+        return max(0.0, ms) / 1000.0
+
+    def next_names(self, n):
+        with self.lock:
+            start = self.name_seq
+            self.name_seq += n
+        return [
+            f"{DOMAINS[i % len(DOMAINS)]} {APP_WORDS[(i // len(DOMAINS)) % len(APP_WORDS)]} {i}"
+            for i in range(start, start + n)
+        ]
+
+
+# -------- šablonované odpovědi --------
+
+def _json_after(prompt, marker):
+    idx = prompt.find(marker)
+    if idx == -1:
+        return None
+    text = prompt[idx + len(marker):].strip()
+    try:
+        return json.JSONDecoder().raw_decode(text)[0]
+    except ValueError:
+        return None
+
+
+def _requested_count(prompt, default=5):
+    m = re.search(r"PŘESNĚ\s+(\d+)", prompt)
+    return int(m.group(1)) if m else default
+
+
+def _apps_json(state, prompt):
+    rng = state.rng
+    apps = []
+    for name in state.next_names(_requested_count(prompt)):
+        with state.lock:
+            apps.append({
+                "name": name,
+                "domain": name.split(" ")[0],
+                "criticality": rng.choice(["Low", "Medium", "High"]),
+                "lifecycle": rng.choice(["Active", "Legacy", "Decommissioning"]),
+                "environment": rng.choice(["DEV", "UAT", "PROD"]),
+                "region": rng.choice(["EU", "CZ", "DACH", "Global"]),
+                "hosting": rng.choice(["on-prem", "cloud", "hybrid"]),
+                "tech_stack": rng.choice(["Java, Spring", ".NET, MSSQL", "Python, Kafka", "Go, gRPC"]),
+                "runtime": rng.choice(["Java", ".NET", "Python", "Node.js", "Go"]),
+                "vendor": rng.choice(["Internal", "Oracle", "Microsoft", "SAP", "IBM", "Temenos"]),
+                "data_sensitivity": rng.choice(["Low", "Medium", "High"]),
+                "tech_debt_score": rng.randint(0, 100),
+            })
+    return json.dumps({"applications": apps}, ensure_ascii=False)
+
+
+def _app_names(prompt):
+    names = _json_after(prompt, "SEZNAM APLIKACÍ:")
+    if names:
+        return names
+    # kompaktní prompt: hlavička "SEZNAM APLIKACÍ (...):" a pak jeden název na řádek
+    m = re.search(r"SEZNAM APLIKACÍ[^\n]*\n(.*?)(?:\n\n|$)", prompt, re.S)
+    return [x.strip() for x in m.group(1).split("\n") if x.strip()] if m else []
+
+
+def _integrations_json(state, prompt):
+    names = _app_names(prompt)
+    out = []
+    if len(names) >= 2:
+        for _ in range(_requested_count(prompt)):
+            with state.lock:
+                src, tgt = state.rng.sample(names, 2)
+                out.append({
+                    "source_app_name": src,
+                    "target_app_name": tgt,
+                    "integration_type": state.rng.choice(["API", "file", "message"]),
+                    "direction": state.rng.choice(["sync", "async"]),
+                    "daily_volume": state.rng.randint(1000, 300000),
+                })
+    return json.dumps({"integrations": out}, ensure_ascii=False)
+
+
+def _beautify(prompt):
+    # stub diagram nemění (výstup pak projde lokální kontrolou)
+    return prompt.split("KÓD:", 1)[-1].strip()
+
+
+def _repair(prompt):
+    text = prompt.split("TEXT:", 1)[-1].strip()
+    try:
+        return json.dumps(json.loads(text), ensure_ascii=False)
+    except ValueError:
+        return '{"applications": [], "integrations": []}'
+
+
+def _prose(prompt):
+    # JSON kontext ("id": 1, "name": ...) i kompaktní tabulka (1|name|...)
+    ids = re.findall(r'"id":\s*(\d+),\s*"name":\s*"([^"]*)"', prompt)
+    ids = (ids or re.findall(r"^(\d+)\|([^|\n]+)\|", prompt, re.M))[:5]
+    lines = ["1) Shrnutí: portfolio je stabilní, ale část aplikací nese vyšší technický dluh."]
+    for app_id, name in ids:
+        lines.append(f"- Application ID: {app_id} – {name}: kandidát na modernizaci (stub).")
+    if not ids:
+        lines.append("- Žádná data k vyhodnocení (stub).")
+    return "\n".join(lines)
+
+
+def build_reply(state, prompt):
+    """Vrátí (text, je_to_seed_json)."""
+    if "Zkrášli následující Mermaid" in prompt:
+        return _beautify(prompt), False
+    if "Oprav následující text" in prompt:
+        return _repair(prompt), True
+    if "mock dataset bankovních aplikací" in prompt:
+        return _apps_json(state, prompt), True
+    if "Vygeneruj integrace" in prompt:
+        return _integrations_json(state, prompt), True
+    return _prose(prompt), False
+
+
+# -------- HTTP server --------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # hlavičky a tělo jdou zvlášť => bez TCP_NODELAY by keep-alive čekal na delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    state: StubState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, obj, extra_headers=None):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (extra_headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            with self.state.lock:
+                self._send_json(200, dict(self.state.counters))
+            return
+        self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        state = self.state
+        cfg = state.config
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON"}})
+            return
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        state.count("requests")
+        time.sleep(state.latency())
+
+        if state.roll(cfg.timeout_rate):
+            state.count("timeouts")
+            time.sleep(cfg.hang_seconds)
+            self.close_connection = True
+            return
+        if state.roll(cfg.rate_429):
+            state.count("http_429")
+            self._send_json(429, {"error": {"message": "Rate limit reached (stub)"}},
+                            {"Retry-After": str(cfg.retry_after)})
+            return
+        if state.roll(cfg.rate_5xx):
+            state.count("http_5xx")
+            with state.lock:
+                status = state.rng.choice([500, 502, 503])
+            self._send_json(status, {"error": {"message": f"Upstream error {status} (stub)"}})
+            return
+
+        messages = payload.get("messages") or [{}]
+        prompt = messages[-1].get("content") or ""
+        text, is_json = build_reply(state, prompt)
+
+        if is_json and state.roll(cfg.truncate_rate):
+            state.count("truncated")
+            text = text[: max(1, len(text) // 2)]
+
+        if payload.get("stream"):
+            self._stream(text)
+            return
+
+        state.count("ok")
+        self._send_json(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        })
+
+    def _stream(self, text):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        delay = self.state.config.token_delay_ms / 1000.0
+        for chunk in re.findall(r"\S+\s*|\s+", text):
+            event = {"choices": [{"index": 0, "delta": {"content": chunk}}]}
+            self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if delay:
+                time.sleep(delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.state.count("streamed")
+
+
+def make_server(host="127.0.0.1", port=8765, config=None) -> ThreadingHTTPServer:
+    """Vytvoří (nespuštěný) server; serve_forever() si volá volající (příkaz / vlákno v benchmarku)."""
+    state = StubState(config or StubConfig())
+    handler = type("StubHandler", (_Handler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
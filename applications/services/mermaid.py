@@ -1,153 +1,275 @@
-import json
 import logging
-from django.shortcuts import render, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import render
 from django.core.cache import cache
+from django.urls import reverse
 from ..models import Application
-from .llm_client import ask_llm, LLMError
+from .llm_client import ask_llm, aask_llm, LLMError
+from .jobs import jobs_enabled, aenqueue_mermaid
+from .versions import GRAPH, get_version, aget_version
+from .mermaid_check import check, parse, validate
 
 logger = logging.getLogger(__name__)
-def application_mermaid(request, pk):
-    """
-    Původní (ne-LLM) Mermaid generování – nechávám pro fallback/debug.
-    """
-    app = get_object_or_404(Application, pk=pk)
 
-    outbound = app.outbound_integrations.select_related("target_app").all()
-    inbound = app.inbound_integrations.select_related("source_app").all()
+# diagram je daný jen řádky v DB => cache platí, dokud se nezmění verze grafu (signály)
+MERMAID_CACHE_SECONDS = 3600
+
+
+# -------- deterministický diagram (výchozí cesta, bez LLM) --------
+
+def _label(text) -> str:
+    # uvozovky by ukončily ["..."], | popisek hrany |"..."| – Mermaid entity
+    return str(text or "").replace('"', "#quot;").replace("|", "#124;").replace("\n", " ").strip()
+
+
+def build_mermaid(app, inbound, outbound) -> str:
+    """Integrační okolí aplikace jako flowchart LR (stejný vstup => stejný výstup)."""
+
+    def node_id(a):
+        return f"app_{a.id}"
 
     lines = [
         "flowchart LR",
         "  classDef app fill:#f3f0ff,stroke:#7c3aed,stroke-width:2px;",
+        "  classDef main fill:#7c3aed,color:#ffffff,stroke:#5b21b6,stroke-width:2px;",
     ]
+    declared = set()
 
-    def node_id(a):
-        return f"app_{a.id}"
+    def node(a, css="app"):
+        if a.id in declared:
+            return
+        declared.add(a.id)
+        lines.append(f'  {node_id(a)}["{_label(a.name)}"]')
+        lines.append(f"  class {node_id(a)} {css}")
 
     # hlavní uzel
-    lines.append(f'  {node_id(app)}["{app.name}"]')
-    lines.append(f"  class {node_id(app)} app")
+    node(app, "main")
 
     # inbound
     for i in inbound:
-        src = i.source_app
-        lines.append(f'  {node_id(src)}["{src.name}"]')
-        lines.append(f"  class {node_id(src)} app")
-        lines.append(f'  {node_id(src)} -->|"{i.integration_type}"| {node_id(app)}')
+        node(i.source_app)
+        lines.append(f'  {node_id(i.source_app)} -->|"{_label(i.integration_type)}"| {node_id(app)}')
 
     # outbound
     for i in outbound:
-        tgt = i.target_app
-        lines.append(f'  {node_id(tgt)}["{tgt.name}"]')
-        lines.append(f"  class {node_id(tgt)} app")
-        lines.append(f'  {node_id(app)} -->|"{i.integration_type}"| {node_id(tgt)}')
-
-    mermaid = "\n".join(lines)
-    return render(request, "applications/mermaid.html", {"app": app, "mermaid": mermaid})
-
-
-# -------- Mermaid přes LLM: generate -> check -> 1x fix --------
-
-def _build_mermaid_prompt(app, inbound, outbound):
-    ctx = {
-        "app": {"id": app.id, "name": app.name},
-        "inbound": [
-            {
-                "source_app": {"id": i.source_app.id, "name": i.source_app.name},
-                "integration_type": i.integration_type,
-            }
-            for i in inbound
-        ],
-        "outbound": [
-            {
-                "target_app": {"id": i.target_app.id, "name": i.target_app.name},
-                "integration_type": i.integration_type,
-            }
-            for i in outbound
-        ],
-        "rules": {
-            "direction": "flowchart LR",
-            "node_id_format": "app_<id>",
-            "edges": {
-                "inbound": "source -->|integration_type| main",
-                "outbound": "main -->|integration_type| target",
-            },
-        },
-    }
+        node(i.target_app)
+        lines.append(f'  {node_id(app)} -->|"{_label(i.integration_type)}"| {node_id(i.target_app)}')
+
+    return "\n".join(lines)
+
+
+def _volume(v: int) -> str:
+    if v >= 1_000_000:
+        return f"{v / 1_000_000:.1f}M"
+    if v >= 1_000:
+        return f"{v / 1_000:.0f}k"
+    return str(v)
+
+
+def build_neighbourhood_mermaid(graph, depth, edges, cluster=True) -> str:
+    """
+    N-hop okolí z GraphIndex (graph.neighbourhood): uzly volitelně v subgraph podle domény,
+    sync hrany plné, async tečkované; kořeny (hloubka 0) zvýrazněné.
+    """
+    lines = [
+        "flowchart LR",
+        "  classDef app fill:#f3f0ff,stroke:#7c3aed,stroke-width:2px;",
+        "  classDef main fill:#7c3aed,color:#ffffff,stroke:#5b21b6,stroke-width:2px;",
+    ]
+
+    def decl(i, indent="  "):
+        lines.append(f'{indent}app_{graph.app_ids[i]}["{_label(graph.names[i])}"]')
+
+    if cluster:
+        by_domain = {}
+        for i in sorted(depth, key=lambda i: (graph.domains[i], graph.names[i])):
+            by_domain.setdefault(graph.domains[i], []).append(i)
+        for n, (domain, nodes) in enumerate(by_domain.items()):
+            lines.append(f'  subgraph dom_{n}["{_label(domain)}"]')
+            for i in nodes:
+                decl(i, "    ")
+            lines.append("  end")
+    else:
+        for i in sorted(depth, key=lambda i: graph.names[i]):
+            decl(i)
+
+    for e in edges:
+        arrow = "-->" if graph.is_sync[e] else "-.->"
+        label = _label(f"{graph.edge_type(e)} {_volume(graph.volume[e])}".strip())
+        lines.append(f'  app_{graph.app_ids[graph.src[e]]} {arrow}|"{label}"| app_{graph.app_ids[graph.dst[e]]}')
+
+    for i, d in depth.items():
+        lines.append(f"  class app_{graph.app_ids[i]} {'main' if d == 0 else 'app'}")
+    return "\n".join(lines)
+
+
+def build_domain_mermaid(flows, sizes) -> str:
+    """Mapa doména -> doména: uzel = doména (počet aplikací), hrana = počet integrací a objem."""
+    domains = sorted(set(sizes) | {d for pair in flows for d in pair})
+    ids = {d: f"dom_{n}" for n, d in enumerate(domains)}
+    lines = [
+        "flowchart LR",
+        "  classDef domain fill:#f3f0ff,stroke:#7c3aed,stroke-width:2px;",
+    ]
+    for d in domains:
+        lines.append(f'  {ids[d]}["{_label(d)} ({sizes.get(d, 0)})"]')
+        lines.append(f"  class {ids[d]} domain")
+    for (src, dst), (count, volume) in sorted(flows.items(), key=lambda kv: -kv[1][1]):
+        lines.append(f'  {ids[src]} -->|"{count}x {_volume(volume)}"| {ids[dst]}')
+    return "\n".join(lines)
 
-    return (
-        "Vygeneruj Mermaid diagram pro integrační okolí bankovní aplikace.\n"
-        "VÝSTUP MUSÍ BÝT POUZE Mermaid kód (bez Markdown fence ```).\n\n"
-        "POŽADAVKY:\n"
-        "- Začni přesně řádkem: flowchart LR\n"
-        "- Node id používej: app_<id>\n"
-        "- Popisky uzlů dej jako [\"Název aplikace\"]\n"
-        "- Inbound hrany: app_source -->|\"integration_type\"| app_main\n"
-        "- Outbound hrany: app_main -->|\"integration_type\"| app_target\n\n"
-        "DATA:\n"
-        f"{json.dumps(ctx, ensure_ascii=False)}"
-    )
 
+def _cache_key(kind: str, app_id: int) -> str:
+    return f"mermaid:{kind}:{app_id}:v{get_version(GRAPH)}"
 
-def _build_mermaid_check_prompt(mermaid_code):
+
+async def _acache_key(kind: str, app_id: int) -> str:
+    return f"mermaid:{kind}:{app_id}:v{await aget_version(GRAPH)}"
+
+
+def get_app_mermaid(app_id: int):
+    """
+    {"app": {"id", "name"}, "mermaid": "..."} nebo None (aplikace neexistuje).
+    Cache hit = 0 dotazů do DB, 0 LLM callů.
+    """
+    key = _cache_key("base", app_id)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    app = Application.objects.filter(pk=app_id).only("id", "name").first()
+    if app is None:
+        return None
+    inbound = app.inbound_integrations.select_related("source_app").order_by("id")
+    outbound = app.outbound_integrations.select_related("target_app").order_by("id")
+
+    mermaid = build_mermaid(app, inbound, outbound)
+    errors = validate(mermaid)
+    if errors:
+        logger.warning("Generated Mermaid for app %s is invalid: %s", app_id, "; ".join(map(str, errors[:3])))
+
+    data = {"app": {"id": app.id, "name": app.name}, "mermaid": mermaid}
+    cache.set(key, data, timeout=MERMAID_CACHE_SECONDS)
+    return data
+
+
+def application_mermaid(request, pk):
+    """Mermaid diagram integračního okolí – deterministicky z DB, cache podle verze grafu."""
+    data = get_app_mermaid(pk)
+    if data is None:
+        raise Http404("Application not found")
+    return render(request, "applications/mermaid.html", {**data, "can_beautify": True})
+
+
+# -------- volitelné LLM "zkrášlení" (1 call, kontrola lokálně) --------
+
+def _build_mermaid_beautify_prompt(mermaid_code):
     return (
-        "Zkontroluj následující Mermaid kód.\n"
-        "Pokud je validní a dává smysl jako flowchart, vrať přesně: OK\n"
-        "Pokud není validní, vrať opravený Mermaid kód (pouze kód, bez ```).\n\n"
+        "Zkrášli následující Mermaid diagram integračního okolí bankovní aplikace.\n"
+        "VÝSTUP MUSÍ BÝT POUZE Mermaid kód (bez Markdown fence ```).\n\n"
+        "PRAVIDLA:\n"
+        "- Zachovej všechny uzly, hrany, id (app_<id>) i popisky\n"
+        "- Můžeš upravit rozložení, styly (classDef) a seskupit uzly do subgraph\n"
+        "- Začni řádkem flowchart LR nebo flowchart TB\n\n"
         "KÓD:\n"
         f"{mermaid_code}"
     )
 
 
-def application_mermaid_llm(request, pk):
-    app = get_object_or_404(Application, pk=pk)
+VERIFY_FAILED = "LLM úpravu se nepodařilo ověřit, zobrazuji základní diagram."
+
 
-    outbound = app.outbound_integrations.select_related("target_app").all()
-    inbound = app.inbound_integrations.select_related("source_app").all()
+def _accept_beautified(base: str, beautified: str):
+    """
+    Lokální kontrola výstupu LLM (bez dalšího LLM callu): po případné opravě musí být validní
+    a mít stejné hrany jako základní diagram. Jinak (základní diagram, chyba).
+    """
+    code, diagram, fixes = check(beautified)
+    if not diagram.ok:
+        logger.info("Beautified Mermaid rejected: %s", "; ".join(str(e) for e in diagram.errors[:3]))
+        return base, VERIFY_FAILED
+    if diagram.edge_set() != parse(base).edge_set():
+        logger.info("Beautified Mermaid rejected: edges differ from the source diagram")
+        return base, VERIFY_FAILED
+    if fixes:
+        logger.info("Beautified Mermaid repaired: %s", "; ".join(fixes))
+    return code, None
+
+
+def beautify_mermaid(app_id: int):
+    """Sync varianta (worker): vrací (data, chyba nebo None); data jako get_app_mermaid."""
+    data = get_app_mermaid(app_id)
+    if data is None:
+        return None, None
+    key = _cache_key("llm", app_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return {**data, "mermaid": cached}, None
+
+    beautified = ask_llm(_build_mermaid_beautify_prompt(data["mermaid"])).strip()
+    mermaid, error = _accept_beautified(data["mermaid"], beautified)
+    if error is None:
+        cache.set(key, mermaid, timeout=MERMAID_CACHE_SECONDS)
+    return {**data, "mermaid": mermaid}, error
+
+
+async def abeautify_mermaid(app_id: int):
+    data = await sync_to_async(get_app_mermaid)(app_id)
+    if data is None:
+        return None, None
+    key = await _acache_key("llm", app_id)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return {**data, "mermaid": cached}, None
+
+    # 1 LLM call (zkrášlení), kontrola a oprava lokálně (mermaid_check)
+    beautified = (await aask_llm(_build_mermaid_beautify_prompt(data["mermaid"]))).strip()
+    mermaid, error = _accept_beautified(data["mermaid"], beautified)
+    if error is None:
+        await cache.aset(key, mermaid, timeout=MERMAID_CACHE_SECONDS)
+    return {**data, "mermaid": mermaid}, error
+
+
+async def application_mermaid_llm(request, pk):
+    data = await sync_to_async(get_app_mermaid)(pk)
+    if data is None:
+        raise Http404("Application not found")
+
+    if jobs_enabled():
+        # LLM_JOBS_ENABLED: zkrášlení dělá worker, stránka si výsledek dotáhne (poll stavu úlohy)
+        job = await aenqueue_mermaid(pk)
+        return render(request, "applications/mermaid.html", {
+            **data,
+            "job_url": reverse("job_status", args=[job.pk]),
+        })
 
     try:
+        # už zkrášlený diagram pro aktuální verzi grafu => bez LLM i bez rate limitu
+        cached = await cache.aget(await _acache_key("llm", pk))
+        if cached is not None:
+            return render(request, "applications/mermaid.html", {**data, "mermaid": cached})
+
         # rate limit: 1 request / 10s / IP
         cache_key = f"mermaid_llm:{request.META.get('REMOTE_ADDR')}"
-        if cache.get(cache_key):
+        if await cache.aget(cache_key):
             return render(request, "applications/mermaid.html", {
-                "app": app,
-                "mermaid": "",
+                **data,
                 "error": "Zkus to prosím za chvíli (rate limit).",
             })
-        cache.set(cache_key, True, timeout=10)
-
-        # 1) generace
-        prompt = _build_mermaid_prompt(app, inbound, outbound)
-        mermaid = ask_llm(prompt).strip()
+        await cache.aset(cache_key, True, timeout=10)
 
-        # 2) check (a případně 1x oprava)
-        check_prompt = _build_mermaid_check_prompt(mermaid)
-        check_result = ask_llm(check_prompt).strip()
-
-        if check_result != "OK":
-            # check_result je opravený mermaid kód (1 pokus o opravu)
-            mermaid = check_result.strip()
-
-            # ještě jednou ověřit (už bez další opravy)
-            verify = ask_llm(_build_mermaid_check_prompt(mermaid)).strip()
-            if verify != "OK":
-                return render(request, "applications/mermaid.html", {
-                    "app": app,
-                    "mermaid": mermaid,
-                    "error": "Mermaid se nepodařilo ověřit ani po jedné opravě. Zkus kliknout znovu.",
-                })
-
-        return render(request, "applications/mermaid.html", {"app": app, "mermaid": mermaid})
+        beautified, error = await abeautify_mermaid(pk)
+        return render(request, "applications/mermaid.html", {**beautified, "error": error})
 
     except LLMError as e:
         return render(request, "applications/mermaid.html", {
-            "app": app,
-            "mermaid": "",
+            **data,
             "error": f"LLM chyba: {str(e)}",
         })
     except Exception:
         logger.exception("Unexpected error in application_mermaid_llm")
         return render(request, "applications/mermaid.html", {
-            "app": app,
-            "mermaid": "",
+            **data,
             "error": "Nastala neočekávaná chyba.",
-        })
\ No newline at end of file
+        })
@@ -0,0 +1,346 @@
+"""
+Lokální parser/validátor Mermaid flowchartu (podmnožina, kterou generujeme) – místo LLM checku.
+
+Podporuje:
+- hlavička flowchart|graph LR/RL/TB/TD/BT (první řádek mimo komentáře %%)
+- uzly id["popisek"] (i bez uvozovek, pokud popisek nemá speciální znaky)
+- hrany a --> b, a -->|"popisek"| b, a -- popisek --> b (šipky -->, ---, -.->, ==>, text i s -. .-> a == ==>),
+  řetězy a --> b --> c a skupiny a & b --> c & d (konce hrany mohou být i deklarace uzlu)
+- classDef, class, style, linkStyle, subgraph ... end, direction uvnitř subgraph
+
+Nepodporuje ostatní tvary uzlů (id(..), id{..}, ...), délky šipek (--->), obousměrné a
+kroužkové šipky (<-->, --o, --x) ani click / interakce – takový řádek je chyba "syntax"/"edge".
+
+parse() vrací strukturu + chyby s čísly řádků, repair() opraví běžné chyby
+(code fence, chybějící hlavička, neescapované uvozovky, popisky bez uvozovek).
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+DIRECTIONS = {"LR", "RL", "TB", "TD", "BT"}
+
+_ID = r"[A-Za-z_][\w-]*"
+_HEADER_RE = re.compile(r"^(flowchart|graph)\s+(\w+)\s*;?$")
+_FENCE_RE = re.compile(r"^```")
+_NODE_RE = re.compile(rf"^({_ID})\s*\[(.*)\]$")
+_ARROWS = ("-.->", "-->", "---", "==>", ".->")
+# začátek textového popisku hrany: a -- text --> b, a -. text .-> b, a == text ==> b
+_TEXT_LABEL_STARTS = (" -- ", " -. ", " == ")
+# popisek v uvozovkách může obsahovat | ("File|Batch"), bez uvozovek končí prvním |
+_EDGE_LABEL_RE = re.compile(r'^\|("[^"]*"|[^|]*)\|\s*')
+_CLASSDEF_RE = re.compile(rf"^classDef\s+({_ID})\s+(.+?);?$")
+_CLASS_RE = re.compile(rf"^class\s+({_ID}(?:\s*,\s*{_ID})*)\s+({_ID})\s*;?$")
+_STYLE_RE = re.compile(rf"^style\s+({_ID})\s+(.+?);?$")
+_LINKSTYLE_RE = re.compile(r"^linkStyle\s+(default|\d+(?:\s*,\s*\d+)*)\s+(.+?);?$")
+_SUBGRAPH_RE = re.compile(rf"^subgraph\s+(?:({_ID})\s*\[(.*)\]|(.+))$")
+_DIRECTION_RE = re.compile(r"^direction\s+(\w+)$")
+# popisek bez uvozovek: žádné znaky, které Mermaid bere jako syntaxi
+_PLAIN_LABEL_RE = re.compile(r'^[^"\[\](){}|<>]*$')
+
+
+@dataclass
+class MermaidError:
+    line: int  # 1-based, 0 = celý diagram
+    code: str  # header | fence | node | label | edge | class | subgraph | syntax | empty
+    message: str
+
+    def __str__(self):
+        return f"řádek {self.line}: {self.message}" if self.line else self.message
+
+
+@dataclass
+class MermaidDiagram:
+    direction: Optional[str] = None
+    nodes: Dict[str, str] = field(default_factory=dict)  # id -> popisek
+    edges: List[Tuple[str, str, str]] = field(default_factory=list)  # (zdroj, cíl, popisek)
+    class_defs: Dict[str, str] = field(default_factory=dict)
+    classes: Dict[str, str] = field(default_factory=dict)  # id uzlu -> třída
+    subgraphs: List[str] = field(default_factory=list)
+    errors: List[MermaidError] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def edge_set(self) -> Set[Tuple[str, str]]:
+        return {(s, t) for s, t, _ in self.edges}
+
+
+def _strip_label(raw: str, lineno: int, errors: List[MermaidError], what: str) -> Optional[str]:
+    """Obsah [...] nebo |...| – buď "v uvozovkách" (bez dalších "), nebo prostý text."""
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == '"' and raw[-1] == '"':
+        inner = raw[1:-1]
+        if '"' in inner:
+            errors.append(MermaidError(lineno, "label", f"neescapované uvozovky v popisku {what} (použij #quot;)"))
+            return None
+        return inner
+    if '"' in raw or not _PLAIN_LABEL_RE.match(raw):
+        errors.append(MermaidError(lineno, "label", f"popisek {what} se speciálními znaky musí být v uvozovkách"))
+        return None
+    return raw
+
+
+def _parse_endpoint(text: str, lineno: int, d: MermaidDiagram) -> Optional[str]:
+    text = text.strip()
+    if re.fullmatch(_ID, text):
+        return text
+    m = _NODE_RE.match(text)
+    if m:
+        label = _strip_label(m.group(2), lineno, d.errors, f"uzlu {m.group(1)}")
+        if label is not None:
+            d.nodes.setdefault(m.group(1), label)
+        return m.group(1)
+    d.errors.append(MermaidError(lineno, "edge", f"neplatný konec hrany: {text!r}"))
+    return None
+
+
+def _find_outside_quotes(text: str, tokens) -> Optional[Tuple[int, str]]:
+    """První výskyt některého z tokens mimo "..." a [...] => (pozice, token) nebo None."""
+    hits = [(i, t) for t in tokens for i in (text.find(t),) if i != -1]
+    if not hits:
+        return None
+    i, token = min(hits)
+    if '"' not in text[:i] and "[" not in text[:i]:
+        # běžný případ: před tokenem žádný popisek uzlu
+        return i, token
+
+    in_quotes, depth = False, 0
+    for i, ch in enumerate(text):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif in_quotes:
+            continue
+        elif ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth = max(0, depth - 1)
+        elif not depth:
+            for token in tokens:
+                if text.startswith(token, i):
+                    return i, token
+    return None
+
+
+def _split_arrow(line: str):
+    """První šipka mimo uvozovky => (levá strana, zbytek) nebo None."""
+    hit = _find_outside_quotes(line, _ARROWS)
+    if hit is None:
+        return None
+    i, arrow = hit
+    return line[:i].strip(), line[i + len(arrow):].strip()
+
+
+def _split_text_label(text: str):
+    """'a -- popisek' => ('a', 'popisek'), bez textového popisku (text, None)."""
+    hit = _find_outside_quotes(text, _TEXT_LABEL_STARTS)
+    if hit is None:
+        return text, None
+    i, start = hit
+    return text[:i].strip(), text[i + len(start):].strip()
+
+
+def _parse_endpoints(text: str, lineno: int, d: MermaidDiagram) -> List[str]:
+    """Konec hrany, případně skupina a & b (neplatné části se vynechají, chyba je v d.errors)."""
+    ids, errors = [], len(d.errors)
+    rest = text.strip()
+    while rest:
+        hit = _find_outside_quotes(rest, ("&",))
+        part, rest = (rest, "") if hit is None else (rest[:hit[0]], rest[hit[0] + 1:])
+        node_id = _parse_endpoint(part, lineno, d)
+        if node_id:
+            ids.append(node_id)
+    if not ids and len(d.errors) == errors:
+        d.errors.append(MermaidError(lineno, "edge", "hrana bez konce"))
+    return ids
+
+
+def _parse_edge(line: str, lineno: int, d: MermaidDiagram) -> bool:
+    parts = _split_arrow(line.rstrip(";"))
+    if parts is None:
+        return False
+    left, rest = parts
+    left, text_label = _split_text_label(left)
+    sources = _parse_endpoints(left, lineno, d)
+
+    # řetěz a --> b --> c: každý úsek = jedna šipka, cíle úseku jsou zdroje dalšího
+    while True:
+        if text_label is not None:
+            label = _strip_label(text_label, lineno, d.errors, "hrany")
+            if label is None:
+                return True
+        else:
+            label = ""
+            m = _EDGE_LABEL_RE.match(rest)
+            if m:
+                label = _strip_label(m.group(1), lineno, d.errors, "hrany")
+                rest = rest[m.end():]
+                if label is None:
+                    return True
+            elif rest.startswith("|"):
+                d.errors.append(MermaidError(lineno, "edge", "neuzavřený popisek hrany |...|"))
+                return True
+
+        parts = _split_arrow(rest)
+        target, rest = (rest, "") if parts is None else parts
+        target, text_label = _split_text_label(target)
+        targets = _parse_endpoints(target, lineno, d)
+        d.edges.extend((src, tgt, label) for src in sources for tgt in targets)
+        if parts is None:
+            return True
+        sources = targets
+
+
+def parse(code: str) -> MermaidDiagram:
+    d = MermaidDiagram()
+    if not code or not code.strip():
+        d.errors.append(MermaidError(0, "empty", "prázdný diagram"))
+        return d
+
+    depth = 0
+    header_seen = False
+    for lineno, raw in enumerate(code.splitlines(), start=1):
+        line = raw.strip()
+        if not line or line.startswith("%%"):
+            continue
+
+        if _FENCE_RE.match(line):
+            d.errors.append(MermaidError(lineno, "fence", "Markdown code fence (```) nepatří do Mermaid kódu"))
+            continue
+
+        if not header_seen:
+            header_seen = True
+            m = _HEADER_RE.match(line)
+            if not m:
+                d.errors.append(MermaidError(lineno, "header", "chybí hlavička 'flowchart LR'"))
+            else:
+                if m.group(2) not in DIRECTIONS:
+                    d.errors.append(MermaidError(lineno, "header", f"neznámý směr {m.group(2)!r}"))
+                d.direction = m.group(2)
+                continue
+
+        if _HEADER_RE.match(line):
+            d.errors.append(MermaidError(lineno, "header", "hlavička může být jen jednou"))
+            continue
+
+        m = _CLASSDEF_RE.match(line)
+        if m:
+            d.class_defs[m.group(1)] = m.group(2)
+            continue
+
+        m = _CLASS_RE.match(line)
+        if m:
+            for node_id in re.split(r"\s*,\s*", m.group(1)):
+                d.classes[node_id] = m.group(2)
+            continue
+
+        if _STYLE_RE.match(line) or _LINKSTYLE_RE.match(line):
+            continue
+
+        m = _SUBGRAPH_RE.match(line)
+        if m:
+            depth += 1
+            if m.group(2) is not None:
+                label = _strip_label(m.group(2), lineno, d.errors, f"subgraph {m.group(1)}")
+            else:
+                label = m.group(3).strip()
+            d.subgraphs.append(label or "")
+            continue
+
+        if line == "end":
+            if depth == 0:
+                d.errors.append(MermaidError(lineno, "subgraph", "'end' bez otevřeného subgraph"))
+            else:
+                depth -= 1
+            continue
+
+        m = _DIRECTION_RE.match(line)
+        if m:
+            if depth == 0:
+                d.errors.append(MermaidError(lineno, "subgraph", "'direction' je povolené jen uvnitř subgraph"))
+            elif m.group(1) not in DIRECTIONS:
+                d.errors.append(MermaidError(lineno, "subgraph", f"neznámý směr {m.group(1)!r}"))
+            continue
+
+        if _parse_edge(line, lineno, d):
+            continue
+
+        m = _NODE_RE.match(line.rstrip(";"))
+        if m:
+            label = _strip_label(m.group(2), lineno, d.errors, f"uzlu {m.group(1)}")
+            if label is not None:
+                d.nodes[m.group(1)] = label
+            continue
+
+        if re.fullmatch(_ID, line.rstrip(";")):
+            d.nodes.setdefault(line.rstrip(";"), line.rstrip(";"))
+            continue
+
+        d.errors.append(MermaidError(lineno, "syntax", f"nerozpoznaný řádek: {line[:60]!r}"))
+
+    if depth > 0:
+        d.errors.append(MermaidError(0, "subgraph", f"{depth}x subgraph bez 'end'"))
+    return d
+
+
+def validate(code: str) -> List[MermaidError]:
+    return parse(code).errors
+
+
+# -------- opravy --------
+
+def _escape_quotes(inner: str) -> str:
+    inner = inner.strip()
+    if len(inner) >= 2 and inner[0] == '"' and inner[-1] == '"':
+        inner = inner[1:-1]
+    return '"' + inner.replace('"', "#quot;") + '"'
+
+
+_NODE_DECL_RE = re.compile(rf"({_ID})\[(.*?)\](?=\s*(?:$|;|&|-->|---|-\.->|==>|--\s|-\.\s|==\s))")
+_EDGE_LABEL_FIX_RE = re.compile(r'\|("[^"]*"|[^|]*)\|(?=\s*[A-Za-z_])')
+
+
+def _repair_line(line: str) -> str:
+    line = _NODE_DECL_RE.sub(lambda m: f"{m.group(1)}[{_escape_quotes(m.group(2))}]", line)
+    return _EDGE_LABEL_FIX_RE.sub(lambda m: f"|{_escape_quotes(m.group(1))}|", line)
+
+
+def repair(code: str) -> Tuple[str, List[str]]:
+    """Vrátí (opravený kód, seznam provedených oprav). Co opravit nejde, nechá být."""
+    fixes = []
+    lines = (code or "").strip().splitlines()
+
+    kept = [ln for ln in lines if not _FENCE_RE.match(ln.strip())]
+    if len(kept) != len(lines):
+        fixes.append("odstraněn code fence")
+    lines = kept
+
+    first = next((ln.strip() for ln in lines if ln.strip() and not ln.strip().startswith("%%")), "")
+    if not _HEADER_RE.match(first):
+        lines.insert(0, "flowchart LR")
+        fixes.append("doplněna hlavička flowchart LR")
+
+    out = []
+    for ln in lines:
+        stripped = ln.strip()
+        keyword = stripped.split(" ", 1)[0]
+        if keyword in ("classDef", "class", "style", "linkStyle", "subgraph", "direction", "end", "flowchart", "graph") \
+                or stripped.startswith("%%"):
+            out.append(ln)
+            continue
+        fixed = _repair_line(ln)
+        if fixed != ln:
+            fixes.append(f"popisky v uvozovkách: {stripped[:40]}")
+        out.append(fixed)
+
+    return "\n".join(out), fixes
+
+
+def check(code: str) -> Tuple[str, MermaidDiagram, List[str]]:
+    """parse, případně repair + parse znovu. Vrací (kód, výsledek parse, opravy)."""
+    diagram = parse(code)
+    if diagram.ok:
+        return code, diagram, []
+    fixed, fixes = repair(code)
+    return fixed, parse(fixed), fixes
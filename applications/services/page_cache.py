@@ -0,0 +1,117 @@
+"""
+Cache vyrenderovaných stránek a fragmentů šablon podle verze portfolia.
+
+- verze PORTFOLIO se zvyšuje po commitu změny Application / Integration / Capability / TechDebtItem
+  (signály + hromadné operace nad Application) => staré záznamy se nemažou, jen se na ně už nikdo nezeptá
+- klíč = jméno stránky/fragmentu + verze + parametry (GET parametry seřazené, URL kwargs, vary hodnoty)
+- celé view: jen GET/HEAD a odpověď 200 bez cookies (stránky s {% csrf_token %} se cachují po fragmentech)
+- statistiky hit/miss jsou per proces (jako LLM cache), PAGE_CACHE_ENABLED=0 cache vypne
+- výchozí zapnuto jen se sdíleným cache backendem; zapnutí nad LocMem hlásí check applications.W001
+"""
+import hashlib
+import json
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+from .versions import PORTFOLIO, bump, cache_is_shared, get_version
+
+CACHE_HEADER = "X-Page-Cache"
+
+_stats = {}
+_lock = threading.Lock()
+
+
+def page_cache_enabled() -> bool:
+    return bool(getattr(settings, "PAGE_CACHE_ENABLED", False))
+
+
+def _timeout() -> int:
+    return int(getattr(settings, "PAGE_CACHE_SECONDS", 3600))
+
+
+def portfolio_changed():
+    """Zvýší verzi portfolia až po commitu (souběžný request by jinak uložil stará data pod novou verzi)."""
+    transaction.on_commit(lambda: bump(PORTFOLIO))
+
+
+def make_key(kind: str, name: str, parts) -> str:
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"page:{kind}:{name}:v{get_version(PORTFOLIO)}:{digest}"
+
+
+def _count(name: str, hit: bool):
+    with _lock:
+        row = _stats.setdefault(name, {"hits": 0, "misses": 0})
+        row["hits" if hit else "misses"] += 1
+
+
+def stats() -> dict:
+    with _lock:
+        pages = {name: dict(row) for name, row in _stats.items()}
+    for row in pages.values():
+        lookups = row["hits"] + row["misses"]
+        row["hit_ratio"] = round(row["hits"] / lookups, 3) if lookups else 0.0
+    hits = sum(r["hits"] for r in pages.values())
+    lookups = hits + sum(r["misses"] for r in pages.values())
+    return {
+        "enabled": page_cache_enabled(),
+        "version": get_version(PORTFOLIO),
+        "hits": hits,
+        "misses": lookups - hits,
+        "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+        "pages": pages,
+    }
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+def cached_page(name: str):
+    """Dekorátor view: celá odpověď z cache podle verze portfolia, cesty a GET parametrů."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not page_cache_enabled() or request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            # verze se čte před renderem: změna během renderu skončí pod starým klíčem
+            key = make_key("view", name, [args, kwargs, sorted(request.GET.lists())])
+            cached = cache.get(key)
+            if cached is not None:
+                _count(name, True)
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response[CACHE_HEADER] = "hit"
+                return response
+
+            _count(name, False)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, (response.content, response["Content-Type"]), timeout=_timeout())
+            response[CACHE_HEADER] = "miss"
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_fragment(name: str, vary_on, render) -> str:
+    """Fragment šablony: render() se zavolá jen při miss (tag {% portfoliocache %})."""
+    if not page_cache_enabled():
+        return render()
+    key = make_key("fragment", name, list(vary_on))
+    html = cache.get(key)
+    if html is not None:
+        _count(name, True)
+        return html
+    _count(name, False)
+    html = render()
+    cache.set(key, html, timeout=_timeout())
+    return html
@@ -0,0 +1,140 @@
+"""
+Keyset (cursor) stránkování a streamované renderování dlouhých seznamů.
+
+- stránka = WHERE (klíč) > (poslední klíč předchozí stránky) ORDER BY klíč LIMIT size + 1
+  => cena nezávisí na tom, jak daleko v seznamu jsme (OFFSET by přeskakoval řádky)
+- klíč končí na id, takže je jednoznačný i při shodných jménech / objemech
+- kurzor je base64 JSON hodnot klíče; neplatný kurzor = první stránka
+- ?stream=1: celý seznam po dávkách přes .iterator(chunk_size) do StreamingHttpResponse,
+  paměť nezávisí na počtu řádků
+"""
+import base64
+import binascii
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+
+# oddělovač v šabloně stránky, kam se při streamování vloží řádky
+ROWS_MARKER = "<!--stream-rows-->"
+
+
+def page_size_bounds():
+    default = int(getattr(settings, "LIST_PAGE_SIZE", 50))
+    return default, max(default, int(getattr(settings, "LIST_PAGE_SIZE_MAX", 500)))
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    # hodnoty klíče jsou jen skaláry; upravený kurzor s objektem by dal nesmyslný filtr
+    if not all(v is None or isinstance(v, (str, int, float)) for v in values):
+        return None
+    return values
+
+
+def _fields(ordering):
+    """("-daily_volume", "id") -> [("daily_volume", True), ("id", False)] (True = sestupně)."""
+    return [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+
+
+def _after(fields, values, backward):
+    """(a, b) za (va, vb) v pořadí klíče: a > va OR (a = va AND b > vb); sestupné sloupce opačně."""
+    condition = Q()
+    for n, (field, desc) in enumerate(fields):
+        lookup = "lt" if desc != backward else "gt"
+        equal = {prev: values[m] for m, (prev, _) in enumerate(fields[:n])}
+        condition |= Q(**equal, **{f"{field}__{lookup}": values[n]})
+    # nadbytečná mez na první sloupec: s ní SQLite v indexu skočí na kurzor, místo aby ho četl od začátku
+    first, desc = fields[0]
+    return Q(**{f"{first}__{'lte' if desc != backward else 'gte'}": values[0]}) & condition
+
+
+class KeysetPage:
+    def __init__(self, items, ordering, page_size, has_next, has_prev):
+        self.items = items
+        self.page_size = page_size
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self._fields = _fields(ordering)
+
+    def _cursor(self, obj):
+        return encode_cursor(getattr(obj, field) for field, _ in self._fields)
+
+    @property
+    def next_cursor(self):
+        return self._cursor(self.items[-1]) if self.has_next and self.items else ""
+
+    @property
+    def prev_cursor(self):
+        return self._cursor(self.items[0]) if self.has_prev and self.items else ""
+
+
+def keyset_page(qs, ordering, params) -> KeysetPage:
+    """
+    qs bez řazení + klíč (např. ("name", "id")); params = request.GET
+    (?after=<kurzor> další stránka, ?before=<kurzor> předchozí, ?page_size=N).
+    """
+    default, maximum = page_size_bounds()
+    try:
+        size = min(max(1, int(params.get("page_size") or default)), maximum)
+    except ValueError:
+        size = default
+
+    fields = _fields(ordering)
+    after = decode_cursor(params.get("after", ""), len(fields))
+    before = None if after else decode_cursor(params.get("before", ""), len(fields))
+
+    if before is not None:
+        # pozpátku od kurzoru, pak otočit zpět
+        reverse = [f"{'' if desc else '-'}{field}" for field, desc in fields]
+        rows = list(qs.filter(_after(fields, before, True)).order_by(*reverse)[:size + 1])
+        has_prev = len(rows) > size
+        return KeysetPage(rows[:size][::-1], ordering, size, has_next=True, has_prev=has_prev)
+
+    if after is not None:
+        qs = qs.filter(_after(fields, after, False))
+    rows = list(qs.order_by(*ordering)[:size + 1])
+    return KeysetPage(rows[:size], ordering, size, has_next=len(rows) > size, has_prev=after is not None)
+
+
+def stream_chunk_size() -> int:
+    return max(1, int(getattr(settings, "LIST_STREAM_CHUNK_SIZE", 2000)))
+
+
+def stream_list(request, page_template, rows_template, context, qs):
+    """
+    Stránka se vyrenderuje jednou s ROWS_MARKER místo řádků; hlavička, řádky po dávkách
+    (qs.iterator) a patička se posílají postupně.
+    """
+    page = render_to_string(page_template, {**context, "streaming": True}, request=request)
+    head, _, tail = page.partition(ROWS_MARKER)
+    rows = get_template(rows_template)
+    chunk_size = stream_chunk_size()
+
+    def chunks():
+        yield head
+        iterator = qs.iterator(chunk_size=chunk_size)
+        while True:
+            batch = list(islice(iterator, chunk_size))
+            if not batch:
+                break
+            yield rows.render({"rows": batch}, request)
+        yield tail
+
+    return StreamingHttpResponse(chunks(), content_type="text/html; charset=utf-8")
@@ -0,0 +1,114 @@
+"""
+Skládání promptů do token budgetu.
+
+- estimate_tokens: lokální odhad (bez tokenizeru) – slova po ~4 znacích + interpunkce
+- tabulková data jako hlavička + řádky oddělené "|" (žádné opakované JSON klíče)
+- PromptBuilder: pevné části + tabulky, které se doplní jen do zbývajícího budgetu
+"""
+import logging
+import math
+import re
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Hrubý odhad počtu tokenů (BPE dělí delší slova po ~4 znacích, interpunkce = 1)."""
+    if not text:
+        return 0
+    return sum(max(1, math.ceil(len(t) / 4)) if t[0].isalnum() or t[0] == "_" else 1
+               for t in _TOKEN_RE.findall(text))
+
+
+def get_input_budget() -> int:
+    return max(200, int(getattr(settings, "LLM_INPUT_TOKEN_BUDGET", 1500) or 1500))
+
+
+def get_max_rows() -> int:
+    """Horní mez řádků načtených z DB pro tabulky v promptu (budget pak ořeže zbytek)."""
+    return max(1, int(getattr(settings, "LLM_CONTEXT_MAX_ROWS", 500) or 500))
+
+
+def _cell(value) -> str:
+    # oddělovač a nové řádky by rozbily tabulku
+    return str("" if value is None else value).replace("|", "/").replace("\n", " ").strip()
+
+
+def table_row(values) -> str:
+    return "|".join(_cell(v) for v in values)
+
+
+def compact_counts(rows) -> str:
+    """[("Payments", 12), ("Risk", 8)] -> "Payments=12; Risk=8"."""
+    return "; ".join(f"{_cell(k) or 'N/A'}={v}" for k, v in rows)
+
+
+class PromptBuilder:
+    """
+    Části se skládají v pořadí přidání. Text je povinný, tabulky dostanou jen to,
+    co zbude z budgetu po pevných částech (řádky v pořadí, v jakém přišly).
+    """
+
+    def __init__(self, name: str, budget: int = None):
+        self.name = name
+        self.budget = budget or get_input_budget()
+        self._parts = []
+        self.stats = {}
+
+    def add(self, text: str) -> "PromptBuilder":
+        self._parts.append(("text", text))
+        return self
+
+    def add_table(self, title: str, columns, rows) -> "PromptBuilder":
+        self._parts.append(("table", title, list(columns), rows))
+        return self
+
+    def add_list(self, title: str, items, sep: str = "\n") -> "PromptBuilder":
+        self._parts.append(("list", title, list(items), sep))
+        return self
+
+    def build(self) -> str:
+        fixed = sum(estimate_tokens(p[1]) for p in self._parts if p[0] == "text")
+        remaining = self.budget - fixed
+
+        out = []
+        included = total = 0
+        for part in self._parts:
+            if part[0] == "text":
+                out.append(part[1])
+                continue
+
+            kind, title, items = part[0], part[1], part[2]
+            if kind == "table":
+                header = f"{title} (sloupce: {table_row(items)})\n"
+                lines = [table_row(r) for r in part[3]]
+                sep = "\n"
+            else:
+                header = f"{title}\n"
+                lines = [_cell(x) for x in items]
+                sep = part[3]
+
+            remaining -= estimate_tokens(header)
+            chosen = []
+            for line in lines:
+                cost = estimate_tokens(line) + 1
+                if cost > remaining:
+                    break
+                chosen.append(line)
+                remaining -= cost
+            included += len(chosen)
+            total += len(lines)
+            out.append(header + sep.join(chosen))
+
+        prompt = "".join(out)
+        tokens = estimate_tokens(prompt)
+        self.stats = {"tokens": tokens, "budget": self.budget, "rows": included, "rows_available": total}
+        logger.info(
+            "LLM prompt %s: ~%d tokens (budget %d), rows %d/%d",
+            self.name, tokens, self.budget, included, total,
+        )
+        return prompt
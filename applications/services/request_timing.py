@@ -0,0 +1,158 @@
+"""
+Měření requestu: počet a čas SQL dotazů, LLM volání a renderu šablon.
+
+- stav requestu je v ContextVar => funguje pro sync i async views (asgiref kopíruje kontext
+  do sync_to_async vláken), mimo request se nic neměří
+- SQL: execute wrapper na každém DB spojení (connection_created), bez requestu jen propustí dotaz
+- šablony: backend TimedDjangoTemplates měří render šablon vrácených enginem (include je uvnitř)
+- LLM: dekorátor timed_llm_call na odesílání v llm_client; streamované odpovědi se jen počítají
+  (doběhnou až po odeslání hlaviček)
+- výsledek: hlavička Server-Timing + jeden JSON řádek do loggeru applications.timing (middleware);
+  streamovaná odpověď má v hlavičce jen total do odeslání hlaviček
+"""
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("started", "sql_count", "sql_ms", "llm_count", "llm_ms", "template_ms", "_template_depth")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.llm_count = 0
+        self.llm_ms = 0.0
+        self.template_ms = 0.0
+        self._template_depth = 0
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_ms, 1),
+            "db_queries": self.sql_count,
+            "db_ms": round(self.sql_ms, 1),
+            "llm_calls": self.llm_count,
+            "llm_ms": round(self.llm_ms, 1),
+            "template_ms": round(self.template_ms, 1),
+        }
+
+    def server_timing(self, streaming: bool = False) -> str:
+        if streaming:
+            # řádky se renderují (a dotazují DB) až po odeslání hlaviček => db/llm/tpl by ukazovaly nuly
+            return f'total;dur={self.total_ms:.1f};desc="until headers, body streamed"'
+        return ", ".join([
+            f'db;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+            f'llm;dur={self.llm_ms:.1f};desc="{self.llm_count} calls"',
+            f"tpl;dur={self.template_ms:.1f}",
+            f"total;dur={self.total_ms:.1f}",
+        ])
+
+
+def start_request():
+    """Vrací (timings, token pro finish_request)."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current_timings():
+    return _current.get()
+
+
+# -------- SQL --------
+
+def _sql_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_count += 1
+        timings.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    """connection_created: wrapper jen jednou na spojení (při reconnectu zůstává v seznamu)."""
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+# -------- LLM --------
+
+def _llm_done(timings, started):
+    if timings is not None:
+        timings.llm_count += 1
+        timings.llm_ms += (time.perf_counter() - started) * 1000
+
+
+def timed_llm_call(func):
+    """Dekorátor pro sync i async odeslání dotazu na LLM (čas včetně retry)."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            timings, started = _current.get(), time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _llm_done(timings, started)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timings, started = _current.get(), time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _llm_done(timings, started)
+    return wrapper
+
+
+def count_llm_call():
+    """Streamované volání: jen počet, doba se do hlaviček nedostane."""
+    timings = _current.get()
+    if timings is not None:
+        timings.llm_count += 1
+
+
+# -------- šablony --------
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        timings._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings._template_depth -= 1
+            # vnořené render_to_string (např. v template tagu) se nepočítají dvakrát
+            if not timings._template_depth:
+                timings.template_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend, jehož šablony měří dobu renderu do aktuálního requestu."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
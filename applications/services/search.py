@@ -0,0 +1,142 @@
+"""
+Fulltext nad aplikacemi: SQLite FTS5 tabulka applications_app_fts (migrace 0007).
+
+- sloupce: name, domain, vendor, tech_stack, vendor_products, database_technology + názvy capabilities
+- dotaz: slova uživatele => prefixové termy spojené AND ("pay"* "hub"*), diakritika se ignoruje
+- řazení: hidden sloupec rank = bm25 s vahami sloupců (název nejvíc), nastavené v migraci
+- zvýraznění: highlight() pro název, snippet() z nejlépe odpovídajícího sloupce; značky se doplní
+  až po escapování HTML (fts_highlight filtr)
+- index se udržuje ve stejné transakci jako změna (signály Application / Capability / M2M,
+  hromadné operace v ApplicationQuerySet); celé znovu: manage.py rebuild_search_index
+- bez FTS5 (jiná DB, chybějící tabulka, SEARCH_FTS_ENABLED=0) se hledá původně přes icontains
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Func, Q, TextField, Value
+
+from ..models import Application, ApplicationSearch, Capability
+
+SEARCH_TABLE = ApplicationSearch._meta.db_table
+# pole aplikace v indexu (změna jiných polí index nepřepisuje)
+SEARCH_FIELDS = frozenset(
+    ("name", "domain", "vendor", "tech_stack", "vendor_products", "database_technology")
+)
+# původní hledání (fallback a srovnání v bench_search)
+ORM_SEARCH_FIELDS = ("name", "domain", "vendor", "tech_stack")
+SEARCH_ORDERING = ("search_rank", "id")
+MAX_TERMS = 8
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+_BATCH = 500
+
+_available = {}
+
+
+def search_enabled() -> bool:
+    if not getattr(settings, "SEARCH_FTS_ENABLED", True) or connection.vendor != "sqlite":
+        return False
+    alias = connection.alias
+    if alias not in _available:
+        _available[alias] = SEARCH_TABLE in connection.introspection.table_names()
+    return _available[alias]
+
+
+def match_expression(q: str):
+    """'Payments hub' -> '"Payments"* "hub"*' (None = žádné slovo k hledání)."""
+    terms = re.findall(r"\w+", q)[:MAX_TERMS]
+    return " ".join(f'"{term}"*' for term in terms) or None
+
+
+def orm_search_q(q: str) -> Q:
+    condition = Q()
+    for field in ORM_SEARCH_FIELDS:
+        condition |= Q(**{f"{field}__icontains": q})
+    return condition
+
+
+def search_filter(qs, q: str):
+    """Jen aplikace odpovídající dotazu (facety, počty); řazení přidá ranked()."""
+    if not search_enabled():
+        return qs.filter(orm_search_q(q))
+    match = match_expression(q)
+    if match is None:
+        return qs.none()
+    return qs.filter(search_doc__document__match=match)
+
+
+def ranked(qs):
+    """
+    Queryset ze search_filter() + bm25 (search_rank) a zvýrazněný název / úryvek.
+    Vrací (queryset, klíč řazení); bez FTS5 zůstává řazení podle názvu.
+    """
+    if not search_enabled():
+        return qs, ("name", "id")
+    doc = F("search_doc__document")
+    marks = (Value(HIGHLIGHT_START), Value(HIGHLIGHT_END))
+    qs = qs.annotate(
+        search_rank=F("search_doc__rank"),
+        search_name=Func(doc, Value(0), *marks, function="highlight", output_field=TextField()),
+        search_snippet=Func(doc, Value(-1), *marks, Value("…"), Value(12), function="snippet", output_field=TextField()),
+    )
+    return qs, SEARCH_ORDERING
+
+
+# -------- údržba indexu --------
+
+def _document_sql(where: str = "") -> str:
+    app = Application._meta.db_table
+    cap = Capability._meta.db_table
+    through = Application.capabilities.through._meta.db_table
+    return (
+        f"INSERT INTO {SEARCH_TABLE}"
+        " (rowid, name, domain, vendor, tech_stack, vendor_products, database_technology, capabilities)"
+        " SELECT a.id, a.name, a.domain, a.vendor, a.tech_stack, a.vendor_products, a.database_technology,"
+        f" COALESCE((SELECT group_concat(c.name, ' ') FROM {through} ac"
+        f"  JOIN {cap} c ON c.id = ac.capability_id WHERE ac.application_id = a.id), '')"
+        f" FROM {app} a {where}"
+    )
+
+
+def index_apps(ids):
+    """Přepíše dokumenty daných aplikací podle aktuálního stavu v DB (smazané jen vypadnou)."""
+    ids = [i for i in ids if i is not None]
+    if not ids or not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), _BATCH):
+            chunk = ids[start:start + _BATCH]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", chunk)
+            cursor.execute(_document_sql(f"WHERE a.id IN ({placeholders})"), chunk)
+
+
+def remove_apps(ids):
+    ids = [i for i in ids if i is not None]
+    if not ids or not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), _BATCH):
+            chunk = ids[start:start + _BATCH]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", chunk)
+
+
+def capability_app_ids(capability_ids):
+    return list(
+        Application.capabilities.through.objects.filter(capability_id__in=capability_ids)
+        .values_list("application_id", flat=True).distinct()
+    )
+
+
+def rebuild_index() -> int:
+    """Celý index znovu z tabulek (backfill); vrací počet dokumentů."""
+    if not search_enabled():
+        return 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(_document_sql())
+        # sloučí segmenty po hromadném zápisu
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
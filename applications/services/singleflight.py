@@ -0,0 +1,315 @@
+"""
+Single-flight + stale-while-revalidate nad Django cache.
+
+- v cache je záznam {"value": ..., "fresh_until": ts}; fyzicky žije ttl + stale_ttl
+- čerstvý záznam => vrátí se hned
+- prošlý (stale) => vrátí se hned a na pozadí se přepočítá (jen jeden přepočet naráz: vlákno / task
+  vznikne jen tehdy, když klíč nikdo nepočítá – stejný zámek jako leader)
+- chybí => počítá jen jeden volající (leader), ostatní čekají na jeho výsledek
+
+Koalescence v rámci procesu přes Future/Event; mezi procesy přes cache.add(lock)
+(funguje se sdílenou cache – Redis, Memcached, DB cache; LocMem je jen per proces).
+Přepočet na pozadí u async varianty potřebuje běžící event loop (ASGI server).
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# jak dlouho smí leader držet zámek / jak dlouho na něj ostatní čekají
+LOCK_TIMEOUT_SECONDS = 120
+POLL_INTERVAL_SECONDS = 0.2
+
+
+@dataclass
+class Entry:
+    value: Any
+    fresh: bool
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:sf-lock"
+
+
+def _pack(value, ttl: int) -> dict:
+    return {"value": value, "fresh_until": time.time() + ttl}
+
+
+def _unpack(raw) -> Optional[Entry]:
+    if raw is None:
+        return None
+    if isinstance(raw, dict) and "fresh_until" in raw:
+        return Entry(raw["value"], raw["fresh_until"] > time.time())
+    # starší formát (holá hodnota) bereme jako čerstvou
+    return Entry(raw, True)
+
+
+# -------- async --------
+
+_async_inflight = weakref.WeakKeyDictionary()  # loop -> {key: Future}
+_background = set()
+
+
+def _loop_registry() -> dict:
+    loop = asyncio.get_running_loop()
+    registry = _async_inflight.get(loop)
+    if registry is None:
+        registry = _async_inflight[loop] = {}
+    return registry
+
+
+async def aget_entry(key: str) -> Optional[Entry]:
+    return _unpack(await cache.aget(key))
+
+
+async def astore(key: str, value, ttl: int, stale_ttl: int = 0) -> None:
+    await cache.aset(key, _pack(value, ttl), timeout=ttl + stale_ttl)
+
+
+class AsyncFlight:
+    def __init__(self, key, ttl, stale_ttl, leader, future=None):
+        self.key = key
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.leader = leader
+        self._future = future
+
+    async def publish(self, value) -> None:
+        """Uloží výsledek do cache; leader navíc probudí čekající."""
+        await astore(self.key, value, self.ttl, self.stale_ttl)
+        if self.leader and not self._future.done():
+            self._future.set_result(value)
+
+    async def wait(self, timeout: float = LOCK_TIMEOUT_SECONDS):
+        """Follower: výsledek leadera, nebo None (leader selhal / vypršel čas)."""
+        if self._future is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(self._future), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        # leader je v jiném procesu => poll cache, dokud se neobjeví hodnota nebo nezmizí zámek
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            entry = await aget_entry(self.key)
+            if entry is not None and entry.fresh:
+                return entry.value
+            if not await cache.aget(_lock_key(self.key)):
+                return entry.value if entry else None
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        return None
+
+
+@asynccontextmanager
+async def aflight(key: str, ttl: int, stale_ttl: int = 0):
+    """
+    Kdo první vstoupí, je leader (flight.leader) a má výsledek publish(); ostatní wait().
+    Pro případy, kdy výpočet neprobíhá jako jedna funkce (např. streamovaná odpověď).
+    """
+    registry = _loop_registry()
+    existing = registry.get(key)
+    if existing is not None and not existing.done():
+        yield AsyncFlight(key, ttl, stale_ttl, leader=False, future=existing)
+        return
+
+    token = uuid.uuid4().hex
+    if not await cache.aadd(_lock_key(key), token, timeout=LOCK_TIMEOUT_SECONDS):
+        yield AsyncFlight(key, ttl, stale_ttl, leader=False)
+        return
+
+    future = asyncio.get_running_loop().create_future()
+    registry[key] = future
+    try:
+        yield AsyncFlight(key, ttl, stale_ttl, leader=True, future=future)
+    finally:
+        if not future.done():
+            future.set_result(None)
+        if registry.get(key) is future:
+            del registry[key]
+        if await cache.aget(_lock_key(key)) == token:
+            await cache.adelete(_lock_key(key))
+
+
+async def _arefresh(key, compute, ttl, stale_ttl) -> None:
+    try:
+        async with aflight(key, ttl, stale_ttl) as flight:
+            if flight.leader:
+                await flight.publish(await compute())
+    except Exception:
+        logger.exception("Background refresh of %s failed", key)
+
+
+def arefresh_in_background(key: str, compute, ttl: int, stale_ttl: int = 0) -> None:
+    existing = _loop_registry().get(key)
+    if existing is not None and not existing.done():
+        # už se počítá v tomto procesu
+        return
+    task = asyncio.get_running_loop().create_task(_arefresh(key, compute, ttl, stale_ttl))
+    # silná reference, jinak může task sebrat GC
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def acached(key: str, compute, ttl: int, stale_ttl: int = 0):
+    """
+    compute: async funkce bez argumentů. Chyby compute propadnou volajícímu (leaderovi);
+    čekající followeři, kterým leader nic nedal, to zkusí sami.
+    """
+    entry = await aget_entry(key)
+    if entry is not None:
+        if not entry.fresh:
+            arefresh_in_background(key, compute, ttl, stale_ttl)
+        return entry.value
+
+    async with aflight(key, ttl, stale_ttl) as flight:
+        if flight.leader:
+            # mezitím mohl hodnotu uložit předchozí leader
+            entry = await aget_entry(key)
+            value = entry.value if entry and entry.fresh else None
+        else:
+            value = await flight.wait()
+        if value is not None:
+            return value
+        value = await compute()
+        await flight.publish(value)
+        return value
+
+
+# -------- sync (WSGI views, management commands) --------
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+_sync_inflight = {}
+_sync_lock = threading.Lock()
+
+
+def get_entry(key: str) -> Optional[Entry]:
+    return _unpack(cache.get(key))
+
+
+def store(key: str, value, ttl: int, stale_ttl: int = 0) -> None:
+    cache.set(key, _pack(value, ttl), timeout=ttl + stale_ttl)
+
+
+class Flight:
+    def __init__(self, key, ttl, stale_ttl, leader, call, remote=False):
+        self.key = key
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.leader = leader
+        self._call = call
+        self._remote = remote
+
+    def publish(self, value) -> None:
+        store(self.key, value, self.ttl, self.stale_ttl)
+        self._call.value = value
+
+    def wait(self, timeout: float = LOCK_TIMEOUT_SECONDS):
+        if not self._remote:
+            self._call.done.wait(timeout)
+            return self._call.value
+
+        # leader je v jiném procesu => poll cache (a výsledek předat čekajícím v tomto procesu)
+        deadline = time.monotonic() + timeout
+        value = None
+        while time.monotonic() < deadline:
+            entry = get_entry(self.key)
+            if entry is not None and entry.fresh:
+                value = entry.value
+                break
+            if not cache.get(_lock_key(self.key)):
+                value = entry.value if entry else None
+                break
+            time.sleep(POLL_INTERVAL_SECONDS)
+        self._call.value = value
+        return value
+
+
+@contextmanager
+def flight(key: str, ttl: int, stale_ttl: int = 0):
+    """Sync obdoba aflight (vlákna místo Future)."""
+    with _sync_lock:
+        call = _sync_inflight.get(key)
+        owner = call is None
+        if owner:
+            call = _sync_inflight[key] = _Call()
+
+    if not owner:
+        yield Flight(key, ttl, stale_ttl, leader=False, call=call)
+        return
+
+    token = uuid.uuid4().hex
+    leader = cache.add(_lock_key(key), token, timeout=LOCK_TIMEOUT_SECONDS)
+    try:
+        yield Flight(key, ttl, stale_ttl, leader=leader, call=call, remote=not leader)
+    finally:
+        _release(key, call, token if leader else None)
+
+
+def _release(key, call, token) -> None:
+    with _sync_lock:
+        if _sync_inflight.get(key) is call:
+            del _sync_inflight[key]
+    call.done.set()
+    if token and cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def _refresh(key, compute, ttl, stale_ttl, call, token) -> None:
+    try:
+        Flight(key, ttl, stale_ttl, leader=True, call=call).publish(compute())
+    except Exception:
+        logger.exception("Background refresh of %s failed", key)
+    finally:
+        _release(key, call, token)
+
+
+def refresh_in_background(key: str, compute, ttl: int, stale_ttl: int = 0) -> bool:
+    """
+    Přepočet v daemon vlákně. Zámek leadera (v procesu i v cache) se bere už tady, takže
+    vlákno vznikne jen pro jednoho volajícího; False = přepočet už běží.
+    """
+    with _sync_lock:
+        if key in _sync_inflight:
+            return False
+        call = _sync_inflight[key] = _Call()
+    token = uuid.uuid4().hex
+    if not cache.add(_lock_key(key), token, timeout=LOCK_TIMEOUT_SECONDS):
+        _release(key, call, None)
+        return False
+    threading.Thread(target=_refresh, args=(key, compute, ttl, stale_ttl, call, token), daemon=True).start()
+    return True
+
+
+def cached(key: str, compute, ttl: int, stale_ttl: int = 0):
+    """Sync obdoba acached; přepočet stale hodnoty běží v daemon vlákně."""
+    entry = get_entry(key)
+    if entry is not None:
+        if not entry.fresh:
+            refresh_in_background(key, compute, ttl, stale_ttl)
+        return entry.value
+
+    with flight(key, ttl, stale_ttl) as f:
+        if f.leader:
+            entry = get_entry(key)
+            value = entry.value if entry and entry.fresh else None
+        else:
+            value = f.wait()
+        if value is not None:
+            return value
+        value = compute()
+        f.publish(value)
+        return value
@@ -0,0 +1,58 @@
+"""
+Výkonnostní profil SQLite: PRAGMA na každém novém DB spojení (connection_created).
+
+- WAL: čtenáři neblokují zapisovatele a naopak (zapisovatel je pořád jen jeden)
+- busy_timeout: zápis při drženém zámku čeká, místo okamžité chyby "database is locked"
+- synchronous=NORMAL: ve WAL bezpečné proti pádu aplikace, fsync jen při checkpointu
+- mmap_size / cache_size: čtení stránek z mapované paměti, větší page cache na spojení
+- k tomu v settings: CONN_MAX_AGE (spojení a jeho cache přežije request) a
+  transaction_mode=IMMEDIATE (atomic() bere zápisový zámek hned v BEGIN, takže čeká busy_timeout;
+  odložený BEGIN by při povýšení čtení na zápis selhal okamžitě)
+- SQLITE_PROFILE=default => žádné PRAGMA (původní chování, srovnání v bench_sqlite)
+"""
+from django.conf import settings
+
+PROFILE_TUNED = "tuned"
+PROFILE_DEFAULT = "default"
+
+
+def sqlite_profile() -> str:
+    return getattr(settings, "SQLITE_PROFILE", PROFILE_TUNED)
+
+
+def sqlite_pragmas(profile: str = None) -> list:
+    """[(pragma, hodnota)] v pořadí, v jakém se nastavují (prázdné pro profil default)."""
+    if (profile or sqlite_profile()) != PROFILE_TUNED:
+        return []
+    return [
+        ("journal_mode", "WAL"),
+        ("busy_timeout", int(getattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 5000))),
+        ("synchronous", getattr(settings, "SQLITE_SYNCHRONOUS", "NORMAL")),
+        ("mmap_size", int(getattr(settings, "SQLITE_MMAP_SIZE", 256 * 1024 * 1024))),
+        # záporná hodnota = velikost v KiB (kladná by byla v počtu stránek)
+        ("cache_size", -int(getattr(settings, "SQLITE_CACHE_SIZE_KB", 65536))),
+        ("temp_store", "MEMORY"),
+    ]
+
+
+def apply_pragmas(cursor, pragmas) -> None:
+    """cursor = DB-API kurzor (Django i přímé sqlite3 spojení v bench_sqlite)."""
+    for name, value in pragmas:
+        cursor.execute(f"PRAGMA {name}={value}")
+        if name == "journal_mode":
+            # journal_mode vrací řádek s výsledným režimem (in-memory DB zůstane "memory")
+            cursor.fetchall()
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created: PRAGMA profilu na každé nové SQLite spojení."""
+    if connection.vendor != "sqlite":
+        return
+    pragmas = sqlite_pragmas()
+    if pragmas:
+        # přímo na sqlite3 spojení: mimo execute wrappery (nezapočítá se do dotazů requestu)
+        cursor = connection.connection.cursor()
+        try:
+            apply_pragmas(cursor, pragmas)
+        finally:
+            cursor.close()
@@ -0,0 +1,191 @@
+"""
+Souhrn portfolia (PortfolioSummary) udržovaný inkrementálně.
+
+- uložení / smazání aplikace (signály) upraví počty, součet tech debt a top-N v jediném řádku
+  ve stejné transakci jako změna aplikace (rollback vrátí i souhrn)
+- top-N podle (-tech_debt_score, id): vypadne-li aplikace z plného seznamu a nic ji nenahradí,
+  doplní se jeden řádek dotazem [N-1:N]
+- hromadné operace: bulk_create se započítá inkrementálně, update()/delete() nad querysetem
+  jednou přepočítají celý souhrn na konci (bulk_changes)
+"""
+import bisect
+import threading
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from ..models import Application, PortfolioSummary
+from .prompt_budget import get_max_rows
+
+DIMENSIONS = ("criticality", "environment", "domain", "hosting", "region")
+TOP_FIELDS = ("id", "name", "domain", "criticality", "environment", "tech_debt_score")
+# pole, jejichž změna mění souhrn (jiné update() ho nepřepočítávají)
+SUMMARY_FIELDS = frozenset(DIMENSIONS + TOP_FIELDS)
+_FIELDS = TOP_FIELDS + tuple(d for d in DIMENSIONS if d not in TOP_FIELDS)
+
+_local = threading.local()
+
+
+def top_size() -> int:
+    # tolik řádků čte analýza i Q&A do promptu; dashboard z nich bere top 5
+    return max(5, get_max_rows())
+
+
+def _snapshot(app):
+    """Hodnoty aplikace pro souhrn: dict pole -> hodnota (bez dotazu)."""
+    return {f: getattr(app, "pk" if f == "id" else f) for f in _FIELDS}
+
+
+def _top_key(row):
+    return -(row[5] or 0), row[0]
+
+
+# -------- plný přepočet --------
+
+def rebuild_summary() -> PortfolioSummary:
+    """Celý souhrn znovu z DB (GROUP BY na dimenzi + agregace + top-N)."""
+    size = top_size()
+    with transaction.atomic():
+        counts = {
+            dim: dict(Application.objects.order_by().values_list(dim).annotate(c=Count("id")))
+            for dim in DIMENSIONS
+        }
+        totals = Application.objects.aggregate(total=Count("id"), debt=Sum("tech_debt_score"))
+        top = [
+            list(row) for row in
+            Application.objects.order_by("-tech_debt_score", "id").values_list(*TOP_FIELDS)[:size]
+        ]
+        summary, _ = PortfolioSummary.objects.update_or_create(
+            pk=PortfolioSummary.SINGLETON_ID,
+            defaults={
+                "total_apps": totals["total"] or 0,
+                "counts": counts,
+                "debt_sum": totals["debt"] or 0,
+                "top_debt": top,
+                "top_size": size,
+            },
+        )
+    return summary
+
+
+def get_summary() -> PortfolioSummary:
+    """Jeden dotaz; chybějící nebo menší top-N než chce prompt budget => přepočet."""
+    summary = PortfolioSummary.objects.filter(pk=PortfolioSummary.SINGLETON_ID).first()
+    if summary is None or summary.top_size < top_size():
+        summary = rebuild_summary()
+    return summary
+
+
+async def aget_summary() -> PortfolioSummary:
+    summary = await PortfolioSummary.objects.filter(pk=PortfolioSummary.SINGLETON_ID).afirst()
+    if summary is None or summary.top_size < top_size():
+        summary = await sync_to_async(rebuild_summary)()
+    return summary
+
+
+# -------- inkrementální změny --------
+
+def _count(summary, values, delta):
+    summary.total_apps += delta
+    summary.debt_sum += delta * (values["tech_debt_score"] or 0)
+    for dim in DIMENSIONS:
+        bucket = summary.counts.setdefault(dim, {})
+        key = values[dim]
+        bucket[key] = bucket.get(key, 0) + delta
+        if bucket[key] <= 0:
+            del bucket[key]
+
+
+def _update_top(summary, app_id, values):
+    """Odebere app_id z top-N a vloží nové hodnoty (None = smazaná aplikace); případně doplní z DB."""
+    top = summary.top_debt
+    full = len(top) >= summary.top_size
+    kept = [row for row in top if row[0] != app_id]
+    missing_tail = full and len(kept) < len(top)  # N-tý řádek mezi ostatními neznáme
+
+    if values is not None:
+        row = [values[f] for f in TOP_FIELDS]
+        if (kept and _top_key(row) < _top_key(kept[-1])) or (not missing_tail and len(kept) < summary.top_size):
+            keys = [_top_key(r) for r in kept]
+            kept.insert(bisect.bisect_left(keys, _top_key(row)), row)
+            missing_tail = False
+    kept = kept[:summary.top_size]
+
+    if missing_tail and len(kept) < summary.top_size:
+        # aplikace ze seznamu vypadla => N-tý řádek z DB (změna už v DB je)
+        n = summary.top_size
+        kept.extend(
+            list(r) for r in
+            Application.objects.order_by("-tech_debt_score", "id").values_list(*TOP_FIELDS)[n - 1:n]
+        )
+    summary.top_debt = kept
+
+
+def _apply(app_id, old, new):
+    if getattr(_local, "bulk", 0):
+        return
+    with transaction.atomic():
+        summary = PortfolioSummary.objects.select_for_update().filter(pk=PortfolioSummary.SINGLETON_ID).first()
+        if summary is None:
+            rebuild_summary()
+            return
+        if old is not None:
+            _count(summary, old, -1)
+        if new is not None:
+            _count(summary, new, +1)
+        _update_top(summary, app_id, new)
+        summary.save()
+
+
+def remember_old(app):
+    """pre_save: hodnoty před změnou (1 dotaz na update; nová aplikace žádný)."""
+    if getattr(_local, "bulk", 0) or app._state.adding or app.pk is None:
+        app._summary_old = None
+        return
+    row = Application.objects.filter(pk=app.pk).values_list(*_FIELDS).first()
+    app._summary_old = dict(zip(_FIELDS, row)) if row else None
+
+
+def app_saved(app, created, update_fields=None):
+    if update_fields is not None and SUMMARY_FIELDS.isdisjoint(update_fields):
+        return
+    old = None if created else getattr(app, "_summary_old", None)
+    _apply(app.pk, old, _snapshot(app))
+
+
+def app_deleted(app):
+    _apply(app.pk, _snapshot(app), None)
+
+
+def apply_created(apps):
+    """bulk_create: nové aplikace bez signálů – přičtou se najednou (bez pk => plný přepočet)."""
+    if not apps or getattr(_local, "bulk", 0):
+        return
+    if any(app.pk is None for app in apps):
+        rebuild_summary()
+        return
+    with transaction.atomic():
+        summary = PortfolioSummary.objects.select_for_update().filter(pk=PortfolioSummary.SINGLETON_ID).first()
+        if summary is None:
+            rebuild_summary()
+            return
+        for app in apps:
+            values = _snapshot(app)
+            _count(summary, values, +1)
+            _update_top(summary, app.pk, values)
+        summary.save()
+
+
+@contextmanager
+def bulk_changes():
+    """Uvnitř se souhrn nepočítá po řádcích (signály ho přeskočí); na konci jeden plný přepočet."""
+    depth = getattr(_local, "bulk", 0)
+    _local.bulk = depth + 1
+    try:
+        yield
+    finally:
+        _local.bulk = depth
+        if depth == 0:
+            rebuild_summary()
@@ -0,0 +1,207 @@
+"""
+Synchronní řetězce volání a cykly (direction="sync") nad in-memory grafem.
+
+- Tarjan SCC (iterativně, O(V + E) jen přes sync hrany): komponenta s víc aplikacemi
+  nebo se sync smyčkou na sebe = sync cyklus
+- kondenzace (cyklus = jeden uzel) je DAG => nejdelší sync řetězec i počet řetězců přes aplikaci
+  jsou lineární DP v topologickém pořadí (Tarjan vrací komponenty v opačném topologickém pořadí)
+- řetězec = cesta od aplikace, kterou synchronně nikdo nevolá, po aplikaci, která už synchronně nic nevolá
+- výsledek se cachuje podle verze grafu – po editaci integrace se přepočítá při dalším dotazu
+"""
+import time
+
+from django.core.cache import cache
+
+from .graph import get_graph
+from .versions import GRAPH, get_version
+
+SYNC_CACHE_SECONDS = 3600
+DEFAULT_TOP = 20
+MAX_LISTED = 50  # aplikací vypsaných za jeden cyklus / krok řetězce (velká SCC jich mají tisíce)
+
+
+def tarjan_scc(n, adjacency):
+    """
+    adjacency: seznam sousedů pro uzly 0..n-1. Vrací (comp, count): comp[v] = číslo komponenty;
+    čísla jdou v opačném topologickém pořadí (komponenta 0 nemá hrany do pozdějších).
+    """
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    comp = [-1] * n
+    stack = []
+    counter = 0
+    count = 0
+
+    for root in range(n):
+        if index[root] != -1 or not adjacency[root]:
+            if index[root] == -1:
+                # bez odchozích sync hran => komponenta sama pro sebe
+                index[root] = counter
+                counter += 1
+                comp[root] = count
+                count += 1
+            continue
+        # explicitní zásobník (uzel, pozice dalšího souseda) místo rekurze
+        work = [(root, 0)]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            v, i = work[-1]
+            neighbours = adjacency[v]
+            if i < len(neighbours):
+                work[-1] = (v, i + 1)
+                w = neighbours[i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp[w] = count
+                    if w == v:
+                        break
+                count += 1
+    return comp, count
+
+
+def analyse_sync_chains(graph, top=DEFAULT_TOP):
+    started = time.perf_counter()
+    n = len(graph.app_ids)
+    adjacency = [[] for _ in range(n)]
+    sync_edges = []
+    for v in graph.alive_nodes():
+        for e in graph.out_of(v):
+            if graph.is_sync[e]:
+                sync_edges.append(e)
+                adjacency[v].append(graph.dst[e])
+    involved = [v for v in graph.alive_nodes() if adjacency[v]] + [graph.dst[e] for e in sync_edges]
+    involved = sorted(set(involved))
+
+    comp, count = tarjan_scc(n, adjacency)
+    members = [[] for _ in range(count)]
+    for v in involved:
+        members[comp[v]].append(v)
+
+    # sync cykly: komponenta s víc aplikacemi, nebo aplikace synchronně volající sama sebe
+    self_loop = set()
+    cycle_edges = {}
+    for e in sync_edges:
+        s, t = graph.src[e], graph.dst[e]
+        if comp[s] == comp[t]:
+            cycle_edges.setdefault(comp[s], []).append(e)
+            if s == t:
+                self_loop.add(comp[s])
+    cyclic = {c for c in cycle_edges if len(members[c]) > 1 or c in self_loop}
+
+    # kondenzace: hrany mezi komponentami (bez duplicit)
+    succ = [set() for _ in range(count)]
+    for e in sync_edges:
+        a, b = comp[graph.src[e]], comp[graph.dst[e]]
+        if a != b:
+            succ[a].add(b)
+    has_pred = [False] * count
+    for a in range(count):
+        for b in succ[a]:
+            has_pred[b] = True
+    active = [c for c in range(count) if members[c]]
+
+    # Tarjan: následníci mají menší číslo => vzestupně = od konců řetězců
+    down = [1] * count  # nejdelší řetězec (v komponentách) začínající v c
+    best_next = [-1] * count
+    to_sink = [1] * count  # počet řetězců z c do konce
+    for c in active:
+        if succ[c]:
+            nxt = max(succ[c], key=lambda b: (down[b], -b))
+            down[c] = down[nxt] + 1
+            best_next[c] = nxt
+            to_sink[c] = sum(to_sink[b] for b in succ[c])
+
+    up = [1] * count  # nejdelší řetězec končící v c
+    from_source = [1] * count  # počet řetězců ze začátku do c
+    for c in sorted(active, reverse=True):
+        if has_pred[c]:
+            from_source[c] = 0
+    for c in sorted(active, reverse=True):
+        for b in succ[c]:
+            from_source[b] += from_source[c]
+            up[b] = max(up[b], up[c] + 1)
+
+    def app(v):
+        return {"id": graph.app_ids[v], "name": graph.names[v]}
+
+    def step(c):
+        listed = sorted(members[c], key=lambda v: graph.names[v])[:MAX_LISTED]
+        return {"size": len(members[c]), "apps": [app(v) for v in listed]}
+
+    starts = [c for c in active if not has_pred[c] and (succ[c] or c in cyclic)]
+    starts.sort(key=lambda c: (-down[c], graph.names[members[c][0]]))
+    chains = []
+    for c in starts[:top]:
+        path = []
+        while c != -1:
+            path.append(c)
+            c = best_next[c]
+        chains.append({
+            "length": len(path),
+            "steps": [step(c) for c in path],
+            "through_cycle": any(c in cyclic for c in path),
+        })
+
+    cycles = []
+    for c in sorted(cyclic, key=lambda c: (-len(members[c]), graph.names[members[c][0]])):
+        edges = cycle_edges[c]
+        cycles.append({
+            **step(c),
+            "edges": len(edges),
+            "daily_volume": sum(graph.volume[e] for e in edges),
+        })
+
+    hot = []
+    for c in active:
+        for v in members[c]:
+            hot.append({
+                **app(v),
+                "domain": graph.domains[v],
+                "criticality": graph.criticality[v],
+                "chains": from_source[c] * to_sink[c],
+                "longest": up[c] + down[c] - 1,
+                "in_cycle": c in cyclic,
+            })
+    hot.sort(key=lambda a: (-a["chains"], -a["longest"], a["name"]))
+
+    return {
+        "sync_integrations": len(sync_edges),
+        "apps_with_sync": len(involved),
+        "cycles": cycles,
+        "longest_chain": max((down[c] for c in starts), default=0),
+        "chain_count": sum(to_sink[c] for c in starts),
+        "chains": chains,
+        "hot_apps": hot[:top],
+        "computed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def get_sync_report(top=DEFAULT_TOP):
+    """Report pro aktuální verzi grafu (cache hit = bez průchodu grafem)."""
+    key = f"sync_chains:v{get_version(GRAPH)}:{top}"
+    report = cache.get(key)
+    if report is None:
+        report = analyse_sync_chains(get_graph(), top)
+        cache.set(key, report, timeout=SYNC_CACHE_SECONDS)
+    return report
@@ -0,0 +1,67 @@
+"""
+Verze dat pro klíče cache: při změně se jen zvýší číslo (signály), staré záznamy
+se nemažou – nikdo se na ně už nezeptá a vyprší.
+
+Čtení verze = 1 dotaz do cache, žádný do DB. Se sdílenou cache (Redis, Memcached)
+platí napříč procesy, s LocMem jen v procesu, který data změnil – proto tam klíč verze
+vyprší po CACHE_LOCAL_VERSION_SECONDS: nová verze zneplatní v každém procesu graf i vše,
+co se podle verze cachuje (diagramy, dopad, sync řetězce, matice toků, facety, stránky).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+GRAPH = "graph"  # aplikace + integrace (diagramy, grafové výpočty)
+PORTFOLIO = "portfolio"  # cokoliv zobrazeného na stránkách (cache stránek a fragmentů)
+
+
+def cache_is_shared() -> bool:
+    """Cache backend sdílený mezi procesy (LocMem a Dummy jsou per proces)."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    return backend.rsplit(".", 1)[-1] not in ("LocMemCache", "DummyCache")
+
+
+def local_version_seconds() -> int:
+    """Životnost klíče verze v cache per proces (0 = bez vypršení)."""
+    return int(getattr(settings, "CACHE_LOCAL_VERSION_SECONDS", 60))
+
+
+def _timeout():
+    if cache_is_shared() or not local_version_seconds():
+        return None
+    return local_version_seconds()
+
+
+def _key(scope: str) -> str:
+    return f"version:{scope}"
+
+
+def _initial() -> int:
+    # start od času v ms => když klíč z cache vypadne, nová verze se nepotká se starými záznamy
+    return int(time.time() * 1000)
+
+
+def get_version(scope: str) -> int:
+    version = cache.get(_key(scope))
+    if version is None:
+        cache.add(_key(scope), _initial(), timeout=_timeout())
+        version = cache.get(_key(scope))
+    return version
+
+
+async def aget_version(scope: str) -> int:
+    version = await cache.aget(_key(scope))
+    if version is None:
+        await cache.aadd(_key(scope), _initial(), timeout=_timeout())
+        version = await cache.aget(_key(scope))
+    return version
+
+
+def bump(scope: str) -> int:
+    try:
+        return cache.incr(_key(scope))
+    except ValueError:
+        # klíč ještě neexistuje / vypadl
+        get_version(scope)
+        return cache.incr(_key(scope))
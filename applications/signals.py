@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Application, Integration, Capability, TechDebtItem
+from .services.graph import (
+    OP_APP_DELETE, OP_EDGE_DELETE, app_change, edge_change, record_change,
+)
+from .services import search, summary
+from .services.page_cache import portfolio_changed
+
+
+def _on_commit(op):
+    # až po commitu: jinak by souběžný request mohl pod novou verzi uložit ještě stará data;
+    # op se skládá hned (po delete už instance nemá pk)
+    transaction.on_commit(lambda: record_change(op))
+    portfolio_changed()
+
+
+@receiver(pre_save, sender=Application)
+def application_saving(sender, instance, **kwargs):
+    summary.remember_old(instance)
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, created, update_fields=None, **kwargs):
+    # souhrn a fulltext hned (stejná transakce), graf až po commitu
+    summary.app_saved(instance, created, update_fields)
+    if update_fields is None or not search.SEARCH_FIELDS.isdisjoint(update_fields):
+        search.index_apps([instance.pk])
+    _on_commit(app_change(instance))
+
+
+@receiver(post_delete, sender=Application)
+def application_deleted(sender, instance, **kwargs):
+    summary.app_deleted(instance)
+    search.remove_apps([instance.pk])
+    _on_commit((OP_APP_DELETE, instance.pk))
+
+
+@receiver(post_save, sender=Integration)
+def integration_saved(sender, instance, **kwargs):
+    _on_commit(edge_change(instance))
+
+
+@receiver(post_delete, sender=Integration)
+def integration_deleted(sender, instance, **kwargs):
+    _on_commit((OP_EDGE_DELETE, instance.pk))
+
+
+# jen stránky (graf ani souhrn je nepoužívají)
+@receiver(post_save, sender=TechDebtItem)
+@receiver(post_delete, sender=TechDebtItem)
+def portfolio_item_changed(sender, **kwargs):
+    portfolio_changed()
+
+
+@receiver(post_save, sender=Capability)
+def capability_saved(sender, instance, created, **kwargs):
+    # přejmenování => názvy capabilities v indexu jejích aplikací
+    if not created:
+        search.index_apps(search.capability_app_ids([instance.pk]))
+    portfolio_changed()
+
+
+@receiver(pre_delete, sender=Capability)
+def capability_deleting(sender, instance, **kwargs):
+    # vazby M2M zmizí bez m2m_changed => aplikace si poznamenat předem
+    instance._search_app_ids = search.capability_app_ids([instance.pk])
+
+
+@receiver(post_delete, sender=Capability)
+def capability_deleted(sender, instance, **kwargs):
+    search.index_apps(getattr(instance, "_search_app_ids", []))
+    portfolio_changed()
+
+
+@receiver(m2m_changed, sender=Application.capabilities.through)
+def capabilities_changed(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._search_app_ids = search.capability_app_ids([instance.pk])
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        search.index_apps([instance.pk])
+    elif action == "post_clear":
+        search.index_apps(getattr(instance, "_search_app_ids", []))
+    else:
+        search.index_apps(list(pk_set or ()))
+    portfolio_changed()
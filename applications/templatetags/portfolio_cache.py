@@ -0,0 +1,35 @@
+from django import template
+
+from ..services.page_cache import cached_fragment
+
+register = template.Library()
+
+
+class PortfolioCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        vary_on = [v.resolve(context) for v in self.vary_on]
+        return cached_fragment(name, vary_on, lambda: self.nodelist.render(context))
+
+
+@register.tag("portfoliocache")
+def portfoliocache(parser, token):
+    """
+    {% portfoliocache "app_detail_integrations" app.id %} ... {% endportfoliocache %}
+    Obsah se cachuje podle verze portfolia a vary hodnot (viz services/page_cache.py).
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(("endportfoliocache",))
+    parser.delete_first_token()
+    return PortfolioCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(b) for b in bits[2:]],
+    )
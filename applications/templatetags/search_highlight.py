@@ -0,0 +1,15 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from ..services.search import HIGHLIGHT_END, HIGHLIGHT_START
+
+register = template.Library()
+
+
+@register.filter
+def fts_highlight(value):
+    """Text z FTS5 highlight()/snippet(): escapovat HTML, pak značky shody na <mark>."""
+    if not value:
+        return ""
+    return mark_safe(escape(value).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>"))
@@ -1,3 +1,649 @@
-from django.test import TestCase
+import asyncio
+import logging
+import re
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .checks import page_cache_backend_check, versioned_cache_check
+from .models import Application, Capability, Integration, Job, PortfolioSummary, TechDebtItem
+from .services import jobs, search, singleflight
+from .services.facets import get_facet_index
+from .services.llm_client import LLMError, llm_ask, reset_session
+from .services.llm_resilience import CircuitBreaker, counters, get_breaker, reset_breaker
+from .services.llm_stub import StubConfig, make_server
+from .services.mermaid import build_mermaid
+from .services.mermaid_check import check, parse
+from .services.pagination import encode_cursor, keyset_page
+from .services.sqlite_tuning import PROFILE_TUNED, sqlite_profile
+from .services.summary import rebuild_summary
+from .services.versions import GRAPH, bump, get_version
+from .views.pages.apps import APP_ORDERING
+from .views.pages.integrations import DUPLICATE_ERROR, _save
+
+# řádek EXPLAIN QUERY PLAN "SCAN t" (starší SQLite "SCAN TABLE t") = průchod celou tabulkou;
+# "SCAN t USING [COVERING] INDEX" je průchod celým indexem (v pořádku jen bez WHERE: řazení + LIMIT, GROUP BY)
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+WHERE_RE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+APP = "applications_application"
+INTEGRATION = "applications_integration"
+
+# max. dotazů na view se studenou cache; N+1 (dotaz na řádek) rozpočet přeroste s daty z fixture
+VIEW_BUDGETS = {
+    "dashboard": 2,
+    "app_list": 2,
+    "app_detail": 5,
+    "app_mermaid": 3,
+    "integration_list": 1,
+    "integration_create": 1,
+    "integration_edit": 2,
+    "graph": 2,
+    "impact": 2,
+    "sync_chains": 2,
+}
+
+
+def setUpModule():
+    # JSON řádky měření requestu by zaplnily výstup testů
+    logging.getLogger("applications.timing").setLevel(logging.WARNING)
+
+
+def tearDownModule():
+    logging.getLogger("applications.timing").setLevel(logging.NOTSET)
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(queries):
+    """
+    [(tabulka, sql)] pro SELECTy, které některou tabulku čtou celou: bez indexu vždy,
+    přes celý index, když dotaz filtruje (WHERE se pak vyhodnocuje řádek po řádku).
+    """
+    scans = []
+    for query in queries:
+        sql = query["sql"]
+        if not sql.lstrip().upper().startswith("SELECT"):
+            continue
+        filtered = bool(WHERE_RE.search(sql))
+        for detail in query_plan(sql):
+            match = SCAN_RE.match(detail)
+            if match and (filtered or " USING " not in detail):
+                scans.append((match.group(1), sql))
+    return scans
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class QueryPlanTests(TestCase):
+    """
+    Každý dotaz views a služeb musí jít přes index. Výjimky jsou jen záměrné načtení celé
+    tabulky jednou za verzi grafu (in-memory graf, matice toků na dashboardu).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.core = Application.objects.create(
+            name="Core Banking", domain="CoreBanking", criticality="High", lifecycle="Active",
+            environment="PROD", region="EU", hosting="on-prem", vendor="Temenos",
+            tech_stack="Java", runtime="Java", data_sensitivity="High", tech_debt_score=50,
+        )
+        cls.payments = Application.objects.create(
+            name="Payments Hub", domain="Payments", criticality="High", lifecycle="Active",
+            environment="PROD", region="EU", hosting="cloud", vendor="Internal",
+            tech_stack="Go", runtime="Go", data_sensitivity="High", tech_debt_score=70,
+        )
+        cls.cards = Application.objects.create(
+            name="Card Engine", domain="Cards", criticality="Medium", lifecycle="Active",
+            environment="UAT", region="US", hosting="cloud", vendor="Oracle",
+            tech_stack="Kotlin", runtime="JVM", data_sensitivity="Medium", tech_debt_score=20,
+        )
+        cls.integration = Integration.objects.create(
+            source_app=cls.core, target_app=cls.payments, integration_type="API",
+            direction="sync", daily_volume=1000,
+        )
+        Integration.objects.create(
+            source_app=cls.payments, target_app=cls.cards, integration_type="Message",
+            direction="async", daily_volume=300,
+        )
+        cls.core.capabilities.add(Capability.objects.create(name="Ledger"))
+        TechDebtItem.objects.create(
+            application=cls.core, category="Upgrade", severity="High", title="Java 8 runtime",
+        )
+
+    def setUp(self):
+        # verze, souhrny a grafy z cache by dotazy přeskočily
+        cache.clear()
+
+    def assertIndexedQueries(self, url, allowed=()):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        scans = [(table, sql) for table, sql in full_scans(ctx.captured_queries) if table not in allowed]
+        self.assertFalse(scans, f"{url}: full table scan\n" + "\n".join(f"{t}: {s}" for t, s in scans))
+        return ctx
+
+    def test_dashboard(self):
+        # matice toků záměrně agreguje všechny integrace (cache podle verze grafu)
+        self.assertIndexedQueries(reverse("dashboard"), allowed={INTEGRATION})
+
+    def test_app_list(self):
+        url = reverse("app_list")
+        self.assertIndexedQueries(url)
+        for param, value in [
+            ("domain", "Payments"), ("criticality", "High"), ("environment", "PROD"), ("region", "EU"),
+            ("hosting", "cloud"), ("vendor", "Oracle"), ("sensitivity", "High"),
+        ]:
+            self.assertIndexedQueries(f"{url}?{param}={value}")
+        self.assertIndexedQueries(f"{url}?domain=Payments&criticality=High&environment=PROD")
+
+    def test_app_list_pages_and_search(self):
+        url = reverse("app_list")
+        self.assertIndexedQueries(f"{url}?after={encode_cursor(['Core Banking', self.core.pk])}")
+        self.assertIndexedQueries(f"{url}?before={encode_cursor(['Payments Hub', self.payments.pk])}")
+        self.assertIndexedQueries(f"{url}?q=pay")
+        self.assertIndexedQueries(f"{url}?q=ledger&hosting=on-prem")
+
+    def test_app_detail(self):
+        self.assertIndexedQueries(reverse("app_detail", args=[self.core.pk]))
+        self.assertIndexedQueries(reverse("app_mermaid", args=[self.core.pk]))
+
+    def test_integration_list_and_forms(self):
+        url = reverse("integration_list")
+        self.assertIndexedQueries(url)
+        self.assertIndexedQueries(f"{url}?after={encode_cursor([1000, self.integration.pk])}")
+        self.assertIndexedQueries(reverse("integration_create"))
+        self.assertIndexedQueries(reverse("integration_edit", args=[self.integration.pk]))
+
+    def test_graph_views_load_graph_once(self):
+        # in-memory graf: jeden průchod aplikacemi a integracemi, pak už jen paměť
+        graph_tables = {APP, INTEGRATION}
+        for url in [
+            f"{reverse('graph')}?app={self.core.pk}",
+            f"{reverse('graph')}?mode=domains",
+            f"{reverse('impact')}?app={self.core.pk}",
+            reverse("sync_chains"),
+        ]:
+            ctx = self.assertIndexedQueries(url, allowed=graph_tables)
+            self.assertLessEqual(len(ctx), 2, url)
+
+    def test_summary_rebuild(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rebuild_summary()
+        self.assertEqual(full_scans(ctx.captured_queries), [])
+
+    def test_incremental_summary_matches_rebuild(self):
+        def stored():
+            s = PortfolioSummary.objects.get(pk=PortfolioSummary.SINGLETON_ID)
+            return s.total_apps, s.counts, s.debt_sum, s.top_debt
+
+        def create_app():
+            Application.objects.create(
+                name="Risk Engine", domain="Risk", criticality="High", lifecycle="Active", environment="PROD",
+                region="EU", hosting="cloud", vendor="SAS", tech_stack="Python", runtime="Python",
+                data_sensitivity="High", tech_debt_score=90,
+            )
+
+        def update_app():
+            # Payments vypadne z plného top-N => doplnění řádku z DB
+            self.payments.tech_debt_score, self.payments.criticality = 10, "Low"
+            self.payments.save()
+
+        def change_integrations():
+            integration = Integration.objects.create(
+                source_app=self.cards, target_app=self.core, integration_type="File", direction="async",
+            )
+            integration.daily_volume = 5
+            integration.save()
+            integration.delete()
+
+        # top-N menší než počet aplikací, aby se projevilo i doplňování
+        with mock.patch("applications.services.summary.top_size", return_value=2):
+            rebuild_summary()
+            for step in (create_app, update_app, change_integrations, self.core.delete):
+                step()
+                incremental = stored()
+                rebuild_summary()
+                self.assertEqual(incremental, stored(), step.__name__)
+
+    def test_facet_counts_with_filters(self):
+        facets, total = get_facet_index().facet_counts({"criticality": "High", "hosting": "cloud"})
+
+        def counts(param):
+            return {f["value"]: f["count"] for f in facets[param]}
+
+        self.assertEqual(total, 1)
+        # vlastní filtr se nepočítá => vidět jsou i alternativy k vybrané hodnotě
+        self.assertEqual(counts("criticality"), {"High": 1, "Medium": 1})
+        self.assertEqual(counts("hosting"), {"cloud": 1, "on-prem": 1})
+        self.assertEqual(counts("domain"), {"Cards": 0, "CoreBanking": 0, "Payments": 1})
+
+        facets, total = get_facet_index().facet_counts({"region": "APAC"})
+        self.assertEqual((total, counts("region")), (0, {"EU": 2, "US": 1, "APAC": 0}))
+
+    def test_keyset_pages_forward_and_back(self):
+        qs = Application.objects.all()
+
+        def page(**params):
+            p = keyset_page(qs, APP_ORDERING, {"page_size": "1", **params})
+            return p, [a.name for a in p.items], p.has_prev, p.has_next
+
+        first, *state = page()
+        self.assertEqual(state, [["Card Engine"], False, True])
+        second, *state = page(after=first.next_cursor)
+        self.assertEqual(state, [["Core Banking"], True, True])
+        last, *state = page(after=second.next_cursor)
+        self.assertEqual(state, [["Payments Hub"], True, False])
+        # zpět přes hranice stránek
+        back, *state = page(before=last.prev_cursor)
+        self.assertEqual(state, [["Core Banking"], True, True])
+        _, *state = page(before=back.prev_cursor)
+        self.assertEqual(state, [["Card Engine"], False, True])
+
+    def test_keyset_rejects_tampered_cursor(self):
+        for cursor in ["not a cursor", encode_cursor(["Core Banking"]), encode_cursor([{"name": "x"}, 1])]:
+            p = keyset_page(Application.objects.all(), APP_ORDERING, {"after": cursor})
+            self.assertEqual([a.name for a in p.items], ["Card Engine", "Core Banking", "Payments Hub"], cursor)
+            self.assertFalse(p.has_prev)
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 jen v SQLite")
+    def test_search_index_follows_rename_and_delete(self):
+        def found(q):
+            return sorted(search.search_filter(Application.objects.all(), q).values_list("name", flat=True))
+
+        self.assertTrue(search.search_enabled())
+        self.assertEqual(found("hub"), ["Payments Hub"])
+        self.payments.name = "Treasury Gateway"
+        self.payments.save()
+        self.assertEqual((found("hub"), found("treasury")), ([], ["Treasury Gateway"]))
+
+        self.cards.delete()
+        self.assertEqual(found("card"), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {search.SEARCH_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], Application.objects.count())
+
+    def test_seed_lookups(self):
+        # get_or_create v seed_portfolio hledá integraci podle trojice (unique constraint)
+        with CaptureQueriesContext(connection) as ctx:
+            Integration.objects.get_or_create(
+                source_app=self.core, target_app=self.payments, integration_type="API",
+            )
+            Application.objects.filter(name="Core Banking").first()
+            Integration.objects.filter(source_app=self.cards).exists()
+        self.assertEqual(full_scans(ctx.captured_queries), [])
+
+
+class QueryBudgetMixin:
+    """assertQueryBudget: request na url nesmí položit víc než `budget` dotazů."""
+
+    def assertQueryBudget(self, url, budget):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertLessEqual(
+            len(ctx), budget,
+            f"{url}: {len(ctx)} queries, budget {budget}\n" + "\n".join(q["sql"] for q in ctx.captured_queries),
+        )
+        return response
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fields = dict(
+            criticality="High", lifecycle="Active", environment="PROD", region="EU", hosting="cloud",
+            vendor="Internal", tech_stack="Go", runtime="Go", data_sensitivity="High",
+        )
+        cls.apps = [Application.objects.create(name=f"App {n}", domain=f"D{n % 3}", **fields) for n in range(8)]
+        hub = cls.hub = cls.apps[0]
+        capabilities = [Capability.objects.create(name=f"Cap {n}") for n in range(3)]
+        for n, app in enumerate(cls.apps[1:], 1):
+            # hub má několik odchozích i příchozích integrací => N+1 by byl vidět
+            Integration.objects.create(
+                source_app=hub, target_app=app, integration_type="API", direction="sync", daily_volume=n,
+            )
+            Integration.objects.create(
+                source_app=app, target_app=hub, integration_type="Message", direction="async", daily_volume=n,
+            )
+            app.capabilities.add(*capabilities)
+            TechDebtItem.objects.create(application=hub, category="Upgrade", severity="Low", title=f"Item {n}")
+        hub.capabilities.add(*capabilities)
+        cls.integration = Integration.objects.first()
+
+    def setUp(self):
+        cache.clear()
+
+    def url(self, name):
+        if name in ("app_detail", "app_mermaid"):
+            return reverse(name, args=[self.hub.pk])
+        if name == "integration_edit":
+            return reverse(name, args=[self.integration.pk])
+        if name in ("graph", "impact"):
+            return f"{reverse(name)}?app={self.hub.pk}"
+        return reverse(name)
+
+    def test_view_budgets(self):
+        for name, budget in VIEW_BUDGETS.items():
+            with self.subTest(view=name):
+                cache.clear()
+                self.assertQueryBudget(self.url(name), budget)
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url("app_detail"))
+        timing = response["Server-Timing"]
+        self.assertIn("db;dur=", timing)
+        self.assertIn(f'desc="{len(ctx)} queries"', timing)
+        self.assertIn("tpl;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+    def test_server_timing_marks_streaming(self):
+        response = self.client.get(f"{reverse('app_list')}?stream=1")
+        self.assertTrue(response.streaming)
+        self.assertRegex(response["Server-Timing"], r'^total;dur=[\d.]+;desc="until headers, body streamed"$')
+        b"".join(response.streaming_content)
+
+
+class IntegrationUniqueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fields = dict(
+            domain="Payments", criticality="High", lifecycle="Active", environment="PROD", region="EU",
+            hosting="cloud", vendor="Internal", tech_stack="Go", runtime="Go", data_sensitivity="High",
+        )
+        cls.source = Application.objects.create(name="Source", **fields)
+        cls.target = Application.objects.create(name="Target", **fields)
+        Integration.objects.create(
+            source_app=cls.source, target_app=cls.target, integration_type="API", direction="sync",
+        )
+
+    def test_duplicate_triple_rejected(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Integration.objects.create(
+                source_app=self.source, target_app=self.target, integration_type="API", direction="async",
+            )
+        # jiný typ mezi stejnou dvojicí je v pořádku
+        Integration.objects.create(
+            source_app=self.source, target_app=self.target, integration_type="File", direction="async",
+        )
+
+    def test_create_form_reports_duplicate(self):
+        response = self.client.post(reverse("integration_create"), {
+            "source_app": self.source.pk, "target_app": self.target.pk,
+            "integration_type": "API", "direction": "sync", "daily_volume": "10",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, DUPLICATE_ERROR)
+        self.assertEqual(Integration.objects.count(), 1)
+
+    def test_other_integrity_error_propagates(self):
+        # NOT NULL, ne unique trojice => chyba se nemaskuje jako duplicita
+        integration = Integration(
+            source_app=self.source, target_app=self.target, integration_type=None, direction="sync",
+        )
+        with self.assertRaises(IntegrityError):
+            _save(integration)
+
+
+class PageCacheCheckTests(TestCase):
+    LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    SHARED = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": "/tmp/x"}}
+
+    def warnings(self):
+        return [m.id for m in page_cache_backend_check(None)]
+
+    def test_per_process_backend_warns(self):
+        with override_settings(CACHES=self.LOCMEM, PAGE_CACHE_ENABLED=True):
+            self.assertEqual(self.warnings(), ["applications.W001"])
+        with override_settings(CACHES=self.LOCMEM, PAGE_CACHE_ENABLED=False):
+            self.assertEqual(self.warnings(), [])
+        with override_settings(CACHES=self.SHARED, PAGE_CACHE_ENABLED=True):
+            self.assertEqual(self.warnings(), [])
+
+    def test_versions_without_expiry_warn(self):
+        with override_settings(CACHES=self.LOCMEM, CACHE_LOCAL_VERSION_SECONDS=0):
+            self.assertEqual([m.id for m in versioned_cache_check(None)], ["applications.W002"])
+        with override_settings(CACHES=self.LOCMEM, CACHE_LOCAL_VERSION_SECONDS=60):
+            self.assertEqual(versioned_cache_check(None), [])
+        with override_settings(CACHES=self.SHARED, CACHE_LOCAL_VERSION_SECONDS=0):
+            self.assertEqual(versioned_cache_check(None), [])
+
+    def test_local_version_expires(self):
+        with override_settings(CACHES=self.LOCMEM, CACHE_LOCAL_VERSION_SECONDS=60):
+            version = bump(GRAPH)
+            self.assertEqual(get_version(GRAPH), version)
+            # po vypršení klíče nová verze => ostatní procesy znovu načtou graf i výsledky
+            with mock.patch("django.core.cache.backends.locmem.time.time", return_value=time.time() + 61):
+                self.assertNotEqual(get_version(GRAPH), version)
+
+
+@skipUnless(sqlite_profile() == PROFILE_TUNED, "SQLITE_PROFILE=default")
+class SQLiteProfileTests(TestCase):
+    def test_connection_pragmas(self):
+        # in-memory testovací DB: journal_mode zůstává "memory", ostatní PRAGMA platí
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_BUSY_TIMEOUT_MS)
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -settings.SQLITE_CACHE_SIZE_KB)
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+
+class MermaidCheckTests(SimpleTestCase):
+    def errors(self, code):
+        return [(e.code, e.line) for e in parse(code).errors]
+
+    def test_parse_error_codes_and_lines(self):
+        self.assertEqual(self.errors("```mermaid\nflowchart LR\n  a --> b\n```"), [("fence", 1), ("fence", 4)])
+        self.assertEqual(self.errors("a --> b"), [("header", 1)])
+        self.assertEqual(self.errors('flowchart LR\n  a["Core "X" Bank"]'), [("label", 2)])
+        self.assertEqual(self.errors("flowchart LR\n  a --> b\n  end"), [("subgraph", 3)])
+        self.assertEqual(self.errors("flowchart LR\n  direction TB"), [("subgraph", 2)])
+        self.assertEqual(self.errors("flowchart LR\n  subgraph s\n    direction TB\n  end"), [])
+
+    def test_repair_round_trips(self):
+        code, diagram, fixes = check('flowchart LR\n  app_1["Core "X" Bank"] --> app_2')
+        self.assertTrue(diagram.ok)
+        self.assertIn('app_1["Core #quot;X#quot; Bank"]', code)
+        self.assertEqual(diagram.nodes["app_1"], "Core #quot;X#quot; Bank")
+        self.assertTrue(fixes)
+
+        code, diagram, fixes = check("flowchart LR\n  app_1[Core (legacy)] --> app_2")
+        self.assertTrue(diagram.ok)
+        self.assertIn('app_1["Core (legacy)"]', code)
+
+    def test_quoted_edge_label_keeps_pipe(self):
+        diagram = parse('flowchart LR\n  a -->|"File|Batch"| b')
+        self.assertTrue(diagram.ok)
+        self.assertEqual(diagram.edges, [("a", "b", "File|Batch")])
+        self.assertFalse(parse("flowchart LR\n  a -->|File|Batch| b").ok)
+
+    def test_text_labels_chains_and_groups(self):
+        diagram = parse("flowchart LR\n  a -- calls --> b\n  a --> b & c\n  c -. async .-> d --> e")
+        self.assertTrue(diagram.ok, diagram.errors)
+        self.assertEqual(diagram.edges, [
+            ("a", "b", "calls"), ("a", "b", ""), ("a", "c", ""), ("c", "d", "async"), ("d", "e", ""),
+        ])
+
+    def test_build_mermaid_escapes_names(self):
+        core = Application(id=1, name='Core "X" | Bank')
+        hub = Application(id=2, name='Hub "Y"')
+        outbound = [Integration(source_app=core, target_app=hub, integration_type='File|"Batch"')]
+        diagram = parse(build_mermaid(core, [], outbound))
+        self.assertTrue(diagram.ok, diagram.errors)
+        self.assertEqual(diagram.edges, [("app_1", "app_2", "File#124;#quot;Batch#quot;")])
+
+
+class LLMResilienceTests(SimpleTestCase):
+    """Sync klient proti lokálnímu stubu (llm_stub) ve vlákně."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = make_server(port=0, config=StubConfig(latency_ms=0))
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        reset_session()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.stub = self.server.state
+        self.stub.config = StubConfig(latency_ms=0, seed=1)
+        self.stub.counters = dict.fromkeys(self.stub.counters, 0)
+        overrides = override_settings(
+            LLM_API_BASE=f"http://127.0.0.1:{self.server.server_port}/v1", LLM_API_KEY="x",
+            LLM_MAX_RETRIES=0, LLM_BREAKER_THRESHOLD=3, LLM_HEDGE_AFTER_SECONDS=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        for reset in (reset_session, reset_breaker, counters.reset):
+            reset()
+            self.addCleanup(reset)
+
+    def test_breaker_opens_after_threshold(self):
+        self.stub.config.rate_5xx = 1.0
+        for _ in range(3):
+            with self.assertRaisesRegex(LLMError, "HTTP 50"):
+                llm_ask("What are the main risks?", use_cache=False)
+        self.assertEqual(get_breaker().state, CircuitBreaker.OPEN)
+        with self.assertRaisesRegex(LLMError, "circuit breaker"):
+            llm_ask("What are the main risks?", use_cache=False)
+        self.assertEqual(self.stub.counters["requests"], 3)
+        self.assertEqual(counters.snapshot()["short_circuited"], 1)
+
+    def test_429_waits_retry_after(self):
+        self.stub.config.rate_429 = 1.0
+        self.stub.config.retry_after = 2
+        with override_settings(LLM_MAX_RETRIES=1), mock.patch("applications.services.llm_client.time") as clock:
+            with self.assertRaisesRegex(LLMError, "HTTP 429"):
+                llm_ask("What are the main risks?", use_cache=False)
+        clock.sleep.assert_called_once_with(2.0)
+        self.assertEqual(self.stub.counters["http_429"], 2)
+
+        # Retry-After delší než LLM_BACKOFF_MAX_SECONDS => bez dalšího pokusu
+        with override_settings(LLM_MAX_RETRIES=1, LLM_BACKOFF_MAX_SECONDS=1):
+            with self.assertRaisesRegex(LLMError, "HTTP 429"):
+                llm_ask("What are the main risks?", use_cache=False)
+        self.assertEqual(self.stub.counters["http_429"], 3)
+
+    def test_hedge_after_delay(self):
+        with override_settings(LLM_HEDGE_AFTER_SECONDS=0.05):
+            self.assertTrue(llm_ask("What are the main risks?", use_cache=False))
+            self.assertNotIn("hedged", counters.snapshot())
+
+            self.stub.config.latency_ms = 300
+            self.assertTrue(llm_ask("What are the main risks?", use_cache=False))
+        self.assertEqual(counters.snapshot()["hedged"], 1)
+        self.assertEqual(self.stub.counters["requests"], 3)
+
+
+class SingleFlightTests(SimpleTestCase):
+    KEY = "test:singleflight"
+
+    def setUp(self):
+        cache.delete_many([self.KEY, f"{self.KEY}:sf-lock"])
+
+    def test_concurrent_acached_compute_once(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "value"
+
+        async def run():
+            return await asyncio.gather(*(singleflight.acached(self.KEY, compute, 60) for _ in range(10)))
+
+        self.assertEqual(asyncio.run(run()), ["value"] * 10)
+        self.assertEqual(len(calls), 1)
+
+    def test_acached_serves_stale_while_revalidating(self):
+        singleflight.store(self.KEY, "old", ttl=0, stale_ttl=60)
+
+        async def compute():
+            return "new"
+
+        async def run():
+            values = [await singleflight.acached(self.KEY, compute, 60, 60) for _ in range(3)]
+            await asyncio.gather(*singleflight._background)
+            return values
+
+        self.assertEqual(asyncio.run(run()), ["old"] * 3)
+        entry = singleflight.get_entry(self.KEY)
+        self.assertEqual((entry.value, entry.fresh), ("new", True))
+
+    def test_cached_refreshes_stale_in_one_thread(self):
+        singleflight.store(self.KEY, "old", ttl=0, stale_ttl=60)
+        release, calls = threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "new"
+
+        # přepočet visí => další stale zásahy už žádné vlákno nespouští
+        with mock.patch.object(threading, "Thread", wraps=threading.Thread) as thread:
+            self.assertEqual([singleflight.cached(self.KEY, compute, 60, 60) for _ in range(5)], ["old"] * 5)
+        self.assertEqual(thread.call_count, 1)
+        self.assertTrue(cache.get(f"{self.KEY}:sf-lock"))
+        release.set()
+        deadline = time.monotonic() + 5
+        while not singleflight.get_entry(self.KEY).fresh and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(singleflight.cached(self.KEY, compute, 60, 60), "new")
+        self.assertEqual(len(calls), 1)
+
+
+@override_settings(LLM_JOB_TIMEOUT_SECONDS=300, LLM_JOB_MAX_ATTEMPTS=2)
+class JobQueueTests(TestCase):
+    def test_enqueue_dedupes_active_job(self):
+        job = jobs.enqueue_qa("Which apps run in PROD?")
+        self.assertEqual(jobs.enqueue_qa("  which apps run in prod? ").pk, job.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind=job.kind, dedupe_key=job.dedupe_key)
+
+        # souběžný enqueue: druhý nevidí úlohu při dotazu, INSERT narazí na constraint
+        with mock.patch.object(jobs, "_active_job", side_effect=[None, job]):
+            self.assertEqual(jobs.enqueue_qa("Which apps run in PROD?").pk, job.pk)
+
+        Job.objects.filter(pk=job.pk).update(status=Job.STATUS_DONE)
+        self.assertNotEqual(jobs.enqueue_qa("Which apps run in PROD?").pk, job.pk)
+
+    def test_claim_takes_oldest_once(self):
+        first, second = jobs.enqueue_analysis(), jobs.enqueue_mermaid(1)
+        claimed = jobs.claim_next("w1")
+        self.assertEqual((claimed.pk, claimed.status, claimed.worker, claimed.attempts),
+                         (first.pk, Job.STATUS_RUNNING, "w1", 1))
+        self.assertEqual(jobs.claim_next("w2").pk, second.pk)
+        self.assertIsNone(jobs.claim_next("w3"))
+
+    def test_stale_job_requeued_then_failed(self):
+        job = jobs.enqueue_analysis()
+        for expected in [(1, 0), (0, 1)]:
+            self.assertEqual(jobs.claim_next("w1").pk, job.pk)
+            # nedoběhl včas (spadlý worker)
+            Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(seconds=301))
+            self.assertEqual(jobs.requeue_stale(), expected)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_FAILED, 2))
@@ -2,10 +2,16 @@ from django.urls import path
 from django.views.generic import RedirectView
 from .views.pages.dashboard import dashboard_view
 from .views.pages.apps import application_list, application_detail
-from .services.mermaid import application_mermaid_llm
-from .services.llm_client import llm_ask
-from .views.pages.qa import qa_view
+from .services.mermaid import application_mermaid, application_mermaid_llm
+from .views.pages.qa import qa_view, llm_ask
 from .views.pages.analysis import analysis_view
+from .views.pages.graph import graph_view
+from .views.pages.impact import impact_view
+from .views.pages.sync_chains import sync_chains_view
+from .views.pages.cache_stats import page_cache_stats
+from .views.pages.jobs import (
+    job_status, enqueue_analysis_job, enqueue_qa_job, enqueue_mermaid_job, enqueue_description_job
+)
 from .views.pages.integrations import (
     integration_list, integration_create, integration_edit, integration_delete
 )
@@ -14,13 +20,23 @@ urlpatterns = [
     path("", dashboard_view, name="dashboard"),  # homepage = dashboard
     path("apps/", application_list, name="app_list"),
     path("apps/<int:pk>/", application_detail, name="app_detail"),
+    path("apps/<int:pk>/mermaid/", application_mermaid, name="app_mermaid"),
     path("apps/<int:pk>/mermaid-llm/", application_mermaid_llm, name="app_mermaid_llm"),
+    path("graph/", graph_view, name="graph"),
+    path("impact/", impact_view, name="impact"),
+    path("graph/sync-chains/", sync_chains_view, name="sync_chains"),
     path("analysis/", analysis_view, name="analysis"),
     path("qa/", qa_view, name="qa"),
     path("llm/ask/", llm_ask, name="llm_ask"),
+    path("jobs/<int:pk>/", job_status, name="job_status"),
+    path("jobs/analysis/", enqueue_analysis_job, name="job_analysis"),
+    path("jobs/qa/", enqueue_qa_job, name="job_qa"),
+    path("jobs/apps/<int:pk>/mermaid/", enqueue_mermaid_job, name="job_mermaid"),
+    path("jobs/apps/<int:pk>/description/", enqueue_description_job, name="job_description"),
     path("integrations/", integration_list, name="integration_list"),
     path("integrations/create/", integration_create, name="integration_create"),
     path("integrations/<int:pk>/edit/", integration_edit, name="integration_edit"),
     path("integrations/<int:pk>/delete/", integration_delete, name="integration_delete"),
+    path("cache/stats/", page_cache_stats, name="page_cache_stats"),
     path("dashboard/", RedirectView.as_view(pattern_name="dashboard", permanent=False)),
 ]
\ No newline at end of file
@@ -1,13 +1,76 @@
-import json
 import logging
+from django.conf import settings
 from django.shortcuts import render
+from django.urls import reverse
+from django.http import StreamingHttpResponse
 from django.core.cache import cache
-from django.db.models import Count
-from ...models import Application
-from ...services.llm_client import ask_llm, LLMError
+from ...services.llm_client import aask_llm, astream_llm, LLMError
+from ...services.prompt_budget import PromptBuilder, compact_counts, get_max_rows
+from ...services.singleflight import aget_entry, aflight, arefresh_in_background
+from ...services.jobs import jobs_enabled, aenqueue_analysis
+from ...services.summary import aget_summary
+from .jobs import follow_job
+from ..sse import sse_event, sse_response
 
 logger = logging.getLogger(__name__)
-def analysis_view(request):
+
+ANALYSIS_CACHE_KEY = "analysis:latest"
+# čerstvost analýzy (5 minut); pak ještě ANALYSIS_STALE_SECONDS vracíme starou a přepočítáme na pozadí
+ANALYSIS_TTL_SECONDS = 300
+
+
+def _stale_seconds() -> int:
+    return int(getattr(settings, "ANALYSIS_STALE_SECONDS", 3600))
+
+
+async def _build_analysis_prompt():
+    # agregace i top tech debt z materializovaného souhrnu (1 dotaz)
+    summary = await aget_summary()
+    total_apps = summary.total_apps
+
+    # zúžené agregace (top 6)
+    by_domain = summary.top_counts("domain", 6)
+    by_criticality = summary.top_counts("criticality", 6)
+    by_env = summary.top_counts("environment", 6)
+
+    # aplikace od nejvyššího tech debt; kolik se jich vejde, určí token budget
+    sample_apps = [tuple(row) for row in summary.top_debt[:get_max_rows()]]
+
+    builder = PromptBuilder("analysis")
+    builder.add(
+        "Jsi senior enterprise architekt banky. "
+        "Na základě dat proveď rychlou analýzu aplikačního portfolia.\n\n"
+        "Piš česky a stručně. Max 250–350 slov.\n\n"
+        "FORMÁT:\n"
+        "1) Shrnutí (2–3 věty)\n"
+        "2) 3 hlavní rizika (odrážky)\n"
+        "3) Top 5 aplikací k modernizaci (ID + název + 1 věta proč)\n"
+        "4) 3 doporučené další kroky\n\n"
+        "DATA:\n"
+        f"total_apps={total_apps}\n"
+        f"top_by_domain: {compact_counts(by_domain)}\n"
+        f"top_by_criticality: {compact_counts(by_criticality)}\n"
+        f"top_by_environment: {compact_counts(by_env)}\n"
+    )
+    builder.add_table("apps", ("id", "name", "domain", "crit", "env", "debt"), sample_apps)
+    return builder.build()
+
+
+async def _compute_analysis():
+    return await aask_llm(await _build_analysis_prompt())
+
+
+async def _rate_limited(request) -> bool:
+    # rate limit 1 request / 10s / IP
+    ip = request.META.get("REMOTE_ADDR")
+    cache_key = f"analysis:rl:{ip}"
+    if await cache.aget(cache_key):
+        return True
+    await cache.aset(cache_key, True, timeout=10)
+    return False
+
+
+async def analysis_view(request):
     """
     Globální LLM analýza portfolia:
     - shrnutí
@@ -16,79 +79,63 @@ def analysis_view(request):
 
     Optimalizace proti timeoutům:
     - posílá menší subset dat
-    - cachuje výsledek
+    - cachuje výsledek (stale-while-revalidate, souběžné requesty sdílí jeden LLM call)
+    - async view: během čekání na LLM neblokuje worker (ASGI)
+    - streaming (LLM_STREAMING): stránka se vrátí hned a text dotéká přes SSE (?stream=1)
+    - LLM_JOBS_ENABLED: analýzu počítá worker, stránka sleduje úlohu (/jobs/<id>/?stream=1)
     """
 
     result = None
     error = None
 
-    # cache celé analýzy na 5 minut (ať se to zbytečně negeneruje)
-    cached = cache.get("analysis:latest")
+    # stale-while-revalidate: prošlá analýza se vrátí hned a přepočítá se na pozadí (jen jednou)
+    entry = await aget_entry(ANALYSIS_CACHE_KEY)
+    if entry is not None and not entry.fresh:
+        if jobs_enabled():
+            await aenqueue_analysis()
+        else:
+            arefresh_in_background(ANALYSIS_CACHE_KEY, _compute_analysis, ANALYSIS_TTL_SECONDS, _stale_seconds())
+    cached = entry.value if entry else None
+
+    if jobs_enabled() and not cached:
+        # LLM volá worker (run_llm_worker); stránka jen sleduje úlohu
+        job = await aenqueue_analysis()
+        if request.GET.get("stream") == "1":
+            return follow_job(job.pk)
+        return render(request, "applications/analysis.html", {
+            "result": None,
+            "error": None,
+            "streaming": True,
+            "stream_url": reverse("job_status", args=[job.pk]) + "?stream=1",
+        })
+
+    if request.GET.get("stream") == "1":
+        return await _analysis_stream(request, cached)
+
     if cached:
         return render(request, "applications/analysis.html", {"result": cached, "error": None})
 
+    if getattr(settings, "LLM_STREAMING", True):
+        # prázdná stránka + JS, který si text stáhne streamem
+        return render(request, "applications/analysis.html", {"result": None, "error": None, "streaming": True})
+
     try:
-        # rate limit 1 request / 10s / IP
-        ip = request.META.get("REMOTE_ADDR")
-        cache_key = f"analysis:rl:{ip}"
-        if cache.get(cache_key):
+        if await _rate_limited(request):
             return render(request, "applications/analysis.html", {
                 "result": None,
                 "error": "Zkus to prosím za chvíli (rate limit).",
             })
-        cache.set(cache_key, True, timeout=10)
-
-        total_apps = Application.objects.count()
-
-        # zúžené agregace (top 6)
-        by_domain = list(
-            Application.objects.values("domain")
-            .annotate(cnt=Count("id"))
-            .order_by("-cnt")[:6]
-        )
-
-        by_criticality = list(
-            Application.objects.values("criticality")
-            .annotate(cnt=Count("id"))
-            .order_by("-cnt")[:6]
-        )
-
-        by_env = list(
-            Application.objects.values("environment")
-            .annotate(cnt=Count("id"))
-            .order_by("-cnt")[:6]
-        )
-
-        # malý sample (15) jen s klíčovými poli
-        sample_apps = list(
-            Application.objects.values("id", "name", "domain", "criticality", "environment")[:15]
-        )
-
-        portfolio_context = {
-            "total_apps": total_apps,
-            "top_by_domain": by_domain,
-            "top_by_criticality": by_criticality,
-            "top_by_environment": by_env,
-            "sample_apps": sample_apps,
-        }
-
-        prompt = (
-            "Jsi senior enterprise architekt banky. "
-            "Na základě dat proveď rychlou analýzu aplikačního portfolia.\n\n"
-            "Piš česky a stručně. Max 250–350 slov.\n\n"
-            "FORMÁT:\n"
-            "1) Shrnutí (2–3 věty)\n"
-            "2) 3 hlavní rizika (odrážky)\n"
-            "3) Top 5 aplikací k modernizaci (ID + název + 1 věta proč)\n"
-            "4) 3 doporučené další kroky\n\n"
-            "DATA:\n"
-            f"{json.dumps(portfolio_context, ensure_ascii=False)}"
-        )
-
-        result = ask_llm(prompt)
-
-        # ulož do cache na 5 minut
-        cache.set("analysis:latest", result, timeout=300)
+
+        # single-flight: souběžné requesty čekají na jeden LLM call
+        async with aflight(ANALYSIS_CACHE_KEY, ANALYSIS_TTL_SECONDS, _stale_seconds()) as flight:
+            if flight.leader:
+                entry = await aget_entry(ANALYSIS_CACHE_KEY)
+                result = entry.value if entry and entry.fresh else None
+            else:
+                result = await flight.wait()
+            if result is None:
+                result = await _compute_analysis()
+                await flight.publish(result)
 
     except LLMError as e:
         error = f"LLM chyba: {str(e)}"
@@ -96,4 +143,54 @@ def analysis_view(request):
         logger.exception("Unexpected error in analysis_view")
         error = "Nastala neočekávaná chyba."
 
-    return render(request, "applications/analysis.html", {"result": result, "error": error})
\ No newline at end of file
+    return render(request, "applications/analysis.html", {"result": result, "error": error})
+
+
+def _replay(text) -> StreamingHttpResponse:
+    async def replay():
+        yield sse_event(text)
+        yield sse_event({}, event="done")
+    return sse_response(replay())
+
+
+async def _analysis_stream(request, cached) -> StreamingHttpResponse:
+    if cached:
+        return _replay(cached)
+
+    if await _rate_limited(request):
+        async def limited():
+            yield sse_event("Zkus to prosím za chvíli (rate limit).", event="error")
+        return sse_response(limited())
+
+    async def events():
+        try:
+            # single-flight: streamuje jen leader, ostatní dostanou hotový text najednou
+            async with aflight(ANALYSIS_CACHE_KEY, ANALYSIS_TTL_SECONDS, _stale_seconds()) as flight:
+                if flight.leader:
+                    # mezitím mohl výsledek uložit předchozí leader
+                    entry = await aget_entry(ANALYSIS_CACHE_KEY)
+                    result = entry.value if entry and entry.fresh else None
+                else:
+                    result = await flight.wait()
+                if result is not None:
+                    yield sse_event(result)
+                    yield sse_event({}, event="done")
+                    return
+
+                parts = []
+                prompt = await _build_analysis_prompt()
+                async for chunk in astream_llm(prompt):
+                    parts.append(chunk)
+                    yield sse_event(chunk)
+
+                # ulož do cache (až po dokončení streamu)
+                await flight.publish("".join(parts))
+            yield sse_event({}, event="done")
+
+        except LLMError as e:
+            yield sse_event(f"LLM chyba: {str(e)}", event="error")
+        except Exception:
+            logger.exception("Unexpected error in analysis stream")
+            yield sse_event("Nastala neočekávaná chyba.", event="error")
+
+    return sse_response(events())
@@ -1,81 +1,73 @@
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
 from ...models import Application
+from ...services.facets import FACETS, build_facet_index, get_facet_index
+from ...services.page_cache import cached_page
+from ...services.pagination import keyset_page, stream_list
+from ...services.search import ranked, search_filter
 
+APP_ORDERING = ("name", "id")
 
 
+
+@cached_page("app_list")
 def application_list(request):
-    qs = Application.objects.all().order_by("name")
+    qs = Application.objects.all()
 
     q = request.GET.get("q", "").strip()
-    domain = request.GET.get("domain", "").strip()
-    criticality = request.GET.get("criticality", "").strip()
-    environment = request.GET.get("environment", "").strip()
-    region = request.GET.get("region", "").strip()
-    hosting = request.GET.get("hosting", "").strip()
-    vendor = request.GET.get("vendor", "").strip()
-    sensitivity = request.GET.get("sensitivity", "").strip()
+    selected = {param: request.GET.get(param, "").strip() for param, _ in FACETS}
 
+    # fulltext (FTS5, bez něj icontains)
     if q:
-        qs = qs.filter(
-            Q(name__icontains=q) |
-            Q(domain__icontains=q) |
-            Q(vendor__icontains=q) |
-            Q(tech_stack__icontains=q)
-        )
-
-    if domain:
-        qs = qs.filter(domain=domain)
-
-    if criticality:
-        qs = qs.filter(criticality=criticality)
-
-    if environment:
-        qs = qs.filter(environment=environment)
-
-    if region:
-        qs = qs.filter(region=region)
-
-    if hosting:
-        qs = qs.filter(hosting=hosting)
+        qs = search_filter(qs, q)
 
-    if vendor:
-        qs = qs.filter(vendor=vendor)
+    # facety celého portfolia z cache (verze portfolia); s fulltextem 1 GROUP BY nad výsledky hledání
+    index = get_facet_index()
+    total_count = index.total
+    if q:
+        index = build_facet_index(qs)
+    facets, filtered_count = index.facet_counts(selected)
 
-    if sensitivity:
-        qs = qs.filter(data_sensitivity=sensitivity)
+    for param, field in FACETS:
+        if selected[param]:
+            qs = qs.filter(**{field: selected[param]})
 
-    # hodnoty pro dropdowny (unikátní + seřazené)
+    # hodnoty pro dropdowny (unikátní + seřazené) s počty podle ostatních aktivních filtrů
     context = {
-        "apps": qs,
-        "filters": {
-            "q": q,
-            "domain": domain,
-            "criticality": criticality,
-            "environment": environment,
-            "region": region,
-            "hosting": hosting,
-            "vendor": vendor,
-            "sensitivity": sensitivity,
-        },
-        "domains": sorted(Application.objects.values_list("domain", flat=True).distinct()),
-        "criticalities": sorted(Application.objects.values_list("criticality", flat=True).distinct()),
-        "environments": sorted(Application.objects.values_list("environment", flat=True).distinct()),
-        "regions": sorted(Application.objects.values_list("region", flat=True).distinct()),
-        "hostings": sorted(Application.objects.values_list("hosting", flat=True).distinct()),
-        "vendors": sorted(Application.objects.values_list("vendor", flat=True).distinct()),
-        "sensitivities": sorted(Application.objects.values_list("data_sensitivity", flat=True).distinct()),
-        "total_count": Application.objects.count(),
-        "filtered_count": qs.count(),
+        "filters": {"q": q, **selected},
+        "domains": facets["domain"],
+        "criticalities": facets["criticality"],
+        "environments": facets["environment"],
+        "regions": facets["region"],
+        "hostings": facets["hosting"],
+        "vendors": facets["vendor"],
+        "sensitivities": facets["sensitivity"],
+        "total_count": total_count,
+        "filtered_count": filtered_count,
     }
+
+    # s hledáním podle relevance (bm25) se zvýrazněním, jinak podle (name, id)
+    ordering = APP_ORDERING
+    if q:
+        qs, ordering = ranked(qs)
+
+    # ?stream=1: všechny řádky po dávkách, jinak stránka podle kurzoru
+    if request.GET.get("stream") == "1":
+        return stream_list(
+            request, "applications/app_list.html", "applications/app_list_rows.html",
+            context, qs.order_by(*ordering),
+        )
+    page = keyset_page(qs, ordering, request.GET)
+    context.update({"apps": page.items, "page": page})
     return render(request, "applications/app_list.html", context)
 
 
 def application_detail(request, pk):
+    # stránka má {% csrf_token %} => cachují se jen fragmenty v šabloně ({% portfoliocache %})
     app = get_object_or_404(Application, pk=pk)
 
-    outbound = app.outbound_integrations.all()
-    inbound = app.inbound_integrations.all()
+    # lazy querysety s join na protější aplikaci (bez N+1); vyhodnotí se jen při miss fragmentu
+    outbound = app.outbound_integrations.select_related("target_app")
+    inbound = app.inbound_integrations.select_related("source_app")
 
     return render(
         request,
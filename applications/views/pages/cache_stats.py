@@ -0,0 +1,10 @@
+from django.http import JsonResponse
+from ...services.page_cache import stats, reset_stats
+
+
+def page_cache_stats(request):
+    """Hit/miss statistiky cache stránek tohoto procesu (?reset=1 je vynuluje)."""
+    data = stats()
+    if request.GET.get("reset") == "1":
+        reset_stats()
+    return JsonResponse(data)
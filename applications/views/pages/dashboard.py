@@ -1,33 +1,35 @@
 from django.shortcuts import render
-from django.db.models import Count, Avg
-from ...models import Application
+from ...services.flow_matrix import get_flow_matrices
+from ...services.summary import get_summary
+from ...services.page_cache import cached_page
 
+@cached_page("dashboard")
 def dashboard_view(request):
-    total_apps = Application.objects.count()
-
-    criticality_counts_qs = (
-        Application.objects.values("criticality")
-        .annotate(c=Count("id"))
-        .order_by("-c")
-    )
-    env_counts_qs = (
-        Application.objects.values("environment")
-        .annotate(c=Count("id"))
-        .order_by("-c")
-    )
+    # všechny agregace z materializovaného souhrnu (1 dotaz, udržují ho signály)
+    summary = get_summary()
+    total_apps = summary.total_apps
+
+    criticality_counts = summary.top_counts("criticality")
+    env_counts = summary.top_counts("environment")
 
     # jednoduché "top 5" – nejvyšší tech debt score
-    top_debt = Application.objects.order_by("-tech_debt_score")[:5]
+    top_debt = [
+        dict(zip(("id", "name", "domain", "criticality", "environment", "tech_debt_score"), row))
+        for row in summary.top_debt[:5]
+    ]
 
     # průměrný tech debt (jen pro rychlou metriku)
-    avg_debt = Application.objects.aggregate(avg=Avg("tech_debt_score"))["avg"] or 0
+    avg_debt = summary.avg_debt
 
     # převeď na dicty pro Chart.js
-    criticality_labels = [x["criticality"] or "N/A" for x in criticality_counts_qs]
-    criticality_values = [x["c"] for x in criticality_counts_qs]
+    criticality_labels = [value or "N/A" for value, _ in criticality_counts]
+    criticality_values = [c for _, c in criticality_counts]
+
+    env_labels = [value or "N/A" for value, _ in env_counts]
+    env_values = [c for _, c in env_counts]
 
-    env_labels = [x["environment"] or "N/A" for x in env_counts_qs]
-    env_values = [x["c"] for x in env_counts_qs]
+    # matice toků doména/region/hosting (NumPy, cache podle verze grafu)
+    flows = get_flow_matrices()
 
     context = {
         "total_apps": total_apps,
@@ -37,5 +39,7 @@ def dashboard_view(request):
         "criticality_values": criticality_values,
         "env_labels": env_labels,
         "env_values": env_values,
+        "flows": flows,
+        "top_domain_flows": flows["matrices"]["domain"]["top_flows"],
     }
     return render(request, "applications/dashboard.html", context)
\ No newline at end of file
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render
+from ...services.graph import get_graph, DIRECTIONS, DIRECTION_BOTH, METRICS, METRIC_PAGERANK
+from ...services.mermaid import build_neighbourhood_mermaid, build_domain_mermaid
+
+MAX_HOPS = 5
+MAX_TOP = 200
+
+
+def _int(value, default, low, high):
+    try:
+        return max(low, min(high, int(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _resolve_roots(graph, values):
+    """Hodnoty ?app= (ID nebo přesný název) -> indexy uzlů; bez dotazů do DB."""
+    by_name = None
+    roots, unknown = [], []
+    for value in (v for raw in values for v in raw.split(",")):
+        value = value.strip()
+        if not value:
+            continue
+        if value.isdigit() and int(value) in graph.pos:
+            roots.append(graph.pos[int(value)])
+            continue
+        if by_name is None:
+            by_name = {graph.names[i].lower(): i for i in graph.alive_nodes()}
+        i = by_name.get(value.lower())
+        if i is None:
+            unknown.append(value)
+        else:
+            roots.append(i)
+    return list(dict.fromkeys(roots)), unknown
+
+
+def graph_view(request):
+    """
+    Diagram portfolia z in-memory indexu grafu:
+    - ?app=<id|název>&hops=2&direction=out|in|both&min_volume=1000 => N-hop okolí (subgraph po doménách)
+    - ?mode=domains => mapa doména -> doména
+    - ?mode=rankings&metric=pagerank|degree|volume|betweenness&top=20 => nejvýznamnější aplikace (NumPy)
+    - ?format=mermaid|json => jen kód diagramu / data
+    """
+    graph = get_graph()
+    mode = request.GET.get("mode", "neighbourhood")
+    hops = _int(request.GET.get("hops"), 1, 1, MAX_HOPS)
+    direction = request.GET.get("direction", DIRECTION_BOTH)
+    if direction not in DIRECTIONS:
+        direction = DIRECTION_BOTH
+    min_volume = _int(request.GET.get("min_volume"), 0, 0, 10 ** 12)
+    cluster = request.GET.get("cluster", "domain") == "domain"
+    max_nodes = int(getattr(settings, "GRAPH_DIAGRAM_MAX_NODES", 300))
+    fmt = request.GET.get("format", "html")
+
+    error = None
+    mermaid = ""
+    stats = {}
+    roots, unknown = _resolve_roots(graph, request.GET.getlist("app"))
+    if unknown:
+        error = f"Neznámá aplikace: {', '.join(unknown)}"
+
+    if mode == "domains":
+        flows = graph.domain_flows(min_volume)
+        sizes = graph.domain_sizes()
+        mermaid = build_domain_mermaid(flows, sizes)
+        stats = {"domains": len(sizes), "flows": len(flows)}
+        data = {
+            "flows": [
+                {"source": s, "target": t, "integrations": c, "daily_volume": v}
+                for (s, t), (c, v) in sorted(flows.items(), key=lambda kv: -kv[1][1])
+            ],
+        }
+    elif mode == "rankings":
+        metric = request.GET.get("metric", METRIC_PAGERANK)
+        if metric not in METRICS:
+            metric = METRIC_PAGERANK
+        top = _int(request.GET.get("top"), 20, 1, MAX_TOP)
+        degrees = graph.degrees()
+        rows = [
+            {
+                "id": graph.app_ids[r["index"]],
+                "name": graph.names[r["index"]],
+                "domain": graph.domains[r["index"]],
+                "criticality": graph.criticality[r["index"]],
+                "score": r["score"],
+                "out": int(degrees["out"][r["index"]]),
+                "in": int(degrees["in"][r["index"]]),
+            }
+            for r in graph.rankings(metric, top)
+        ]
+        stats = {"metric": metric, "top": top}
+        data = {"rankings": rows}
+    elif roots:
+        depth, edges, truncated = graph.neighbourhood(roots, hops, direction, min_volume, max_nodes)
+        mermaid = build_neighbourhood_mermaid(graph, depth, edges, cluster)
+        stats = {"nodes": len(depth), "edges": len(edges), "truncated": truncated}
+        data = {
+            "nodes": [
+                {"id": graph.app_ids[i], "name": graph.names[i], "domain": graph.domains[i], "hops": d}
+                for i, d in sorted(depth.items(), key=lambda kv: (kv[1], graph.names[kv[0]]))
+            ],
+            "edges": [
+                {
+                    "id": graph.edge_ids[e],
+                    "source": graph.app_ids[graph.src[e]],
+                    "target": graph.app_ids[graph.dst[e]],
+                    "integration_type": graph.edge_type(e),
+                    "direction": "sync" if graph.is_sync[e] else "async",
+                    "daily_volume": graph.volume[e],
+                }
+                for e in edges
+            ],
+        }
+    else:
+        data = {}
+
+    if fmt == "mermaid":
+        return HttpResponse(mermaid, content_type="text/plain; charset=utf-8")
+    if fmt == "json":
+        return JsonResponse({"mermaid": mermaid, "stats": stats, "error": error, **data})
+
+    return render(request, "applications/graph.html", {
+        "mermaid": mermaid,
+        "stats": stats,
+        "error": error,
+        "mode": mode,
+        "rankings": data.get("rankings"),
+        "metrics": METRICS,
+        "params": {
+            "app": ", ".join(request.GET.getlist("app")),
+            "hops": hops,
+            "direction": direction,
+            "min_volume": min_volume,
+            "cluster": cluster,
+            "metric": stats.get("metric", METRIC_PAGERANK),
+            "top": stats.get("top", 20),
+        },
+        "max_hops": range(1, MAX_HOPS + 1),
+        "max_nodes": max_nodes,
+        "total_apps": graph.node_count,
+        "total_integrations": graph.edge_count,
+    })
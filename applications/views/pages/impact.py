@@ -0,0 +1,39 @@
+from django.http import JsonResponse
+from django.shortcuts import render
+from ...services.graph import get_graph
+from ...services.impact import get_impact, DEFAULT_HOPS, MAX_HOPS
+from .graph import _int, _resolve_roots
+
+
+def impact_view(request):
+    """
+    Blast radius výpadku: ?app=<id|název>&app=...&hops=4&callers=1&min_volume=0
+    - callers=1 => zasažení jsou i synchronní volající (jejich volání selžou)
+    - ?format=json => data pro skripty / runbooky
+    """
+    hops = _int(request.GET.get("hops"), DEFAULT_HOPS, 1, MAX_HOPS)
+    include_callers = request.GET.get("callers") == "1"
+    min_volume = _int(request.GET.get("min_volume"), 0, 0, 10 ** 12)
+
+    graph = get_graph()
+    roots, unknown = _resolve_roots(graph, request.GET.getlist("app"))
+    error = f"Neznámá aplikace: {', '.join(unknown)}" if unknown else None
+
+    result = None
+    if roots:
+        result, _ = get_impact([graph.app_ids[i] for i in roots], hops, include_callers, min_volume)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({"error": error, "impact": result}, status=400 if result is None else 200)
+
+    return render(request, "applications/impact.html", {
+        "impact": result,
+        "error": error,
+        "params": {
+            "app": ", ".join(request.GET.getlist("app")),
+            "hops": hops,
+            "callers": include_callers,
+            "min_volume": min_volume,
+        },
+        "max_hops": range(1, MAX_HOPS + 1),
+    })
@@ -1,17 +1,48 @@
+from django.db import IntegrityError, transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from ...models import Integration, Application
+from ...services.page_cache import cached_page
+from ...services.pagination import keyset_page, stream_list
 
+INTEGRATION_ORDERING = ("-daily_volume", "id")
+DUPLICATE_ERROR = "Integrace tohoto typu mezi těmito aplikacemi už existuje."
 
 
+def _is_duplicate(integration) -> bool:
+    return Integration.objects.filter(
+        source_app_id=integration.source_app_id,
+        target_app_id=integration.target_app_id,
+        integration_type=integration.integration_type,
+    ).exclude(pk=integration.pk).exists()
+
+
+def _save(integration) -> bool:
+    # unique (source_app, target_app, integration_type) => duplicita skončí IntegrityError
+    try:
+        with transaction.atomic():
+            integration.save()
+    except IntegrityError:
+        # jiná IntegrityError (např. mezitím smazaná aplikace) není duplicita => propadne
+        if not _is_duplicate(integration):
+            raise
+        return False
+    return True
+
+
+@cached_page("integration_list")
 def integration_list(request):
-    integrations = (
-        Integration.objects.select_related("source_app", "target_app")
-        .order_by("-daily_volume")
-    )
-    apps = Application.objects.all().order_by("name")
+    integrations = Integration.objects.select_related("source_app", "target_app")
+
+    # ?stream=1: všechny řádky po dávkách, jinak stránka podle kurzoru na (-daily_volume, id)
+    if request.GET.get("stream") == "1":
+        return stream_list(
+            request, "applications/integration_list.html", "applications/integration_list_rows.html",
+            {}, integrations.order_by(*INTEGRATION_ORDERING),
+        )
+    page = keyset_page(integrations, INTEGRATION_ORDERING, request.GET)
     return render(request, "applications/integration_list.html", {
-        "integrations": integrations,
-        "apps": apps,
+        "integrations": page.items,
+        "page": page,
     })
 
 
@@ -25,7 +56,7 @@ def integration_create(request):
         source_app = get_object_or_404(Application, id=source_id)
         target_app = get_object_or_404(Application, id=target_id)
 
-        Integration.objects.create(
+        integration = Integration(
             source_app=source_app,
             target_app=target_app,
             integration_type=request.POST.get("integration_type", "API"),
@@ -36,7 +67,14 @@ def integration_create(request):
             frequency=request.POST.get("frequency", ""),
             interface_name=request.POST.get("interface_name", ""),
         )
-        return redirect("integration_list")
+        if _save(integration):
+            return redirect("integration_list")
+        return render(request, "applications/integration_form.html", {
+            "apps": apps,
+            "mode": "create",
+            "integration": integration,
+            "error": DUPLICATE_ERROR,
+        })
 
     return render(request, "applications/integration_form.html", {
         "apps": apps,
@@ -62,9 +100,15 @@ def integration_edit(request, pk: int):
         integration.transport = request.POST.get("transport", integration.transport)
         integration.frequency = request.POST.get("frequency", integration.frequency)
         integration.interface_name = request.POST.get("interface_name", integration.interface_name)
-        integration.save()
 
-        return redirect("integration_list")
+        if _save(integration):
+            return redirect("integration_list")
+        return render(request, "applications/integration_form.html", {
+            "apps": apps,
+            "mode": "edit",
+            "integration": integration,
+            "error": DUPLICATE_ERROR,
+        })
 
     return render(request, "applications/integration_form.html", {
         "apps": apps,
@@ -0,0 +1,107 @@
+import asyncio
+import json
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from django.core.cache import cache
+from ...models import Application, Job
+from ...services.jobs import (
+    aenqueue_analysis, aenqueue_qa, aenqueue_mermaid, aenqueue_description,
+)
+from ..sse import sse_event, sse_response
+
+# jak často se stream ptá DB na stav úlohy a jak dlouho nejvýš čeká
+POLL_SECONDS = 0.5
+MAX_WAIT_SECONDS = 600
+
+
+def job_payload(job: Job) -> dict:
+    return {
+        "job_id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "result": job.result if job.status == Job.STATUS_DONE else None,
+        "error": job.error or None,
+        "status_url": reverse("job_status", args=[job.pk]),
+    }
+
+
+def follow_job(job_id: int, on_done=None) -> StreamingHttpResponse:
+    """
+    SSE stream, který čeká na dokončení úlohy (poll DB, žádný broker):
+    event "status" při změně stavu, pak výsledek jako jedna zpráva + "done" (nebo "error").
+    on_done(result) -> dict: volitelná data do "done" eventu (např. linked_apps u Q&A).
+    """
+    async def events():
+        last_status = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + MAX_WAIT_SECONDS
+        while loop.time() < deadline:
+            job = await Job.objects.filter(pk=job_id).afirst()
+            if job is None:
+                yield sse_event("Úloha neexistuje.", event="error")
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield sse_event({"job_id": job.pk, "status": job.status}, event="status")
+            if job.status == Job.STATUS_DONE:
+                yield sse_event(job.result)
+                yield sse_event(await on_done(job.result) if on_done else {}, event="done")
+                return
+            if job.status == Job.STATUS_FAILED:
+                yield sse_event(job.error or "Úloha selhala.", event="error")
+                return
+            await asyncio.sleep(POLL_SECONDS)
+        yield sse_event("Úloha se nestihla zpracovat (běží run_llm_worker?).", event="error")
+
+    return sse_response(events())
+
+
+async def job_status(request, pk):
+    """GET /jobs/<id>/ – stav úlohy jako JSON, s ?stream=1 jako server-sent events."""
+    if request.GET.get("stream") == "1":
+        return follow_job(pk)
+    job = await aget_object_or_404(Job, pk=pk)
+    return JsonResponse(job_payload(job))
+
+
+def _accepted(job: Job) -> JsonResponse:
+    return JsonResponse(job_payload(job), status=202)
+
+
+@require_POST
+async def enqueue_analysis_job(request):
+    return _accepted(await aenqueue_analysis())
+
+
+@require_POST
+async def enqueue_qa_job(request):
+    question = (request.POST.get("question") or "").strip()
+    if not question and request.content_type == "application/json":
+        try:
+            question = (json.loads(request.body.decode("utf-8")).get("question") or "").strip()
+        except (ValueError, AttributeError):
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if not question:
+        return JsonResponse({"error": "Missing question"}, status=400)
+
+    # rate limit: 1 request / 10s / IP (každá otázka = nový LLM call)
+    cache_key = f"qa:{request.META.get('REMOTE_ADDR')}"
+    if await cache.aget(cache_key):
+        return JsonResponse({"error": "Too many requests, try again."}, status=429)
+    await cache.aset(cache_key, True, timeout=10)
+
+    return _accepted(await aenqueue_qa(question))
+
+
+@require_POST
+async def enqueue_mermaid_job(request, pk):
+    app = await aget_object_or_404(Application, pk=pk)
+    return _accepted(await aenqueue_mermaid(app.pk))
+
+
+@require_POST
+async def enqueue_description_job(request, pk):
+    app = await aget_object_or_404(Application, pk=pk)
+    return _accepted(await aenqueue_description(app.pk))
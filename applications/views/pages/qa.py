@@ -1,25 +1,99 @@
 import json
 import re
 import logging
-from django.shortcuts import render
+from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.core.cache import cache
-from django.db.models import Count
 from django.views.decorators.http import require_POST
-from ...models import Application
-from ...services.llm_client import ask_llm, LLMError
+from ...models import Application, Job
+from ...services.llm_client import ask_llm, aask_llm, astream_llm, LLMError
+from ...services.prompt_budget import PromptBuilder, compact_counts, get_max_rows
+from ...services.jobs import jobs_enabled, aenqueue_qa, enqueue_description
+from ...services.summary import aget_summary
+from ..sse import sse_event, sse_response
+from .jobs import follow_job, job_payload
 
 logger = logging.getLogger(__name__)
 
-def qa_view(request):
+
+async def _build_qa_prompt(question: str) -> str:
+    # agregace i top tech debt z materializovaného souhrnu (1 dotaz)
+    summary = await aget_summary()
+    total_apps = summary.total_apps
+
+    by_domain = summary.top_counts("domain", 8)
+    by_criticality = summary.top_counts("criticality", 8)
+    by_env = summary.top_counts("environment", 8)
+
+    sample_apps = [tuple(row) for row in summary.top_debt[:get_max_rows()]]
+
+    builder = PromptBuilder("qa")
+    builder.add(
+        "Jsi analytik aplikačního portfolia banky. Odpovídej stručně a konkrétně.\n\n"
+        "POŽADOVANÝ FORMÁT ODPOVĚDI:\n"
+        "1) Stručné shrnutí (1–2 věty)\n"
+        "2) Seznam výsledků jako odrážky. U každé odrážky uveď Application ID a název, "
+        "a krátké odůvodnění vycházející z dat.\n\n"
+        "DATA (agregace + aplikace):\n"
+        f"total_apps={total_apps}\n"
+        f"by_domain_top: {compact_counts(by_domain)}\n"
+        f"by_criticality: {compact_counts(by_criticality)}\n"
+        f"by_environment: {compact_counts(by_env)}\n"
+    )
+    builder.add_table("apps", ("id", "name", "domain", "crit", "env", "debt"), sample_apps)
+    builder.add(
+        "\n\nOTÁZKA UŽIVATELE:\n"
+        f"{question}"
+    )
+    return builder.build()
+
+
+async def _linked_apps(answer):
+    """Klikací výsledky podle Application ID v odpovědi."""
+    if not answer:
+        return []
+
+    # najde všechna ID ve tvaru "Application ID: 259"
+    ids = re.findall(r"Application ID\s*:\s*(\d+)", answer)
+
+    # odstraní duplicity a zachová pořadí
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return []
+
+    qs = Application.objects.filter(id__in=ids)
+    by_id = {str(a.id): a async for a in qs}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+async def qa_view(request):
     """
     Jednoduchý Q&A režim:
     - vždy zobrazuje jen poslední otázku a odpověď (uložené v session)
     - do LLM posílá agregované portfolio (ne celý dump)
+    - async view: session, cache i ORM přes async API
+    - POST se stream=1 vrací odpověď jako server-sent events
+    - LLM_JOBS_ENABLED: odpověď počítá worker, view vrací hned (stream sleduje úlohu)
     """
-    last_q = request.session.get("qa_last_question")
-    last_a = request.session.get("qa_last_answer")
+    last_q = await request.session.aget("qa_last_question")
+    last_a = await request.session.aget("qa_last_answer")
     error = None
+    pending = False
+    stream = request.POST.get("stream") == "1"
+
+    # odpověď z workeru (LLM_JOBS_ENABLED, klasický POST bez JS)
+    job_id = await request.session.aget("qa_job_id")
+    if job_id:
+        job = await Job.objects.filter(pk=job_id).afirst()
+        if job is None or job.is_finished:
+            await request.session.apop("qa_job_id")
+            if job is not None and job.status == Job.STATUS_DONE:
+                last_a = job.result
+                await request.session.aset("qa_last_answer", last_a)
+            elif job is not None:
+                error = job.error
+        else:
+            pending = True
 
     if request.method == "POST":
         question = (request.POST.get("question") or "").strip()
@@ -28,60 +102,24 @@ def qa_view(request):
         else:
             # rate limit: 1 request / 10s / IP
             cache_key = f"qa:{request.META.get('REMOTE_ADDR')}"
-            if cache.get(cache_key):
+            if await cache.aget(cache_key):
                 error = "Zkus to prosím za chvíli (rate limit)."
             else:
-                cache.set(cache_key, True, timeout=10)
-
-                total_apps = Application.objects.count()
-
-                by_domain = list(
-                    Application.objects.values("domain")
-                    .annotate(cnt=Count("id"))
-                    .order_by("-cnt")[:8]
-                )
-
-                by_criticality = list(
-                    Application.objects.values("criticality")
-                    .annotate(cnt=Count("id"))
-                    .order_by("-cnt")[:8]
-                )
-
-                by_env = list(
-                    Application.objects.values("environment")
-                    .annotate(cnt=Count("id"))
-                    .order_by("-cnt")[:8]
-                )
-
-                sample_apps = list(
-                    Application.objects.values("id", "name", "domain", "criticality", "environment")[:25]
-                )
-
-                portfolio_context = {
-                    "total_apps": total_apps,
-                    "by_domain_top": by_domain,
-                    "by_criticality": by_criticality,
-                    "by_environment": by_env,
-                    "sample_apps": sample_apps,
-                }
-
-                prompt = (
-                    "Jsi analytik aplikačního portfolia banky. Odpovídej stručně a konkrétně.\n\n"
-                    "POŽADOVANÝ FORMÁT ODPOVĚDI:\n"
-                    "1) Stručné shrnutí (1–2 věty)\n"
-                    "2) Seznam výsledků jako odrážky. U každé odrážky uveď Application ID a název, "
-                    "a krátké odůvodnění vycházející z dat.\n\n"
-                    "DATA (agregace + sample):\n"
-                    f"{json.dumps(portfolio_context, ensure_ascii=False)}\n\n"
-                    "OTÁZKA UŽIVATELE:\n"
-                    f"{question}"
-                )
+                await cache.aset(cache_key, True, timeout=10)
+
+                if jobs_enabled():
+                    return await _qa_job(request, question, stream)
+
+                prompt = await _build_qa_prompt(question)
+
+                if stream:
+                    return await _qa_stream(request, question, prompt)
 
                 try:
-                    answer = ask_llm(prompt)
+                    answer = await aask_llm(prompt)
 
-                    request.session["qa_last_question"] = question
-                    request.session["qa_last_answer"] = answer
+                    await request.session.aset("qa_last_question", question)
+                    await request.session.aset("qa_last_answer", answer)
 
                     last_q = question
                     last_a = answer
@@ -91,28 +129,77 @@ def qa_view(request):
                 except Exception:
                     error = "Nastala neočekávaná chyba."
 
-    # --- NOVĚ: připrav klikací výsledky podle Application ID v odpovědi ---
-    linked_apps = []
-    if last_a:
-        # najde všechna ID ve tvaru "Application ID: 259"
-        ids = re.findall(r"Application ID\s*:\s*(\d+)", last_a)
+        if stream:
+            async def failed():
+                yield sse_event(error, event="error")
+            return sse_response(failed())
 
-        # odstraní duplicity a zachová pořadí
-        ids = list(dict.fromkeys(ids))
-
-        if ids:
-            qs = Application.objects.filter(id__in=ids)
-            by_id = {str(a.id): a for a in qs}
-            linked_apps = [by_id[i] for i in ids if i in by_id]
+    linked_apps = await _linked_apps(last_a)
 
     return render(request, "applications/qa.html", {
         "last_question": last_q,
         "last_answer": last_a,
         "linked_apps": linked_apps,  # <- přidáno
         "error": error,
+        "pending": pending,
     })
 
 
+async def _qa_job(request, question, stream):
+    """LLM_JOBS_ENABLED: otázka jde do fronty, odpověď počítá run_llm_worker."""
+    job = await aenqueue_qa(question)
+    await request.session.aset("qa_last_question", question)
+    await request.session.aset("qa_last_answer", "")
+
+    if not stream:
+        # bez JS: stránka se obnovuje, dokud úloha nedoběhne (viz qa_view)
+        await request.session.aset("qa_job_id", job.pk)
+        return redirect("qa")
+
+    async def on_done(answer):
+        await request.session.aset("qa_last_answer", answer)
+        await request.session.asave()
+        return {"linked_apps": [{"id": a.id, "name": a.name} for a in await _linked_apps(answer)]}
+
+    return follow_job(job.pk, on_done=on_done)
+
+
+async def _qa_stream(request, question, prompt):
+    # otázku ulož hned: session je "modified", takže middleware pošle cookie
+    # ještě před prvním tokenem (odpověď se dopíše na konci streamu)
+    await request.session.aset("qa_last_question", question)
+    await request.session.aset("qa_last_answer", "")
+
+    async def events():
+        parts = []
+        try:
+            async for chunk in astream_llm(prompt):
+                parts.append(chunk)
+                yield sse_event(chunk)
+
+            answer = "".join(parts)
+            await request.session.aset("qa_last_answer", answer)
+            await request.session.asave()
+
+            linked = [{"id": a.id, "name": a.name} for a in await _linked_apps(answer)]
+            yield sse_event({"linked_apps": linked}, event="done")
+
+        except LLMError as e:
+            yield sse_event(f"LLM chyba: {str(e)}", event="error")
+        except Exception:
+            logger.exception("Unexpected error in qa stream")
+            yield sse_event("Nastala neočekávaná chyba.", event="error")
+
+    return sse_response(events())
+
+
+def _build_description_prompt(app) -> str:
+    return (
+        f"Napiš krátký profesionální popis bankovní aplikace '{app.name}'. "
+        f"Max 5 vět. Zaměř se na účel, funkce a integrace."
+    )
+
+
 @require_POST
 def llm_ask(request):
     """
@@ -124,6 +211,7 @@ def llm_ask(request):
     {
       "answer": "..."
     }
+    (s LLM_JOBS_ENABLED 202 + {"job_id": ..., "status_url": ...})
     """
     try:
         body = json.loads(request.body.decode("utf-8"))
@@ -140,12 +228,11 @@ def llm_ask(request):
 
         app = Application.objects.get(pk=app_id)
 
-        prompt = (
-            f"Napiš krátký profesionální popis bankovní aplikace '{app.name}'. "
-            f"Max 5 vět. Zaměř se na účel, funkce a integrace."
-        )
+        if jobs_enabled():
+            # vrátí hned id úlohy; výsledek přes GET status_url
+            return JsonResponse(job_payload(enqueue_description(app.pk)), status=202)
 
-        answer = ask_llm(prompt)
+        answer = ask_llm(_build_description_prompt(app))
         return JsonResponse({"answer": answer})
 
     except json.JSONDecodeError:
@@ -0,0 +1,18 @@
+from django.http import JsonResponse
+from django.shortcuts import render
+from ...services.sync_chains import get_sync_report, DEFAULT_TOP
+from .graph import _int
+
+
+def sync_chains_view(request):
+    """
+    Synchronní řetězce a cykly v integracích (?top=20, ?format=json).
+    Počítá se nad in-memory grafem, výsledek je v cache pro aktuální verzi grafu.
+    """
+    top = _int(request.GET.get("top"), DEFAULT_TOP, 1, 200)
+    report = get_sync_report(top)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse(report)
+
+    return render(request, "applications/sync_chains.html", {"report": report, "top": top})
@@ -0,0 +1,16 @@
+import json
+from django.http import StreamingHttpResponse
+
+
+def sse_event(data, event=None) -> str:
+    """Jedna server-sent event zpráva; data jdou jako JSON (zachová nové řádky)."""
+    out = f"event: {event}\n" if event else ""
+    return out + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # nginx jinak stream bufferuje a první token by přišel až na konci
+    response["X-Accel-Buffering"] = "no"
+    return response
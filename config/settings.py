@@ -25,6 +25,68 @@ load_dotenv()
 LLM_API_KEY = os.getenv("MUJ_OPENAI_API_KEY", "")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
 LLM_TIMEOUT_SECONDS = int(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+# OpenAI-kompatibilní endpoint (lze přepnout na lokální stand-in) + velikost keep-alive poolu
+LLM_API_BASE = os.getenv("LLM_API_BASE", "https://api.openai.com/v1")
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "10"))
+# streamování odpovědí (Q&A, analýza) přes server-sent events
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+# max. souběžných spojení async klienta (async views pod ASGI)
+LLM_ASYNC_MAX_CONNECTIONS = int(os.getenv("LLM_ASYNC_MAX_CONNECTIONS", "50"))
+# retry / backoff / circuit breaker / hedging (0 = bez hedgingu)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.4"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+# vstupní token budget promptu (odhad) a max. řádků portfolia načtených do kontextu
+LLM_INPUT_TOKEN_BUDGET = int(os.getenv("LLM_INPUT_TOKEN_BUDGET", "1500"))
+LLM_CONTEXT_MAX_ROWS = int(os.getenv("LLM_CONTEXT_MAX_ROWS", "500"))
+# cache odpovědí LLM: paměťové LRU + SQLite soubor (prázdná cesta = jen paměť)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_MEMORY_ITEMS = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "256"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(BASE_DIR / "llm_cache.sqlite3"))
+LLM_CACHE_DISK_MAX_MB = int(os.getenv("LLM_CACHE_DISK_MAX_MB", "50"))
+# jak dlouho po vypršení (5 min) se ještě vrací stará analýza, zatímco se na pozadí počítá nová
+ANALYSIS_STALE_SECONDS = int(os.getenv("ANALYSIS_STALE_SECONDS", "3600"))
+# fronta LLM úloh v DB: views jen založí Job, LLM volá `manage.py run_llm_worker`
+LLM_JOBS_ENABLED = os.getenv("LLM_JOBS_ENABLED", "0") == "1"
+LLM_JOB_TIMEOUT_SECONDS = int(os.getenv("LLM_JOB_TIMEOUT_SECONDS", "300"))
+LLM_JOB_MAX_ATTEMPTS = int(os.getenv("LLM_JOB_MAX_ATTEMPTS", "2"))
+LLM_JOB_RETENTION_HOURS = int(os.getenv("LLM_JOB_RETENTION_HOURS", "24"))
+# max. aplikací v N-hop diagramu (větší Mermaid prohlížeč nevykreslí)
+GRAPH_DIAGRAM_MAX_NODES = int(os.getenv("GRAPH_DIAGRAM_MAX_NODES", "300"))
+# Django cache: výchozí LocMem je per proces; pro víc workerů sdílený backend, např.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", "")
+CACHES = {"default": {"BACKEND": CACHE_BACKEND, "LOCATION": CACHE_LOCATION}}
+CACHE_IS_SHARED = CACHE_BACKEND.rsplit(".", 1)[-1] not in ("LocMemCache", "DummyCache")
+# s cache per proces (LocMem) vyprší klíč verze grafu / portfolia po tolika sekundách => ostatní procesy
+# načtou graf a výsledky podle verze znovu nejpozději po této době (0 = nikdy, jen pro jeden proces)
+CACHE_LOCAL_VERSION_SECONDS = int(os.getenv("CACHE_LOCAL_VERSION_SECONDS", "60"))
+# cache stránek a fragmentů podle verze portfolia (0 = vypnuto, vše se renderuje znovu);
+# výchozí zapnuto jen se sdílenou cache – s LocMem by změna v jednom procesu nezneplatnila stránky ostatních
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1" if CACHE_IS_SHARED else "0") == "1"
+PAGE_CACHE_SECONDS = int(os.getenv("PAGE_CACHE_SECONDS", "3600"))
+# seznamy aplikací / integrací: výchozí a max. velikost stránky (?page_size=), dávka pro ?stream=1
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+LIST_PAGE_SIZE_MAX = int(os.getenv("LIST_PAGE_SIZE_MAX", "500"))
+LIST_STREAM_CHUNK_SIZE = int(os.getenv("LIST_STREAM_CHUNK_SIZE", "2000"))
+# fulltext aplikací přes SQLite FTS5 (0 = původní icontains)
+SEARCH_FTS_ENABLED = os.getenv("SEARCH_FTS_ENABLED", "1") == "1"
+# měření requestu (SQL, LLM, šablony) => hlavička Server-Timing + JSON řádek v loggeru applications.timing
+REQUEST_TIMING_ENABLED = os.getenv("REQUEST_TIMING_ENABLED", "1") == "1"
+REQUEST_TIMING_LOG_LEVEL = os.getenv("REQUEST_TIMING_LOG_LEVEL", "INFO")
+# SQLite profil "tuned" (WAL, busy_timeout, synchronous=NORMAL, mmap, cache, BEGIN IMMEDIATE) nebo "default" (bez PRAGMA)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+# perzistentní DB spojení v sekundách (0 = nové spojení na každý request)
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -54,6 +116,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'applications.middleware.request_timing_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,7 +130,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates s měřením doby renderu (Server-Timing)
+        'BACKEND': 'applications.services.request_timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,6 +146,21 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'applications.timing': {
+            'handlers': ['console'],
+            'level': REQUEST_TIMING_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -90,6 +169,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_MAX_AGE > 0,
+        'OPTIONS': {
+            # PRAGMA nastavuje applications.services.sqlite_tuning (connection_created)
+            'transaction_mode': 'IMMEDIATE' if SQLITE_PROFILE == 'tuned' else None,
+        },
     }
 }
 
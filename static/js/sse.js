@@ -0,0 +1,35 @@
+// Čte server-sent events z fetch() odpovědi (EventSource neumí POST).
+// handlers: { message(data), done(data), error(data) } – data jsou už JSON.parse.
+async function readSSE(response, handlers) {
+  if (!response.ok || !response.body) {
+    handlers.error && handlers.error(`HTTP ${response.status}`);
+    return;
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+
+      const handler = handlers[event];
+      if (handler) handler(JSON.parse(data));
+    }
+  }
+}